@@ -5,8 +5,14 @@
 
 from airflow.plugins_manager import AirflowPlugin
 from operators.azure_blob_list_to_s3 import AzureBlobStorageListToS3Operator
+from operators.azure_blob_list_shard_planner import AzureBlobListShardPlannerOperator
+from operators.azure_blob_list_manifest import AzureBlobListManifestOperator
 
 
 class AzureBlobStorageListToS3Plugin(AirflowPlugin):
     name = "AzureBlobStorageListToS3Operator"
-    operators = [AzureBlobStorageListToS3Operator]
+    operators = [
+        AzureBlobStorageListToS3Operator,
+        AzureBlobListShardPlannerOperator,
+        AzureBlobListManifestOperator,
+    ]
@@ -0,0 +1,174 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import fnmatch
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from airflow.models import BaseOperator
+from airflow.contrib.hooks.wasb_hook import WasbHook
+from airflow.hooks.S3_hook import S3Hook
+from azure.storage.blob import BlobPrefix
+
+from operators.blob_manifest import BlobEntry, format_blob_line
+from operators.s3_multipart_upload import S3MultipartUpload
+
+# Maximum number of listed blobs waiting to be written to the manifest.
+MAX_QUEUED_ENTRIES = 100000
+
+
+class AzureBlobListManifestOperator(BaseOperator):
+    """
+    Lists an Azure Blob Storage container and writes the path,key,size
+    manifest consumed by AzureBlobStorageListToS3Operator to Amazon S3.
+    The container is listed one hierarchy level at a time: every virtual
+    directory found is listed by its own thread, so listing throughput grows
+    with the number of threads on containers organized in directories.
+    Returns the S3 URI of the manifest.
+
+    :param wasb_conn_id: Reference to the wasb connection. Default is wasb_default.
+    :type wasb_conn_id: str
+    :param aws_conn_id: The connection ID to use when fetching connection info. Default is aws_default.
+    :type aws_conn_id: str
+    :param container_name: Name of the container
+    :type container_name: str
+    :param prefix: Only blobs under this prefix are listed. Default is ''.
+    :type prefix: str
+    :param delimiter: Delimiter of the virtual directories the listing fans out on. Default is '/'.
+    :type delimiter: str
+    :param include_glob: Optional glob pattern the blob names must match. Ex: *.parquet
+    :type include_glob: str
+    :param include_regex: Optional regular expression the blob names must match.
+    :type include_regex: str
+    :param bucket_name: The bucket the manifest is written to
+    :type bucket_name: str
+    :param manifest_key: Key of the manifest. It is gzip compressed if it ends with .gz
+    :type manifest_key: str
+    :param max_concurrency: Number of prefixes listed in parallel. Default is 16.
+    :type max_concurrency: int
+    """
+
+    template_fields = (
+        "container_name",
+        "prefix",
+        "bucket_name",
+        "manifest_key",
+    )
+
+    def __init__(
+        self,
+        *,
+        wasb_conn_id: str = "wasb_default",
+        aws_conn_id: str = "aws_default",
+        container_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        include_glob: Optional[str] = None,
+        include_regex: Optional[str] = None,
+        bucket_name: str,
+        manifest_key: str,
+        max_concurrency: int = 16,
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.wasb_conn_id = wasb_conn_id
+        self.aws_conn_id = aws_conn_id
+        self.container_name = container_name
+        self.prefix = prefix
+        self.delimiter = delimiter
+        self.include_glob = include_glob
+        self.include_regex = include_regex
+        self.bucket_name = bucket_name
+        self.manifest_key = manifest_key
+        self.max_concurrency = max_concurrency
+
+    def _is_included(self, blob_name: str) -> bool:
+        if self.include_glob and not fnmatch.fnmatchcase(blob_name, self.include_glob):
+            return False
+        if self.include_regex and not re.search(self.include_regex, blob_name):
+            return False
+        return True
+
+    def execute(self, context: dict) -> str:
+        azure_hook = WasbHook(wasb_conn_id=self.wasb_conn_id)
+        s3_hook = S3Hook(aws_conn_id=self.aws_conn_id)
+        # WasbHook builds its BlobServiceClient when created.
+        container_client = azure_hook.blob_service_client.get_container_client(
+            self.container_name
+        )
+        # Workers report ("blob", entry), ("prefix", name), ("done", None) or
+        # ("error", exception). Only this thread submits listings and writes
+        # the manifest, so neither needs locking.
+        events = queue.Queue(maxsize=MAX_QUEUED_ENTRIES)
+        stopped = threading.Event()
+
+        def emit(event: tuple) -> None:
+            while not stopped.is_set():
+                try:
+                    events.put(event, timeout=1)
+                    return
+                except queue.Full:
+                    pass
+
+        def list_prefix(prefix: str) -> None:
+            try:
+                for item in container_client.walk_blobs(
+                    name_starts_with=prefix, delimiter=self.delimiter
+                ):
+                    if stopped.is_set():
+                        return
+                    if isinstance(item, BlobPrefix):
+                        emit(("prefix", item.name))
+                    elif self._is_included(item.name):
+                        emit(("blob", BlobEntry(item.name, item.name, item.size)))
+            except Exception as e:
+                emit(("error", e))
+            else:
+                emit(("done", None))
+
+        blob_count = 0
+        total_size = 0
+        prefix_count = 1
+        with S3MultipartUpload(
+            s3_hook.get_conn(),
+            bucket_name=self.bucket_name,
+            key=self.manifest_key,
+            gzip=self.manifest_key.endswith(".gz"),
+        ) as upload, ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="blob-list"
+        ) as executor:
+            pending = 1
+            executor.submit(list_prefix, self.prefix)
+            try:
+                while pending:
+                    event, value = events.get()
+                    if event == "blob":
+                        upload.write(format_blob_line(value).encode("utf-8"))
+                        blob_count += 1
+                        total_size += value.size
+                    elif event == "prefix":
+                        pending += 1
+                        prefix_count += 1
+                        executor.submit(list_prefix, value)
+                    elif event == "done":
+                        pending -= 1
+                    else:
+                        raise value
+            except BaseException:
+                stopped.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+        self.log.info(
+            "Listed %s blobs for %s bytes in %s prefixes of container: %s",
+            blob_count,
+            total_size,
+            prefix_count,
+            self.container_name,
+        )
+        return f"s3://{self.bucket_name}/{self.manifest_key}"
@@ -0,0 +1,102 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import heapq
+from typing import List
+
+from airflow.models import BaseOperator
+from airflow.hooks.S3_hook import S3Hook
+
+from operators.blob_manifest import BlobEntry, format_blob_line, read_blob_manifest
+from operators.s3_multipart_upload import S3MultipartUpload
+
+
+def plan_shards(entries: List[BlobEntry], shard_count: int) -> List[List[BlobEntry]]:
+    """
+    Splits blob entries into at most ``shard_count`` shards of similar total
+    size, assigning the largest blobs first to the currently smallest shard.
+    Empty shards are dropped.
+    """
+    shards = [[] for _ in range(shard_count)]
+    # (total bytes, number of blobs, shard index) of every shard
+    heap = [(0, 0, index) for index in range(shard_count)]
+    for entry in sorted(entries, key=lambda e: e.size, reverse=True):
+        total_size, blob_count, index = heapq.heappop(heap)
+        shards[index].append(entry)
+        heapq.heappush(heap, (total_size + entry.size, blob_count + 1, index))
+    return [shard for shard in shards if shard]
+
+
+class AzureBlobListShardPlannerOperator(BaseOperator):
+    """
+    Splits a blob manifest into shards balanced by total bytes and writes
+    each of them to Amazon S3, so that one sync can be spread over dynamically
+    mapped AzureBlobStorageListToS3Operator tasks. Returns the S3 URIs of the
+    shard manifests. Ex:
+
+        plan = AzureBlobListShardPlannerOperator(task_id="plan", ...)
+        AzureBlobStorageListToS3Operator.partial(task_id="transfer", ...).expand(
+            blob_list_path_file=plan.output
+        )
+
+    :param aws_conn_id: The connection ID to use when fetching connection info. Default is aws_default.
+    :type aws_conn_id: str
+    :param blob_list_path_file: Path or S3 URI of the manifest to split, on csv format. Ex: path,key,size.
+            NDJSON and Parquet manifests, and gzip or zstd compressed ones, are also read.
+    :type blob_list_path_file: str
+    :param shard_count: Number of shards to create, usually the number of workers available.
+    :type shard_count: int
+    :param bucket_name: The bucket where the shard manifests are written
+    :type bucket_name: str
+    :param shard_prefix: Prefix of the shard manifests keys. Ex: manifests/2023-01-01/
+    :type shard_prefix: str
+    """
+
+    template_fields = (
+        "blob_list_path_file",
+        "bucket_name",
+        "shard_prefix",
+    )
+
+    def __init__(
+        self,
+        *,
+        aws_conn_id: str = "aws_default",
+        blob_list_path_file: str,
+        shard_count: int,
+        bucket_name: str,
+        shard_prefix: str,
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+        if shard_count < 1:
+            raise ValueError(f"shard_count must be at least 1, got {shard_count}")
+        self.aws_conn_id = aws_conn_id
+        self.blob_list_path_file = blob_list_path_file
+        self.shard_count = shard_count
+        self.bucket_name = bucket_name
+        self.shard_prefix = shard_prefix
+
+    def execute(self, context: dict) -> List[str]:
+        s3_hook = S3Hook(aws_conn_id=self.aws_conn_id)
+        entries = list(read_blob_manifest(self.blob_list_path_file, s3_hook))
+        shards = plan_shards(entries, self.shard_count)
+
+        shard_uris = []
+        for index, shard in enumerate(shards):
+            key = f"{self.shard_prefix}shard-{index:05d}.csv"
+            with S3MultipartUpload(
+                s3_hook.get_conn(), bucket_name=self.bucket_name, key=key
+            ) as upload:
+                for entry in shard:
+                    upload.write(format_blob_line(entry).encode("utf-8"))
+            self.log.info(
+                "Shard: %s has %s blobs for %s bytes",
+                key,
+                len(shard),
+                sum(entry.size for entry in shard),
+            )
+            shard_uris.append(f"s3://{self.bucket_name}/{key}")
+        return shard_uris
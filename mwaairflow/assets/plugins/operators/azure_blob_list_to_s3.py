@@ -3,14 +3,53 @@
 # SPDX-License-Identifier: MIT-0
 #
 
+import base64
+import hashlib
+import math
+import os
 import tempfile
-from typing import Optional, Sequence, Union
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
+from airflow.exceptions import AirflowException
 from airflow.models import BaseOperator
 from airflow.contrib.hooks.wasb_hook import WasbHook
 from airflow.hooks.S3_hook import S3Hook
 
 from airflow.utils.decorators import apply_defaults
+from azure.storage.blob import BlobProperties
+
+from operators.blob_bundle import BlobBundleWriter, BundleMember
+from operators.blob_manifest import BlobEntry, read_blob_manifest
+from operators.compression import BLOCK_COMPRESSORS, ParallelCompressor
+from operators.instrumentation import OperatorMetrics
+from operators.s3_key_index import LIST_PAGE_SIZE, S3KeyIndex
+from operators.s3_multipart_upload import (
+    DEFAULT_PART_SIZE,
+    S3MultipartUpload,
+    adaptive_part_size,
+)
+from operators.throttling import AdaptiveThrottle
+from operators.transfer_ledger import SqliteTransferLedger, TransferLedger
+
+# Number of failed blobs listed individually in the error raised at the end
+# of a concurrent transfer.
+MAX_REPORTED_FAILURES = 50
+
+# S3 object metadata recording the version and checksum of the source blob.
+AZURE_ETAG_METADATA = "azure-etag"
+MD5_METADATA = "content-md5"
+
+
+def _content_md5(blob_properties: BlobProperties) -> Optional[str]:
+    content_md5 = blob_properties.content_settings.content_md5
+    return bytes(content_md5).hex() if content_md5 else None
 
 
 class AzureBlobStorageListToS3Operator(BaseOperator):
@@ -23,13 +62,18 @@ class AzureBlobStorageListToS3Operator(BaseOperator):
     :type wasb_conn_id: str
     :param aws_conn_id: The connection ID to use when fetching connection info. Default is aws_default.
     :type aws_conn_id: str
-    :param blob_list_path_file: Path to the file that has the list of blobs with size on csv format. Ex: path,size
+    :param blob_list_path_file: Path to the file that has the list of blobs with size on csv format. Ex: path,key,size.
+            Either a local path, an S3 URI (ex: s3://bucket/manifest.csv) or an Azure Blob Storage
+            URI (ex: wasb://container/manifest.csv). The manifest is streamed and can also be
+            NDJSON (.ndjson) or Parquet (.parquet), and text manifests can be gzip (.gz) or
+            zstd (.zst) compressed.
     :type blob_list_path_file: str
     :param container_name: Name of the container
     :type container_name: str
     :param bucket_name: The bucket to upload to
     :type bucket_name: str
-    :param gzip: If True, the file will be compressed locally. Default is False.
+    :param gzip: If True, the file will be compressed locally. Same as compression='gzip'.
+            Default is False.
     :type gzip: bool
     :param replace: A flag to decide whether or not to overwrite the key
             if it already exists. If replace is False and the key exists, an
@@ -43,6 +87,78 @@ class AzureBlobStorageListToS3Operator(BaseOperator):
     :type acl_policy: str
     :param s3_prefix: Option to upload data on a prefix in your Amazon S3 Bucket. Default is ''.
     :type s3_prefix: str
+    :param max_concurrency: Number of blobs transferred in parallel. With a value greater than 1,
+            a failing blob does not stop the transfer of the others and all failures are
+            reported at the end of the task. Default is 1 (serial transfer).
+    :type max_concurrency: int
+    :param streaming: If True, blobs are piped from Azure Blob Storage into an Amazon S3 multipart
+            upload through an in-memory buffer instead of being staged in a local temporary file.
+            Default is False.
+    :type streaming: bool
+    :param part_size: Size in bytes of the in-memory buffer and of each multipart part when
+            streaming. Must be at least 5 MiB. Default is 8 MiB.
+    :type part_size: int
+    :param large_blob_threshold: Blobs of at least this size in bytes are downloaded in parallel
+            byte ranges, each uploaded as a part of an Amazon S3 multipart upload. Not used
+            with compression. 0 disables it. Default is 256 MiB.
+    :type large_blob_threshold: int
+    :param large_blob_concurrency: Maximum number of ranges of a large blob transferred in
+            parallel. Default is 8.
+    :type large_blob_concurrency: int
+    :param large_blob_parts_in_flight: Maximum number of ranges held in memory at once across
+            all the large blobs transferred in parallel, so that memory use is about this
+            number times the part size. Default is large_blob_concurrency.
+    :type large_blob_parts_in_flight: int
+    :param s3_index_max_keys: Before transferring, the objects under s3_prefix are listed once to
+            answer existence and size checks from memory instead of one HEAD request per blob.
+            If the prefix holds more objects than this, or listing it would take more requests
+            than there are blobs to check, per-key HEAD requests are used instead.
+            0 disables the listing. Default is 1000000.
+    :type s3_index_max_keys: int
+    :param change_detection: How an existing S3 object is found to be up to date. With "size",
+            it only needs the same size as the blob. With "checksum", the blob Content-MD5 and
+            ETag are compared to the S3 ETag and to the metadata recorded when the object was
+            uploaded, so that same-size edits are transferred. Checksum uploads always stream,
+            compute the MD5 inline and check it against the blob Content-MD5. Default is "size".
+    :type change_detection: str
+    :param ledger: Optional transfer ledger recording each transferred blob with its size, ETag
+            and timestamp, so that retries and later runs skip already synced blobs without
+            touching Amazon S3. Either the S3 URI of a SQLite ledger checkpointed to S3
+            (ex: s3://mwaa-bucket/ledgers/sync.sqlite) or a TransferLedger instance. The URI is
+            templated, so mapped tasks can each use their own ledger with {{ ti.map_index }}.
+            Default is None.
+    :type ledger: Union[str, TransferLedger]
+    :param throttling_retries: Number of times a request throttled by Azure Blob Storage
+            (ServerBusy) or Amazon S3 (SlowDown) is retried, with jittered exponential backoff.
+            On throttling, the request rate to the service is also halved and then grows back
+            linearly, and the current rate is logged. Default is 10.
+    :type throttling_retries: int
+    :param bundle_threshold: Blobs smaller than this size in bytes are not uploaded as individual
+            objects but packed into tar archives, saving the existence checks and PUT request of
+            every blob. Each archive under <s3_prefix><bundle_prefix> is followed by an
+            <archive>.tar.index.csv object listing the key, offset and size of its members, so
+            that one member can be read with a byte-range GET. Members are neither compressed
+            nor compared with existing objects; use a ledger to skip the ones already bundled
+            on retries. 0 disables bundling. Default is 0.
+    :type bundle_threshold: int
+    :param bundle_size: Approximate maximum size in bytes of an archive. Default is 128 MiB.
+    :type bundle_size: int
+    :param bundle_prefix: Prefix of the archives, appended to s3_prefix. Default is 'bundles/'.
+    :type bundle_prefix: str
+    :param compression: Codec the objects are compressed with, 'gzip' or 'zstd' (requires
+            zstandard). Blobs are streamed and compressed in independent blocks on several
+            threads while earlier blocks are uploaded; the objects are standard multi-member
+            gzip or multi-frame zstd streams. Default is None, or 'gzip' if gzip is True.
+    :type compression: str
+    :param compression_concurrency: Number of threads compressing blocks, shared by all the
+            blobs transferred in parallel. Default is the number of CPUs.
+    :type compression_concurrency: int
+    :param metrics_sample_rate: The time spent in each phase (azure_download, s3_head, s3_upload...)
+            and the numbers of blobs and bytes transferred are sent as StatsD metrics prefixed
+            with plugins.<dag_id>.<task_id> at the end of the task, and summarized in its log.
+            This is the fraction of the calls of each phase also sent as individual timers.
+            Default is 1.
+    :type metrics_sample_rate: float
     """
 
     @apply_defaults
@@ -59,9 +175,36 @@ class AzureBlobStorageListToS3Operator(BaseOperator):
         encrypt: bool = False,
         acl_policy: str = None,
         s3_prefix: str = "",
+        max_concurrency: int = 1,
+        streaming: bool = False,
+        part_size: int = DEFAULT_PART_SIZE,
+        large_blob_threshold: int = 256 * 1024 * 1024,
+        large_blob_concurrency: int = 8,
+        large_blob_parts_in_flight: Optional[int] = None,
+        s3_index_max_keys: int = 1_000_000,
+        change_detection: str = "size",
+        ledger: Optional[Union[str, TransferLedger]] = None,
+        throttling_retries: int = 10,
+        bundle_threshold: int = 0,
+        bundle_size: int = 128 * 1024 * 1024,
+        bundle_prefix: str = "bundles/",
+        compression: Optional[str] = None,
+        compression_concurrency: Optional[int] = None,
+        metrics_sample_rate: float = 1.0,
         **kwargs,
     ) -> None:
         super().__init__(**kwargs)
+        if change_detection not in ("size", "checksum"):
+            raise ValueError(
+                f"change_detection must be 'size' or 'checksum', got {change_detection}"
+            )
+        if gzip and compression is None:
+            compression = "gzip"
+        if compression is not None and compression not in BLOCK_COMPRESSORS:
+            raise ValueError(
+                f"compression must be one of {', '.join(BLOCK_COMPRESSORS)}, "
+                f"got {compression}"
+            )
         self.wasb_conn_id = wasb_conn_id
         self.aws_conn_id = aws_conn_id
         self.blob_list_path_file = blob_list_path_file
@@ -72,96 +215,685 @@ class AzureBlobStorageListToS3Operator(BaseOperator):
         self.encrypt = encrypt
         self.acl_policy = acl_policy
         self.s3_prefix = s3_prefix
+        self.max_concurrency = max_concurrency
+        self.streaming = streaming
+        self.part_size = part_size
+        self.large_blob_threshold = large_blob_threshold
+        self.large_blob_concurrency = large_blob_concurrency
+        self.large_blob_parts_in_flight = (
+            large_blob_parts_in_flight or large_blob_concurrency
+        )
+        self.s3_index_max_keys = s3_index_max_keys
+        self.change_detection = change_detection
+        self.ledger = ledger
+        self.throttling_retries = throttling_retries
+        self.bundle_threshold = bundle_threshold
+        self.bundle_size = bundle_size
+        self.bundle_prefix = bundle_prefix
+        self.compression = compression
+        self.compression_concurrency = compression_concurrency or os.cpu_count() or 1
+        self.metrics_sample_rate = metrics_sample_rate
+        self._s3_index = None
+        self._ledger = None
+        self._bundler = None
+        self._compression_executor = None
+        self._metrics = None
+        self._azure_throttle = None
+        self._s3_throttle = None
+        self._large_blob_parts = None
 
     template_fields = (
         "blob_list_path_file",
         "container_name",
         "bucket_name",
+        "ledger",
     )
 
     def execute(self, context: dict) -> str:
         azure_hook = WasbHook(wasb_conn_id=self.wasb_conn_id)
         s3_hook = S3Hook(aws_conn_id=self.aws_conn_id)
-        print("Listing blob from: %s", self.blob_list_path_file)
+        # WasbHook builds its BlobServiceClient when created, and get_conn()
+        # would build another one: threads share azure_hook.blob_service_client.
+        # The boto3 S3 client is built up front for the same reason, so that
+        # threads do not race to create their own (both are thread-safe).
+        s3_hook.get_conn()
+        self.log.info("Listing blob from: %s", self.blob_list_path_file)
+        self._metrics = OperatorMetrics(
+            f"plugins.{self.dag_id}.{self.task_id}", self.metrics_sample_rate
+        )
+
+        # Shared by all the transfer threads, so that they back off together.
+        self._azure_throttle = AdaptiveThrottle(
+            "Azure Blob Storage", max_attempts=self.throttling_retries + 1
+        )
+        self._s3_throttle = AdaptiveThrottle(
+            "Amazon S3", max_attempts=self.throttling_retries + 1
+        )
+        # Ranges of large blobs are buffered whole: max_concurrency blobs each
+        # transferred by large_blob_concurrency threads would otherwise hold
+        # the product of both in memory.
+        self._large_blob_parts = threading.BoundedSemaphore(
+            self.large_blob_parts_in_flight
+        )
+        self._ledger = self._open_ledger()
+        if self.compression is not None:
+            self._compression_executor = ThreadPoolExecutor(
+                max_workers=self.compression_concurrency, thread_name_prefix="compress"
+            )
+        try:
+            return self._transfer_manifest(azure_hook, s3_hook)
+        finally:
+            if self._compression_executor is not None:
+                self._compression_executor.shutdown()
+            self.log.info(self._azure_throttle.summary())
+            self.log.info(self._s3_throttle.summary())
+            self._metrics.emit()
+            self.log.info("Transfer summary: %s", self._metrics.summary())
+            if self._ledger is not None:
+                # Always checkpoint, so that a retry resumes where this run stopped.
+                self._ledger.close()
+
+    def _open_ledger(self) -> Optional[TransferLedger]:
+        if self.ledger is None:
+            return None
+        if isinstance(self.ledger, str):
+            ledger = SqliteTransferLedger(self.ledger, aws_conn_id=self.aws_conn_id)
+        else:
+            ledger = self.ledger
+        ledger.open()
+        return ledger
 
+    def _transfer_manifest(self, azure_hook: WasbHook, s3_hook: S3Hook) -> List[str]:
+        blobs = read_blob_manifest(self.blob_list_path_file, s3_hook, azure_hook)
+        self._s3_index, blobs = self._build_s3_index(s3_hook, iter(blobs))
+        self._bundler = self._open_bundler(s3_hook)
         s3_list = []
+        try:
+            if self.max_concurrency > 1:
+                s3_list = self._transfer_blobs_concurrently(azure_hook, s3_hook, blobs)
+            else:
+                for blob_name, s3_object_key_no_prefix, blob_size in blobs:
+                    s3_uri = self._transfer_blob(
+                        azure_hook,
+                        s3_hook,
+                        blob_name,
+                        s3_object_key_no_prefix,
+                        blob_size,
+                    )
+                    if s3_uri:
+                        s3_list.append(s3_uri)
+        finally:
+            if self._bundler is not None:
+                # Keep the blobs bundled so far, even if the transfer failed.
+                for key in self._bundler.close():
+                    s3_list.append(f"s3://{self.bucket_name}/{key}")
+        return s3_list
 
-        with open(self.blob_list_path_file, "r") as f:
-            for blob in f:
-                blob = blob.rstrip("\n")
-                blob_name = blob.split(",")[0]
-                s3_object_key_no_prefix = blob.split(",")[1]
-                blob_size = int(blob.split(",")[2])
+    def _open_bundler(self, s3_hook: S3Hook) -> Optional[BlobBundleWriter]:
+        if self.bundle_threshold <= 0:
+            return None
+        # Unique per attempt, so that a retry never overwrites the archives
+        # of blobs recorded in the ledger by a previous one.
+        run_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        return BlobBundleWriter(
+            self._s3_throttle.wrap(s3_hook.get_conn()),
+            bucket_name=self.bucket_name,
+            key_prefix=f"{self.s3_prefix}{self.bundle_prefix}bundle-{run_id}-",
+            max_bundle_size=self.bundle_size,
+            part_size=self.part_size,
+            encrypt=self.encrypt,
+            acl_policy=self.acl_policy,
+            on_bundle=self._record_bundle,
+        )
 
-                print("blob_name: %s", blob_name)
+    def _record_bundle(self, members: List[BundleMember]) -> None:
+        self.log.info("Bundled %s blobs", len(members))
+        if self._ledger is not None:
+            for member in members:
+                self._ledger.record(
+                    member.blob_name, member.key, member.size, member.etag
+                )
 
-                with tempfile.NamedTemporaryFile() as temp_file:
-                    self.log.info(
-                        "Downloading data from container: %s and blob: %s on temp_file: %s",
-                        self.container_name,
-                        blob_name,
-                        temp_file.name,
+    def _build_s3_index(
+        self, s3_hook: S3Hook, blobs: Iterator[BlobEntry]
+    ) -> Tuple[Optional[S3KeyIndex], Iterator[BlobEntry]]:
+        """
+        Returns the index of s3_prefix, or None, and the blobs of the
+        manifest, of which the first ones were read ahead to count them.
+        """
+        if self.s3_index_max_keys <= 0:
+            return None, blobs
+        # One ListObjectsV2 call replaces up to 1000 HEAD requests; listing more
+        # pages than there are blobs to check would cost more than it saves.
+        # Counting the blobs up to the number of pages of a full index is
+        # enough to know, so only that many are read ahead, and kept.
+        max_requests = math.ceil(self.s3_index_max_keys / LIST_PAGE_SIZE)
+        read_ahead = list(islice(blobs, max_requests))
+        with self._metrics.phase("s3_list"):
+            s3_index = S3KeyIndex.build(
+                self._s3_throttle.wrap(s3_hook.get_conn()),
+                bucket_name=self.bucket_name,
+                prefix=self.s3_prefix,
+                max_keys=self.s3_index_max_keys,
+                max_requests=len(read_ahead),
+            )
+        if s3_index is not None:
+            self.log.info(
+                "Indexed %s objects on bucket_name: %s and prefix: %s",
+                len(s3_index),
+                self.bucket_name,
+                self.s3_prefix,
+            )
+        return s3_index, chain(read_ahead, blobs)
+
+    def _transfer_blobs_concurrently(
+        self,
+        azure_hook: WasbHook,
+        s3_hook: S3Hook,
+        blobs: Iterable[BlobEntry],
+    ) -> List[str]:
+        """
+        Runs the per-blob pipeline on a pool of ``max_concurrency`` threads.
+        At most ``2 * max_concurrency`` blobs are in flight at any time so the
+        manifest is still consumed lazily, and results are collected in
+        manifest order so ``s3_list`` matches the serial mode. A failing blob
+        does not stop the others; all failures are reported once the whole
+        manifest has been processed.
+        """
+        s3_list = []
+        failures = []
+        in_flight = deque()
+
+        def collect(blob_name: str, future: Future) -> None:
+            try:
+                s3_uri = future.result()
+            except Exception as e:
+                self.log.error("Transfer of blob: %s failed: %s", blob_name, e)
+                failures.append((blob_name, e))
+            else:
+                if s3_uri:
+                    s3_list.append(s3_uri)
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="blob-transfer"
+        ) as executor:
+            for blob_name, s3_object_key_no_prefix, blob_size in blobs:
+                if len(in_flight) >= 2 * self.max_concurrency:
+                    collect(*in_flight.popleft())
+                future = executor.submit(
+                    self._transfer_blob,
+                    azure_hook,
+                    s3_hook,
+                    blob_name,
+                    s3_object_key_no_prefix,
+                    blob_size,
+                )
+                in_flight.append((blob_name, future))
+            while in_flight:
+                collect(*in_flight.popleft())
+
+        if failures:
+            report = "\n".join(
+                f"  {blob_name}: {e!r}"
+                for blob_name, e in failures[:MAX_REPORTED_FAILURES]
+            )
+            if len(failures) > MAX_REPORTED_FAILURES:
+                report += f"\n  ... and {len(failures) - MAX_REPORTED_FAILURES} more"
+            raise AirflowException(
+                f"{len(failures)} blob(s) failed to transfer "
+                f"({len(s3_list)} uploaded):\n{report}"
+            )
+        return s3_list
+
+    def _transfer_blob(
+        self,
+        azure_hook: WasbHook,
+        s3_hook: S3Hook,
+        blob_name: str,
+        s3_object_key_no_prefix: str,
+        blob_size: int,
+    ) -> Optional[str]:
+        """
+        Transfers a single blob to Amazon S3 unless an object with the same
+        size already exists. Returns the S3 URI of the uploaded object, or
+        None when the upload was discarded.
+        """
+        self.log.info("blob_name: %s", blob_name)
+
+        s3_object_key = self.s3_prefix + s3_object_key_no_prefix
+
+        blob_properties = None
+        if self.change_detection == "checksum":
+            with self._metrics.phase("azure_properties"):
+                blob_properties = self._azure_throttle.call(
+                    azure_hook.blob_service_client.get_blob_client(
+                        container=self.container_name, blob=blob_name
+                    ).get_blob_properties
+                )
+        source_etag = blob_properties.etag if blob_properties else None
+
+        if self._ledger is not None and self._ledger.is_synced(
+            blob_name, s3_object_key, blob_size, source_etag
+        ):
+            self.log.info(
+                "Blob: %s has already been transferred according to the ledger",
+                blob_name,
+            )
+            self._metrics.incr("skipped")
+            return None
+
+        if self._bundler is not None and blob_size < self.bundle_threshold:
+            self._bundle_blob(azure_hook, blob_name, s3_object_key, blob_properties)
+            self._metrics.incr("records")
+            self._metrics.incr("bytes", blob_size)
+            return None
+
+        with self._metrics.phase("s3_head"):
+            needs_upload = self._needs_upload(
+                s3_hook, s3_object_key, blob_size, blob_properties
+            )
+        if not needs_upload:
+            self._metrics.incr("skipped")
+            if self._ledger is not None:
+                self._ledger.record(blob_name, s3_object_key, blob_size, source_etag)
+            return None
+
+        self.log.info(
+            "Uploading data from blob's: %s into Amazon S3 bucket: %s",
+            s3_object_key,
+            self.bucket_name,
+        )
+        if (
+            self.large_blob_threshold
+            and blob_size >= self.large_blob_threshold
+            and self.compression is None
+        ):
+            etag = self._transfer_large_blob(
+                azure_hook,
+                s3_hook,
+                blob_name,
+                s3_object_key,
+                blob_size,
+                blob_properties,
+            )
+        elif (
+            self.streaming
+            or blob_properties is not None
+            or self.compression is not None
+        ):
+            etag = self._stream_blob(azure_hook, s3_hook, blob_name, s3_object_key)
+        else:
+            etag = self._copy_blob_through_file(
+                azure_hook, s3_hook, blob_name, s3_object_key
+            )
+        if self._ledger is not None:
+            self._ledger.record(blob_name, s3_object_key, blob_size, etag)
+        self._metrics.incr("records")
+        self._metrics.incr("bytes", blob_size)
+        self.log.info(
+            "Resources have been uploaded from blob: %s to Amazon S3 bucket:%s",
+            s3_object_key,
+            self.bucket_name,
+        )
+        return f"s3://{self.bucket_name}/{s3_object_key}"
+
+    def _bundle_blob(
+        self,
+        azure_hook: WasbHook,
+        blob_name: str,
+        s3_object_key: str,
+        blob_properties: Optional[BlobProperties],
+    ) -> None:
+        def download():
+            downloader = azure_hook.download(
+                container_name=self.container_name, blob_name=blob_name
+            )
+            return downloader, downloader.readall()
+
+        with self._metrics.phase("azure_download"):
+            downloader, data = self._azure_throttle.call(download)
+        if blob_properties is not None:
+            source_md5 = _content_md5(blob_properties)
+            received_md5 = hashlib.md5(data).hexdigest()
+            if source_md5 is not None and received_md5 != source_md5:
+                raise AirflowException(
+                    f"Blob {blob_name} has Content-MD5 {source_md5} "
+                    f"but {received_md5} was received"
+                )
+        with self._metrics.phase("s3_upload"):
+            self._bundler.add(
+                blob_name, s3_object_key, data, downloader.properties.etag
+            )
+
+    def _head_s3_object(
+        self, s3_hook: S3Hook, s3_object_key: str
+    ) -> Optional[Tuple[int, str, Optional[Dict[str, str]]]]:
+        """
+        Returns ``(size, etag, metadata)`` of an existing S3 object, or None if
+        it does not exist. Answered from the listing index when one was built,
+        in which case metadata is None, otherwise with a single HEAD request.
+        """
+        if self._s3_index is not None:
+            s3_object = self._s3_index.get(s3_object_key)
+            if s3_object is None:
+                return None
+            return (*s3_object, None)
+        response = self._s3_throttle.call(
+            s3_hook.head_object, key=s3_object_key, bucket_name=self.bucket_name
+        )
+        if response is None:
+            return None
+        return (
+            response["ContentLength"],
+            response["ETag"].strip('"'),
+            response.get("Metadata", {}),
+        )
+
+    def _needs_upload(
+        self,
+        s3_hook: S3Hook,
+        s3_object_key: str,
+        blob_size: int,
+        blob_properties: Optional[BlobProperties] = None,
+    ) -> bool:
+        s3_object = self._head_s3_object(s3_hook, s3_object_key)
+        if s3_object is not None:
+            s3_object_size, s3_etag, s3_metadata = s3_object
+            self.log.info(
+                "Object exists on s3 on bucket_name: %s and key: %s with size: %s ",
+                self.bucket_name,
+                s3_object_key,
+                s3_object_size,
+            )
+
+            # The size of a compressed object cannot be compared with the
+            # size of the blob, only its checksum metadata can.
+            if blob_size != s3_object_size and not (
+                self.compression is not None and blob_properties is not None
+            ):
+                self.log.info(
+                    "Object does not have the same size on Amazon S3 than on Azure Blob Storage."
+                )
+            elif blob_properties is not None and not self._has_same_content(
+                s3_hook, s3_object_key, s3_etag, s3_metadata, blob_properties
+            ):
+                self.log.info(
+                    "Object does not have the same checksum on Amazon S3 than on Azure Blob Storage."
+                )
+            else:
+                self.log.info(
+                    "Object has the same size on Amazon S3 than on Azure Blob Storage. Upload to Amazon S3 will be discarded"
+                )
+                return False
+
+            if not self.replace:
+                # Same error S3Hook.load_file raises in this situation.
+                raise ValueError(f"The key {s3_object_key} already exists.")
+        else:
+            self.log.info(
+                "Object doesn't exists on s3 on bucket_name: %s and key: %s ",
+                self.bucket_name,
+                s3_object_key,
+            )
+        return True
+
+    def _has_same_content(
+        self,
+        s3_hook: S3Hook,
+        s3_object_key: str,
+        s3_etag: str,
+        s3_metadata: Optional[Dict[str, str]],
+        blob_properties: BlobProperties,
+    ) -> bool:
+        """
+        Compares the content of the blob with the S3 object without reading
+        either of them. The ETag of a single part upload is the MD5 of the
+        object and can be compared with the Azure Content-MD5 directly.
+        Otherwise the Azure ETag and MD5 recorded in the object metadata when
+        it was uploaded are used.
+        """
+        source_md5 = _content_md5(blob_properties)
+        if source_md5 is not None and s3_etag == source_md5:
+            return True
+        if s3_metadata is None:
+            s3_metadata = self._s3_throttle.call(
+                s3_hook.head_object, key=s3_object_key, bucket_name=self.bucket_name
+            ).get("Metadata", {})
+        if s3_metadata.get(AZURE_ETAG_METADATA) == blob_properties.etag.strip('"'):
+            return True
+        return source_md5 is not None and s3_metadata.get(MD5_METADATA) == source_md5
+
+    def _checksum_metadata(
+        self, blob_properties: Optional[BlobProperties]
+    ) -> Optional[Dict[str, str]]:
+        if self.change_detection != "checksum" or blob_properties is None:
+            return None
+        metadata = {AZURE_ETAG_METADATA: blob_properties.etag.strip('"')}
+        source_md5 = _content_md5(blob_properties)
+        if source_md5 is not None:
+            metadata[MD5_METADATA] = source_md5
+        return metadata
+
+    def _copy_blob_through_file(
+        self,
+        azure_hook: WasbHook,
+        s3_hook: S3Hook,
+        blob_name: str,
+        s3_object_key: str,
+    ) -> str:
+        """
+        Stages the blob in a local temporary file before uploading it.
+        Returns the ETag of the downloaded blob.
+        """
+        with tempfile.NamedTemporaryFile() as temp_file:
+            self.log.info(
+                "Downloading data from container: %s and blob: %s on temp_file: %s",
+                self.container_name,
+                blob_name,
+                temp_file.name,
+            )
+
+            def download():
+                # A throttled download is restarted from the beginning.
+                temp_file.seek(0)
+                temp_file.truncate()
+                downloader = azure_hook.download(
+                    container_name=self.container_name, blob_name=blob_name
+                )
+                downloader.readinto(temp_file)
+                temp_file.flush()
+                return downloader
+
+            with self._metrics.phase("azure_download"):
+                downloader = self._azure_throttle.call(download)
+            with self._metrics.phase("s3_upload"):
+                self._s3_throttle.call(
+                    s3_hook.load_file,
+                    filename=temp_file.name,
+                    key=s3_object_key,
+                    bucket_name=self.bucket_name,
+                    replace=self.replace,
+                    encrypt=self.encrypt,
+                    acl_policy=self.acl_policy,
+                )
+        return downloader.properties.etag
+
+    def _stream_blob(
+        self,
+        azure_hook: WasbHook,
+        s3_hook: S3Hook,
+        blob_name: str,
+        s3_object_key: str,
+    ) -> str:
+        """
+        Pipes the Azure download stream into an S3 multipart upload without
+        touching the local disk. Memory use is bounded by one Azure chunk plus
+        one S3 part, whatever the size of the blob. Returns the ETag of the
+        downloaded blob.
+
+        With compression, blocks of the blob are compressed in parallel by
+        ParallelCompressor while earlier ones are uploaded.
+
+        With checksum change detection, the MD5 of the blob is computed while
+        it streams through, checked against the Azure Content-MD5 before the
+        upload is completed, and recorded in the object metadata.
+        """
+        self.log.info(
+            "Streaming data from container: %s and blob: %s",
+            self.container_name,
+            blob_name,
+        )
+        with self._metrics.phase("azure_download"):
+            downloader = self._azure_throttle.call(
+                azure_hook.download,
+                container_name=self.container_name,
+                blob_name=blob_name,
+            )
+        metadata = self._checksum_metadata(downloader.properties)
+        md5 = hashlib.md5() if metadata is not None else None
+        with S3MultipartUpload(
+            self._s3_throttle.wrap(s3_hook.get_conn()),
+            bucket_name=self.bucket_name,
+            key=s3_object_key,
+            part_size=self.part_size,
+            encrypt=self.encrypt,
+            acl_policy=self.acl_policy,
+            metadata=metadata,
+        ) as upload:
+            sink = upload
+            if self.compression is not None:
+                sink = ParallelCompressor(
+                    upload,
+                    codec=self.compression,
+                    max_workers=self.compression_concurrency,
+                    executor=self._compression_executor,
+                )
+            # Only aggregated: a timer per chunk would slow the loop down.
+            for chunk in self._metrics.timed_iter(
+                "azure_download", downloader.chunks()
+            ):
+                if md5 is not None:
+                    md5.update(chunk)
+                start = time.perf_counter()
+                sink.write(chunk)
+                self._metrics.add_time("s3_upload", time.perf_counter() - start)
+            if sink is not upload:
+                with self._metrics.phase("s3_upload"):
+                    sink.close()
+            if md5 is not None:
+                received_md5 = md5.hexdigest()
+                source_md5 = metadata.get(MD5_METADATA)
+                if source_md5 is not None and received_md5 != source_md5:
+                    raise AirflowException(
+                        f"Blob {blob_name} has Content-MD5 {source_md5} "
+                        f"but {received_md5} was received"
                     )
+                # Only taken into account when the object is smaller than a
+                # part, as the metadata of a multipart upload is set when it
+                # starts.
+                upload.metadata.setdefault(MD5_METADATA, received_md5)
+        return downloader.properties.etag
+
+    def _transfer_large_blob(
+        self,
+        azure_hook: WasbHook,
+        s3_hook: S3Hook,
+        blob_name: str,
+        s3_object_key: str,
+        blob_size: int,
+        blob_properties: Optional[BlobProperties] = None,
+    ) -> str:
+        """
+        Downloads byte ranges of the blob in parallel and uploads each of them
+        as a part of an S3 multipart upload, so a single large blob uses
+        several connections on both sides. Part size and parallelism grow with
+        the size of the blob. A range is downloaded only once a slot of the
+        large_blob_parts_in_flight shared by all the blobs is free, and holds
+        it until its part is uploaded, which bounds the memory used by all the
+        large blobs together.
 
-                    azure_hook.get_file(
-                        file_path=temp_file.name,
+        In checksum mode, each range is checked on download against the MD5
+        that Azure computes for every chunk of it, and uploaded with its own
+        Content-MD5 so that Amazon S3 rejects a part corrupted on the way.
+        The MD5 of the whole blob is not recomputed, as ranges are received
+        out of order; the MD5 of the blob, if any, is recorded as metadata.
+        Returns the ETag of the blob, and fails if the blob changed during the
+        transfer.
+        """
+        part_size = adaptive_part_size(
+            blob_size, self.large_blob_concurrency, self.part_size
+        )
+        ranges = [
+            (part_number, offset, min(part_size, blob_size - offset))
+            for part_number, offset in enumerate(range(0, blob_size, part_size), 1)
+        ]
+        concurrency = min(self.large_blob_concurrency, len(ranges))
+        checksum_metadata = self._checksum_metadata(blob_properties)
+        verify = checksum_metadata is not None
+        self.log.info(
+            "Transferring blob: %s of %s bytes in %s parts of %s bytes with %s threads",
+            blob_name,
+            blob_size,
+            len(ranges),
+            part_size,
+            concurrency,
+        )
+
+        with S3MultipartUpload(
+            self._s3_throttle.wrap(s3_hook.get_conn()),
+            bucket_name=self.bucket_name,
+            key=s3_object_key,
+            part_size=part_size,
+            encrypt=self.encrypt,
+            acl_policy=self.acl_policy,
+            metadata=checksum_metadata,
+        ) as upload:
+
+            def transfer_range(
+                part_number: int, offset: int, length: int
+            ) -> Tuple[str, int]:
+
+                def download_range():
+                    downloader = azure_hook.download(
                         container_name=self.container_name,
                         blob_name=blob_name,
+                        offset=offset,
+                        length=length,
+                        validate_content=verify,
                     )
+                    return downloader, downloader.readall()
 
-                    s3_object_key = self.s3_prefix + s3_object_key_no_prefix
-
-                    upload_or_replace = False
-
-                    if s3_hook.check_for_key(
-                        key=s3_object_key, bucket_name=self.bucket_name
-                    ):
-                        s3_object_size = s3_hook.get_key(
-                            key=s3_object_key, bucket_name=self.bucket_name
-                        ).content_length
-                        self.log.info(
-                            "Object exists on s3 on bucket_name: %s and key: %s with size: %s ",
-                            self.bucket_name,
-                            s3_object_key,
-                            s3_object_size,
-                        )
-
-                        if blob_size != s3_object_size:
-                            upload_or_replace = True
-                            self.log.info(
-                                "Object does not have the same size on Amazon S3 than on Azure Blob Storage."
-                            )
-                        else:
-                            self.log.info(
-                                "Object has the same size on Amazon S3 than on Azure Blob Storage. Upload to Amazon S3 will be discarded"
-                            )
-                    else:
-                        self.log.info(
-                            "Object doesn't exists on s3 on bucket_name: %s and key: %s ",
-                            self.bucket_name,
-                            s3_object_key,
-                        )
-                        upload_or_replace = True
-
-                    if upload_or_replace:
-                        self.log.info(
-                            "Uploading data from blob's: %s into Amazon S3 bucket: %s",
-                            s3_object_key,
-                            self.bucket_name,
-                        )
-                        s3_hook.load_file(
-                            filename=temp_file.name,
-                            key=s3_object_key,
-                            bucket_name=self.bucket_name,
-                            replace=self.replace,
-                            encrypt=self.encrypt,
-                            gzip=self.gzip,
-                            acl_policy=self.acl_policy,
-                        )
-                        self.log.info(
-                            "Resources have been uploaded from blob: %s to Amazon S3 bucket:%s",
-                            s3_object_key,
-                            self.bucket_name,
-                        )
-                        s3_list.append(f"s3://{self.bucket_name}/{s3_object_key}")
-        return s3_list
+                with self._large_blob_parts:
+                    with self._metrics.phase("azure_download"):
+                        downloader, data = self._azure_throttle.call(download_range)
+                    content_md5 = (
+                        base64.b64encode(hashlib.md5(data).digest()).decode()
+                        if verify
+                        else None
+                    )
+                    with self._metrics.phase("s3_upload"):
+                        upload.upload_part(part_number, data, content_md5=content_md5)
+                # properties.size is the size of the range; the total size of
+                # the blob is only reported in the Content-Range header.
+                properties = downloader.properties
+                return properties.etag, int(properties.content_range.split("/")[1])
+
+            with ThreadPoolExecutor(
+                max_workers=concurrency, thread_name_prefix="blob-range"
+            ) as executor:
+                versions = set(executor.map(lambda r: transfer_range(*r), ranges))
+            if len(versions) != 1:
+                raise AirflowException(
+                    f"Blob {blob_name} was modified while it was being transferred"
+                )
+            etag, size = versions.pop()
+            if blob_properties is not None and etag != blob_properties.etag:
+                raise AirflowException(
+                    f"Blob {blob_name} was modified while it was being transferred"
+                )
+            if size != blob_size:
+                raise AirflowException(
+                    f"Blob {blob_name} has {size} bytes instead of the {blob_size} "
+                    "bytes listed in the manifest"
+                )
+        return etag
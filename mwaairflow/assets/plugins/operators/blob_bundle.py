@@ -0,0 +1,168 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import csv
+import io
+import tarfile
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+from operators.s3_multipart_upload import DEFAULT_PART_SIZE, S3MultipartUpload
+
+
+class BundleMember(NamedTuple):
+    blob_name: str
+    key: str
+    offset: int
+    size: int
+    etag: Optional[str]
+
+
+def _padded(size: int) -> int:
+    return -(-size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+
+
+class BlobBundleWriter:
+    """
+    Packs small objects into tar archives streamed to Amazon S3, starting a
+    new archive whenever the next member would make it exceed
+    ``max_bundle_size``. Every archive is followed by an index object,
+    ``<archive key>.index.csv``, with one ``key,offset,size`` row per member,
+    where ``offset`` is the position of the member data in the archive, so a
+    single member can be read with a byte-range GET:
+    ``Range: bytes=<offset>-<offset + size - 1>``. Members are stored
+    uncompressed for that reason.
+
+    An archive only counts as written once its index exists. Members are
+    reported to ``on_bundle`` at that point, so they can be recorded as
+    transferred. Safe to call from several threads.
+
+    :param s3_client: boto3 S3 client used for the uploads
+    :type s3_client: botocore.client.S3
+    :param bucket_name: The bucket to upload to
+    :type bucket_name: str
+    :param key_prefix: Prefix of the archive keys, followed by the archive number and .tar
+    :type key_prefix: str
+    :param max_bundle_size: Approximate maximum size of an archive in bytes, unless a single
+            member is larger.
+    :type max_bundle_size: int
+    :param part_size: Size in bytes of each multipart part. Default is 8 MiB.
+    :type part_size: int
+    :param encrypt: If True, the objects are encrypted on the server-side by S3. Default is False.
+    :type encrypt: bool
+    :param acl_policy: Canned ACL policy for the uploaded objects. Default is None.
+    :type acl_policy: str
+    :param on_bundle: Called with the members of every archive once its index is written.
+    :type on_bundle: Callable[[List[BundleMember]], None]
+    """
+
+    def __init__(
+        self,
+        s3_client,
+        bucket_name: str,
+        key_prefix: str,
+        max_bundle_size: int,
+        part_size: int = DEFAULT_PART_SIZE,
+        encrypt: bool = False,
+        acl_policy: Optional[str] = None,
+        on_bundle: Optional[Callable[[List[BundleMember]], None]] = None,
+    ) -> None:
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key_prefix = key_prefix
+        self.max_bundle_size = max_bundle_size
+        self.part_size = part_size
+        self.encrypt = encrypt
+        self.acl_policy = acl_policy
+        self.on_bundle = on_bundle
+        self.bundle_keys = []
+        self._upload = None
+        self._tar = None
+        self._members = []
+        self._broken = False
+        self._lock = threading.Lock()
+
+    def _open_bundle(self) -> None:
+        key = f"{self.key_prefix}{len(self.bundle_keys):05d}.tar"
+        self._upload = S3MultipartUpload(
+            self.s3_client,
+            bucket_name=self.bucket_name,
+            key=key,
+            part_size=self.part_size,
+            encrypt=self.encrypt,
+            acl_policy=self.acl_policy,
+        )
+        self._tar = tarfile.open(
+            fileobj=self._upload, mode="w", format=tarfile.PAX_FORMAT
+        )
+        self._members = []
+
+    def _close_bundle(self) -> None:
+        self._tar.close()
+        self._upload.close()
+        index = io.StringIO()
+        writer = csv.writer(index, lineterminator="\n")
+        for member in self._members:
+            writer.writerow((member.key, member.offset, member.size))
+        extra_args = {"ServerSideEncryption": "AES256"} if self.encrypt else {}
+        if self.acl_policy:
+            extra_args["ACL"] = self.acl_policy
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=f"{self._upload.key}.index.csv",
+            Body=index.getvalue().encode("utf-8"),
+            ContentType="text/csv",
+            **extra_args,
+        )
+        self.bundle_keys.append(self._upload.key)
+        members = self._members
+        self._upload = self._tar = None
+        self._members = []
+        if self.on_bundle is not None:
+            self.on_bundle(members)
+
+    def add(
+        self, blob_name: str, key: str, data: bytes, etag: Optional[str] = None
+    ) -> None:
+        """Appends ``data`` to the current archive as member ``key``."""
+        info = tarfile.TarInfo(key)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        with self._lock:
+            if self._broken:
+                raise ValueError("I/O operation on a failed bundle.")
+            if (
+                self._tar is not None
+                and self._members
+                and self._tar.offset + 2 * tarfile.BLOCKSIZE + _padded(len(data))
+                > self.max_bundle_size
+            ):
+                self._close_bundle()
+            if self._tar is None:
+                self._open_bundle()
+            try:
+                self._tar.addfile(info, io.BytesIO(data))
+            except BaseException:
+                # A partially written member would corrupt the archive.
+                self._broken = True
+                raise
+            # addfile leaves the offset after the member data padded to a block.
+            offset = self._tar.offset - _padded(len(data))
+            self._members.append(BundleMember(blob_name, key, offset, len(data), etag))
+
+    def close(self) -> List[str]:
+        """
+        Completes the archive in progress and returns the keys of all the
+        archives written. Aborts it instead if a member failed to be written.
+        """
+        with self._lock:
+            if self._tar is not None:
+                if self._broken:
+                    self._upload.abort()
+                    self._upload = self._tar = None
+                else:
+                    self._close_bundle()
+            return list(self.bundle_keys)
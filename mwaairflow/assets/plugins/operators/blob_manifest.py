@@ -0,0 +1,226 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import csv
+import gzip
+import io
+import json
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+
+from airflow.contrib.hooks.wasb_hook import WasbHook
+from airflow.exceptions import AirflowException
+from airflow.hooks.S3_hook import S3Hook
+
+# Size of the chunks read from remote manifests, and of the reads done by the
+# Parquet reader on remote files.
+READ_CHUNK_SIZE = 1024 * 1024
+PARQUET_BATCH_SIZE = 10000
+
+
+class BlobEntry(NamedTuple):
+    name: str
+    key: str
+    size: int
+
+
+def _manifest_format(path: str) -> str:
+    name = path.lower()
+    for suffix in (".gz", ".zst", ".zstd"):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+    if name.endswith(".parquet"):
+        return "parquet"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+def format_blob_line(entry: BlobEntry) -> str:
+    line = io.StringIO()
+    csv.writer(line, lineterminator="\n").writerow(entry)
+    return line.getvalue()
+
+
+class _ChunkStream(io.RawIOBase):
+    """Readable binary stream over an iterator of bytes chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._chunk = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._chunk:
+            self._chunk = next(self._chunks, None)
+            if self._chunk is None:
+                self._chunk = b""
+                return 0
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+
+class _RangeStream(io.RawIOBase):
+    """Seekable binary stream over a remote object read with ranged requests."""
+
+    def __init__(self, size: int, read_range: Callable[[int, int], bytes]) -> None:
+        self._size = size
+        self._read_range = read_range
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, min(offset, self._size))
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        length = min(len(buffer), self._size - self._position)
+        if length <= 0:
+            return 0
+        data = self._read_range(self._position, length)
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+def _open_remote(
+    path: str, s3_hook: S3Hook, azure_hook: Optional[WasbHook], seekable: bool
+) -> io.BufferedReader:
+    """
+    Opens an ``s3://bucket/key`` or ``wasb://container/blob`` manifest as a
+    buffered binary stream. Sequential streams are read chunk by chunk;
+    seekable ones issue a ranged request per read.
+    """
+    if path.startswith("s3://"):
+        bucket_name, key = S3Hook.parse_s3_url(path)
+        s3_object = s3_hook.get_key(key=key, bucket_name=bucket_name)
+        if seekable:
+            stream = _RangeStream(
+                s3_object.content_length,
+                lambda offset, length: s3_object.get(
+                    Range=f"bytes={offset}-{offset + length - 1}"
+                )["Body"].read(),
+            )
+        else:
+            body = s3_object.get()["Body"]
+            stream = _ChunkStream(body.iter_chunks(READ_CHUNK_SIZE))
+    else:
+        if azure_hook is None:
+            raise AirflowException(f"Reading manifest {path} requires a WasbHook")
+        container_name, _, blob_name = path[len("wasb://") :].partition("/")
+        if seekable:
+            # WasbHook builds its BlobServiceClient when created.
+            blob_client = azure_hook.blob_service_client.get_blob_client(
+                container=container_name, blob=blob_name
+            )
+            stream = _RangeStream(
+                blob_client.get_blob_properties().size,
+                lambda offset, length: blob_client.download_blob(
+                    offset=offset, length=length
+                ).readall(),
+            )
+        else:
+            downloader = azure_hook.download(
+                container_name=container_name, blob_name=blob_name
+            )
+            stream = _ChunkStream(downloader.chunks())
+    return io.BufferedReader(stream, buffer_size=READ_CHUNK_SIZE)
+
+
+def _decompress(path: str, stream: io.BufferedIOBase) -> io.BufferedIOBase:
+    path = path.lower()
+    if path.endswith(".gz"):
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if path.endswith((".zst", ".zstd")):
+        try:
+            import zstandard
+        except ImportError:
+            raise AirflowException(
+                f"Reading {path} requires the zstandard package in requirements.txt"
+            )
+        # Manifests written by ParallelCompressor are a sequence of frames.
+        return io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True)
+        )
+    return stream
+
+
+def _read_parquet(
+    path: str, s3_hook: S3Hook, azure_hook: Optional[WasbHook]
+) -> Iterator[BlobEntry]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise AirflowException(
+            f"Reading {path} requires the pyarrow package in requirements.txt"
+        )
+    if path.startswith(("s3://", "wasb://")):
+        source = _open_remote(path, s3_hook, azure_hook, seekable=True)
+    else:
+        source = path
+    parquet_file = pq.ParquetFile(source)
+    for batch in parquet_file.iter_batches(
+        batch_size=PARQUET_BATCH_SIZE, columns=["path", "key", "size"]
+    ):
+        columns = batch.to_pydict()
+        for name, key, size in zip(columns["path"], columns["key"], columns["size"]):
+            yield BlobEntry(name, key, int(size))
+
+
+def read_blob_manifest(
+    path: str, s3_hook: S3Hook, azure_hook: Optional[WasbHook] = None
+) -> Iterator[BlobEntry]:
+    """
+    Lazily yields the entries of a blob manifest. Manifests are read from the
+    local filesystem, Amazon S3 (``s3://bucket/key``) or Azure Blob Storage
+    (``wasb://container/blob``) and are streamed, never staged on disk.
+
+    The format is taken from the file extension:
+
+    - ``.csv`` (or any other extension): ``path,key,size`` rows without header,
+      with standard CSV quoting for names containing commas or quotes
+    - ``.ndjson`` / ``.jsonl``: one ``{"path": ..., "key": ..., "size": ...}``
+      object per line
+    - ``.parquet``: ``path``, ``key`` and ``size`` columns, read one row group
+      at a time (requires pyarrow)
+
+    Text manifests can be compressed with gzip (``.gz``) or zstd (``.zst``,
+    requires zstandard), e.g. ``manifest.csv.gz``.
+    """
+    manifest_format = _manifest_format(path)
+    if manifest_format == "parquet":
+        yield from _read_parquet(path, s3_hook, azure_hook)
+        return
+
+    if path.startswith(("s3://", "wasb://")):
+        stream = _open_remote(path, s3_hook, azure_hook, seekable=False)
+    else:
+        stream = open(path, "rb")
+    with stream:
+        text = io.TextIOWrapper(_decompress(path, stream), encoding="utf-8", newline="")
+        if manifest_format == "ndjson":
+            for line in text:
+                if line.strip():
+                    blob = json.loads(line)
+                    yield BlobEntry(blob["path"], blob["key"], int(blob["size"]))
+        else:
+            for row in csv.reader(text):
+                if row:
+                    yield BlobEntry(row[0], row[1], int(row[2]))
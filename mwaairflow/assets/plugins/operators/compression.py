@@ -0,0 +1,149 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import os
+import zlib
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from airflow.exceptions import AirflowException
+
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def _gzip_block(block: bytes) -> bytes:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    return compressor.compress(block) + compressor.flush()
+
+
+def _zstd_block(block: bytes) -> bytes:
+    try:
+        import zstandard
+    except ImportError:
+        raise AirflowException(
+            "zstd compression requires the zstandard package in requirements.txt"
+        )
+    return zstandard.ZstdCompressor().compress(block)
+
+
+# Block compressors by codec name. Each block must be compressed into a
+# self-contained gzip member or zstd frame: concatenated, they are read back
+# as a single standard stream by gunzip, zstd and the Python decompressors.
+# Add an entry to plug in another codec with the same property.
+BLOCK_COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    "gzip": _gzip_block,
+    "zstd": _zstd_block,
+}
+
+
+class ParallelCompressor:
+    """
+    Write-only file-like object compressing its input in independent blocks
+    on a pool of threads and writing the compressed blocks, in order, to
+    ``sink``. zlib and zstandard release the GIL while compressing, so
+    several cores are used while the sink uploads earlier blocks. At most
+    two blocks per thread are held in memory.
+
+    ``close()`` flushes the last block but does not close ``sink``.
+
+    :param sink: File-like object the compressed stream is written to
+    :type sink: io.RawIOBase
+    :param codec: Name of the codec, a key of BLOCK_COMPRESSORS. Ex: gzip, zstd
+    :type codec: str
+    :param block_size: Size in bytes of the uncompressed blocks. Default is 4 MiB.
+    :type block_size: int
+    :param max_workers: Number of threads compressing blocks. Default is the number of CPUs.
+    :type max_workers: int
+    :param executor: Optional pool of max_workers threads shared by several compressors.
+            By default, a pool is created and shut down on close.
+    :type executor: concurrent.futures.Executor
+    """
+
+    def __init__(
+        self,
+        sink,
+        codec: str = "gzip",
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        if codec not in BLOCK_COMPRESSORS:
+            raise ValueError(
+                f"codec must be one of {', '.join(BLOCK_COMPRESSORS)}, got {codec}"
+            )
+        self.sink = sink
+        self.block_size = block_size
+        self.closed = False
+        self._compress = BLOCK_COMPRESSORS[codec]
+        max_workers = max_workers or os.cpu_count() or 1
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="compress"
+        )
+        self._max_pending = 2 * max_workers
+        self._pending = deque()
+        self._buffer = bytearray()
+        self._position = 0
+
+    def __enter__(self) -> "ParallelCompressor":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        """Returns the number of bytes written so far, before compression."""
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def _submit(self, block: bytes) -> None:
+        if len(self._pending) >= self._max_pending:
+            self.sink.write(self._pending.popleft().result())
+        self._pending.append(self._executor.submit(self._compress, block))
+
+    def write(self, data: bytes) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed compressor.")
+        self._position += len(data)
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[: self.block_size]))
+            del self._buffer[: self.block_size]
+        return len(data)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            # An empty input still produces a valid, empty compressed stream.
+            if self._buffer or not self._position:
+                self._submit(bytes(self._buffer))
+            while self._pending:
+                self.sink.write(self._pending.popleft().result())
+        except BaseException:
+            self._discard()
+            raise
+        self._buffer = bytearray()
+        self.closed = True
+        if self._owns_executor:
+            self._executor.shutdown()
+
+    def _discard(self) -> None:
+        self.closed = True
+        self._buffer = bytearray()
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
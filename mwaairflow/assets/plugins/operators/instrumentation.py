@@ -0,0 +1,141 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterable, Iterator, TypeVar
+
+from airflow.stats import Stats
+
+T = TypeVar("T")
+
+_UNITS = ("B", "KiB", "MiB", "GiB", "TiB")
+
+
+def _format_bytes(size: float) -> str:
+    for unit in _UNITS:
+        if size < 1024 or unit == _UNITS[-1]:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class OperatorMetrics:
+    """
+    Phase timers and counters of one task run, shared by its threads.
+
+    Time spent in each phase (e.g. azure_download, s3_head, s3_upload,
+    salesforce_query) and counters such as ``records`` and ``bytes`` are
+    aggregated in memory, then sent once per task by ``emit()`` as StatsD
+    metrics through ``airflow.stats.Stats``, which MWAA publishes to
+    CloudWatch when metrics are enabled:
+
+    - ``<prefix>.<phase>.total``: timer, total time spent in the phase, in ms
+    - ``<prefix>.<phase>.calls`` and ``<prefix>.<counter>``: counters
+    - ``<prefix>.duration``: timer, wall time of the task, in ms
+
+    Phases timed with ``phase()`` also send one ``<prefix>.<phase>`` timer
+    per call for a ``sample_rate`` fraction of the calls, so that latency
+    distributions are available without a metric per call in hot loops.
+
+    :param prefix: Prefix of the metric names. Ex: plugins.<dag_id>.<task_id>
+    :type prefix: str
+    :param sample_rate: Fraction of the ``phase()`` calls sent as individual timers,
+            between 0 and 1. Aggregates are always complete. Default is 1.
+    :type sample_rate: float
+    """
+
+    def __init__(self, prefix: str, sample_rate: float = 1.0) -> None:
+        if not 0 <= sample_rate <= 1:
+            raise ValueError(f"sample_rate must be between 0 and 1, got {sample_rate}")
+        self.prefix = prefix
+        self.sample_rate = sample_rate
+        self._durations = defaultdict(float)
+        self._calls = defaultdict(int)
+        self._counters = defaultdict(int)
+        self._lock = threading.Lock()
+        self._started_at = time.perf_counter()
+
+    def add_time(self, name: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            self._durations[name] += seconds
+            self._calls[name] += calls
+
+    def incr(self, name: str, count: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += count
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Times the ``with`` block as one call of phase ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.add_time(name, elapsed)
+            if self.sample_rate and random.random() < self.sample_rate:
+                Stats.timing(f"{self.prefix}.{name}", elapsed * 1000)
+
+    def timed_iter(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """
+        Yields the items of ``iterable``, counting the time spent waiting for
+        each of them in phase ``name``. Nothing is sent per item.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.add_time(name, time.perf_counter() - start)
+            yield item
+
+    def emit(self) -> None:
+        """Sends the aggregated metrics. Called once, at the end of the task."""
+        with self._lock:
+            for name, duration in self._durations.items():
+                Stats.timing(f"{self.prefix}.{name}.total", duration * 1000)
+                Stats.incr(f"{self.prefix}.{name}.calls", self._calls[name])
+            for name, count in self._counters.items():
+                Stats.incr(f"{self.prefix}.{name}", count)
+        Stats.timing(
+            f"{self.prefix}.duration", (time.perf_counter() - self._started_at) * 1000
+        )
+
+    def summary(self) -> str:
+        """
+        One-line throughput summary. Phase times are summed over all threads
+        and can exceed the wall time of a task running several threads.
+        """
+        elapsed = time.perf_counter() - self._started_at
+        with self._lock:
+            records = self._counters.get("records", 0)
+            size = self._counters.get("bytes", 0)
+            parts = [
+                f"{records} records, {_format_bytes(size)} in {elapsed:.2f} s "
+                f"({records / elapsed if elapsed else 0:.1f} records/s, "
+                f"{_format_bytes(size / elapsed if elapsed else 0)}/s)"
+            ]
+            others = [
+                f"{name}: {count}"
+                for name, count in sorted(self._counters.items())
+                if name not in ("records", "bytes")
+            ]
+            if others:
+                parts.append(", ".join(others))
+            phases = [
+                f"{name} {duration:.2f} s/{self._calls[name]} calls"
+                for name, duration in sorted(
+                    self._durations.items(), key=lambda item: item[1], reverse=True
+                )
+            ]
+            if phases:
+                parts.append("phases: " + ", ".join(phases))
+        return "; ".join(parts)
@@ -0,0 +1,84 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import logging
+from typing import Dict, Optional, Tuple
+
+# ListObjectsV2 returns at most 1000 keys per request.
+LIST_PAGE_SIZE = 1000
+
+
+class S3KeyIndex:
+    """
+    In-memory index of the objects stored under an Amazon S3 prefix, built
+    with a single paginated ListObjectsV2 pass. Keys are stored without the
+    prefix and map to a ``(size, etag)`` tuple so that existence and size
+    checks are answered without a request per object.
+
+    :param prefix: The prefix the index was built from
+    :type prefix: str
+    :param objects: Mapping of key without prefix to ``(size, etag)``
+    :type objects: dict
+    """
+
+    def __init__(self, prefix: str, objects: Dict[str, Tuple[int, str]]) -> None:
+        self.prefix = prefix
+        self._objects = objects
+
+    @classmethod
+    def build(
+        cls,
+        s3_client,
+        bucket_name: str,
+        prefix: str,
+        max_keys: int,
+        max_requests: Optional[int] = None,
+    ) -> Optional["S3KeyIndex"]:
+        """
+        Lists ``prefix`` and returns its index, or None when listing does not
+        pay off: either the prefix holds more than ``max_keys`` objects (the
+        index would not fit comfortably in memory), or listing would take more
+        than ``max_requests`` ListObjectsV2 calls (the prefix is too sparse
+        compared to the number of keys that will be looked up, so per-key
+        HEAD requests are cheaper).
+
+        Pages are requested with one ``list_objects_v2`` call each rather
+        than a paginator, so that a throttled client wrapping ``s3_client``
+        sees every request.
+        """
+        if max_requests is not None:
+            max_keys = min(max_keys, max_requests * LIST_PAGE_SIZE)
+
+        objects = {}
+        prefix_length = len(prefix)
+        request = {"Bucket": bucket_name, "Prefix": prefix, "MaxKeys": LIST_PAGE_SIZE}
+        while True:
+            page = s3_client.list_objects_v2(**request)
+            for obj in page.get("Contents", ()):
+                objects[obj["Key"][prefix_length:]] = (
+                    obj["Size"],
+                    obj["ETag"].strip('"'),
+                )
+            if len(objects) > max_keys:
+                logging.info(
+                    "More than %s objects under s3://%s/%s, "
+                    "falling back to per-key HEAD requests",
+                    max_keys,
+                    bucket_name,
+                    prefix,
+                )
+                return None
+            if not page.get("IsTruncated"):
+                return cls(prefix, objects)
+            request["ContinuationToken"] = page["NextContinuationToken"]
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def get(self, key: str) -> Optional[Tuple[int, str]]:
+        """Returns ``(size, etag)`` for a full object key, or None if it is not indexed."""
+        if not key.startswith(self.prefix):
+            return None
+        return self._objects.get(key[len(self.prefix) :])
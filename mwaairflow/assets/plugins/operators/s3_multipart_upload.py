@@ -0,0 +1,209 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import math
+import threading
+import zlib
+from typing import Dict, Optional
+
+# Amazon S3 rejects multipart parts smaller than 5 MiB, except for the last one,
+# and uploads of more than 10000 parts.
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PART_COUNT = 10000
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+# Parts larger than this bring no throughput gain and only increase memory use.
+MAX_ADAPTIVE_PART_SIZE = 64 * 1024 * 1024
+
+
+def adaptive_part_size(
+    object_size: int, concurrency: int, min_part_size: int = DEFAULT_PART_SIZE
+) -> int:
+    """
+    Returns a part size, rounded up to a MiB, that gives every one of
+    ``concurrency`` workers several parts of an object of ``object_size``
+    bytes while staying between ``min_part_size`` and 64 MiB, and that never
+    exceeds the 10000 parts limit of a multipart upload.
+    """
+    mib = 1024 * 1024
+    part_size = object_size // (concurrency * 4)
+    part_size = max(min_part_size, min(part_size, MAX_ADAPTIVE_PART_SIZE))
+    part_size = max(part_size, math.ceil(object_size / MAX_PART_COUNT))
+    return math.ceil(part_size / mib) * mib
+
+
+class S3MultipartUpload:
+    """
+    Write-only file-like object that streams data into an Amazon S3 object
+    through a multipart upload, holding at most one part in memory.
+    Objects smaller than a single part are sent with one PutObject request.
+    The upload is completed on ``close()`` and aborted if the ``with`` block
+    exits with an exception.
+
+    Parts can also be sent directly with ``upload_part``, from several threads
+    and in any order, e.g. when copying byte ranges of a source in parallel.
+
+    :param s3_client: boto3 S3 client used for the upload
+    :type s3_client: botocore.client.S3
+    :param bucket_name: The bucket to upload to
+    :type bucket_name: str
+    :param key: The key of the object to create
+    :type key: str
+    :param part_size: Size in bytes of each uploaded part. Default is 8 MiB.
+    :type part_size: int
+    :param gzip: If True, the data is gzip compressed in memory before upload. Default is False.
+    :type gzip: bool
+    :param encrypt: If True, the object is encrypted on the server-side by S3. Default is False.
+    :type encrypt: bool
+    :param acl_policy: Canned ACL policy for the uploaded object. Default is None.
+    :type acl_policy: str
+    :param metadata: User-defined metadata stored with the object. It can be updated until the
+            first part is uploaded, or until ``close()`` for objects smaller than a part.
+    :type metadata: dict
+    """
+
+    def __init__(
+        self,
+        s3_client,
+        bucket_name: str,
+        key: str,
+        part_size: int = DEFAULT_PART_SIZE,
+        gzip: bool = False,
+        encrypt: bool = False,
+        acl_policy: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> None:
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(
+                f"part_size must be at least {MIN_PART_SIZE} bytes, got {part_size}"
+            )
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key = key
+        self.part_size = part_size
+        self.encrypt = encrypt
+        self.acl_policy = acl_policy
+        self.metadata = dict(metadata or {})
+        self.closed = False
+        self._compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if gzip else None
+        self._buffer = bytearray()
+        self._parts = []
+        self._upload_id = None
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "S3MultipartUpload":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _extra_args(self) -> dict:
+        extra_args = {}
+        if self.encrypt:
+            extra_args["ServerSideEncryption"] = "AES256"
+        if self.acl_policy:
+            extra_args["ACL"] = self.acl_policy
+        if self.metadata:
+            extra_args["Metadata"] = self.metadata
+        return extra_args
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        """Returns the number of bytes written so far, before compression."""
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def write(self, data: bytes) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed upload.")
+        self._position += len(data)
+        if self._compressor:
+            self._buffer += self._compressor.compress(data)
+        else:
+            self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+        return len(data)
+
+    def _start(self) -> str:
+        with self._lock:
+            if self._upload_id is None:
+                self._upload_id = self.s3_client.create_multipart_upload(
+                    Bucket=self.bucket_name, Key=self.key, **self._extra_args()
+                )["UploadId"]
+            return self._upload_id
+
+    def upload_part(
+        self, part_number: int, body: bytes, content_md5: Optional[str] = None
+    ) -> None:
+        """
+        Uploads one part of the object. Safe to call from several threads.
+
+        :param content_md5: Optional base64-encoded MD5 of body. Amazon S3 rejects
+                the part if the body it receives does not match it.
+        :type content_md5: str
+        """
+        extra_args = {"ContentMD5": content_md5} if content_md5 else {}
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            UploadId=self._start(),
+            PartNumber=part_number,
+            Body=body,
+            **extra_args,
+        )
+        with self._lock:
+            self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+    def _upload_part(self, body: bytes) -> None:
+        self.upload_part(len(self._parts) + 1, body)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._compressor:
+                self._buffer += self._compressor.flush()
+            if self._upload_id is None:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=self.key,
+                    Body=bytes(self._buffer),
+                    **self._extra_args(),
+                )
+            else:
+                if self._buffer:
+                    self._upload_part(bytes(self._buffer))
+                self.s3_client.complete_multipart_upload(
+                    Bucket=self.bucket_name,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={
+                        "Parts": sorted(self._parts, key=lambda p: p["PartNumber"])
+                    },
+                )
+        except Exception:
+            self.abort()
+            raise
+        self._buffer = bytearray()
+        self.closed = True
+
+    def abort(self) -> None:
+        """Aborts the multipart upload so that no partial object or parts are left behind."""
+        self.closed = True
+        self._buffer = bytearray()
+        if self._upload_id is not None:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name, Key=self.key, UploadId=self._upload_id
+            )
+            self._upload_id = None
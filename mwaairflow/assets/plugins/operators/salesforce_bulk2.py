@@ -0,0 +1,169 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from airflow.exceptions import AirflowException
+
+# Final states of a Bulk API 2.0 query job.
+JOB_COMPLETE = "JobComplete"
+JOB_FAILED_STATES = ("Failed", "Aborted")
+
+
+class BulkQueryJob:
+    """
+    Salesforce Bulk API 2.0 query job, run through the REST session of a
+    simple_salesforce connection.
+
+    Salesforce splits large queries by primary key on its own and serves the
+    result as CSV pages linked by locators. The locator of the next page is
+    returned in the response headers of the current one, so ``pages()``
+    requests page N + 1 as soon as the headers of page N arrive: page bodies
+    can then be downloaded concurrently while the chain of locators is
+    followed.
+
+    :param sf_conn: Salesforce connection, as returned by SalesforceHook.get_conn()
+    :type sf_conn: simple_salesforce.Salesforce
+    :param soql: SOQL query
+    :type soql: str
+    :param include_deleted: If True, deleted and archived records are returned too (queryAll).
+            Default is False.
+    :type include_deleted: bool
+    :param poll_interval: Maximum number of seconds between two checks of the job state.
+            Checks start every second and back off to this interval. Default is 5.
+    :type poll_interval: float
+    :param timeout: Number of seconds after which a job still running is aborted. Default is None.
+    :type timeout: float
+    """
+
+    def __init__(
+        self,
+        sf_conn,
+        soql: str,
+        include_deleted: bool = False,
+        poll_interval: float = 5.0,
+        timeout: Optional[float] = None,
+    ) -> None:
+        self.sf_conn = sf_conn
+        self.soql = soql
+        self.include_deleted = include_deleted
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.job_id = None
+        self.state = None
+        self.aborted = False
+
+    def submit(self) -> str:
+        job = self.sf_conn.restful(
+            "jobs/query",
+            method="POST",
+            json={
+                "operation": "queryAll" if self.include_deleted else "query",
+                "query": self.soql,
+                "contentType": "CSV",
+                "columnDelimiter": "COMMA",
+                "lineEnding": "LF",
+            },
+        )
+        self.job_id = job["id"]
+        logging.info("Created Bulk API 2.0 query job %s", self.job_id)
+        return self.job_id
+
+    def wait(self) -> dict:
+        """Polls the job until it completes and returns its final status."""
+        started_at = time.monotonic()
+        interval = min(1.0, self.poll_interval)
+        while True:
+            job = self.sf_conn.restful(f"jobs/query/{self.job_id}")
+            state = self.state = job["state"]
+            if state == JOB_COMPLETE:
+                logging.info(
+                    "Bulk API 2.0 query job %s completed: %s records",
+                    self.job_id,
+                    job.get("numberRecordsProcessed"),
+                )
+                return job
+            if state in JOB_FAILED_STATES:
+                raise AirflowException(
+                    f"Bulk API 2.0 query job {self.job_id} {state.lower()}: "
+                    f"{job.get('errorMessage')}"
+                )
+            if self.timeout and time.monotonic() - started_at > self.timeout:
+                self.abort()
+                raise AirflowException(
+                    f"Bulk API 2.0 query job {self.job_id} still {state} "
+                    f"after {self.timeout} seconds, aborted"
+                )
+            time.sleep(interval)
+            interval = min(interval * 2, self.poll_interval)
+
+    def abort(self) -> None:
+        """Aborts the job, unless it was not submitted or already ended in failure."""
+        if self.job_id is None or self.aborted or self.state in JOB_FAILED_STATES:
+            return
+        self.sf_conn.restful(
+            f"jobs/query/{self.job_id}", method="PATCH", json={"state": "Aborted"}
+        )
+        self.aborted = True
+        logging.info("Aborted Bulk API 2.0 query job %s", self.job_id)
+
+    @contextmanager
+    def aborted_on_error(self) -> Iterator["BulkQueryJob"]:
+        """
+        Aborts the job if the block raises, so that a job whose results are
+        not consumed does not keep running against the Bulk API limits of
+        the org. The exception of the block is raised, even if aborting fails.
+        """
+        try:
+            yield self
+        except BaseException:
+            try:
+                self.abort()
+            except Exception:
+                logging.warning(
+                    "Unable to abort Bulk API 2.0 query job %s",
+                    self.job_id,
+                    exc_info=True,
+                )
+            raise
+
+    def _open_page(self, locator: Optional[str], max_records: Optional[int]):
+        params = {}
+        if locator:
+            params["locator"] = locator
+        if max_records:
+            params["maxRecords"] = max_records
+        response = self.sf_conn.session.get(
+            f"{self.sf_conn.base_url}jobs/query/{self.job_id}/results",
+            headers=dict(self.sf_conn.headers, Accept="text/csv"),
+            params=params,
+            stream=True,
+        )
+        response.raise_for_status()
+        return response
+
+    def pages(self, max_records: Optional[int] = None) -> Iterator[Tuple[int, object]]:
+        """
+        Yields the number and the streamed response of every result page, as
+        soon as its headers are received. The body of each response, a CSV
+        document with a header line, must be read and the response closed by
+        the caller. Sforce-NumberOfRecords holds its number of records.
+
+        :param max_records: Maximum number of records per page. Default is chosen
+                by Salesforce.
+        :type max_records: int
+        """
+        locator = None
+        number = 0
+        while True:
+            response = self._open_page(locator, max_records)
+            locator = response.headers.get("Sforce-Locator")
+            yield number, response
+            number += 1
+            if not locator or locator == "null":
+                return
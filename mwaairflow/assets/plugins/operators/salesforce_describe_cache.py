@@ -0,0 +1,169 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import json
+import logging
+import threading
+import time
+from email.utils import formatdate
+from typing import Optional
+
+from airflow.hooks.S3_hook import S3Hook
+
+from operators.salesforce_session_cache import CachedSessionSalesforceHook
+
+DEFAULT_TTL = 24 * 60 * 60
+
+
+def _org_id(sf_conn) -> str:
+    session_id = sf_conn.session_id or ""
+    # Session IDs start with the ID of the org they belong to.
+    if "!" in session_id:
+        return session_id.split("!", 1)[0]
+    return sf_conn.sf_instance
+
+
+class SalesforceDescribeCache:
+    """
+    Cache of the describe metadata of Salesforce objects, keyed by org,
+    object and API version. Entries are kept in memory for the task and,
+    when ``s3_uri`` is set, in Amazon S3 as one JSON document per entry,
+    <s3_uri>/<org id>/v<API version>/<object>.json, so that the tasks of
+    every run share them.
+
+    An entry younger than ``ttl`` is used as is. An older one is revalidated
+    with an If-Modified-Since request: Salesforce answers 304 Not Modified,
+    with no body, unless the metadata of the object changed since.
+
+    :param s3_uri: S3 URI of the prefix of the entries, e.g. s3://mwaa-bucket/cache/salesforce.
+            Default is None, entries are only kept in memory.
+    :type s3_uri: str
+    :param aws_conn_id: The connection ID to use when fetching connection info. Default is aws_default.
+    :type aws_conn_id: str
+    :param ttl: Number of seconds during which an entry is used without revalidation.
+            Default is one day.
+    :type ttl: float
+    """
+
+    def __init__(
+        self,
+        s3_uri: Optional[str] = None,
+        aws_conn_id: str = "aws_default",
+        ttl: float = DEFAULT_TTL,
+    ) -> None:
+        self.s3_uri = s3_uri
+        self.aws_conn_id = aws_conn_id
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._s3_hook = None
+        if s3_uri:
+            self._bucket_name, self._prefix = S3Hook.parse_s3_url(s3_uri)
+            self._prefix = self._prefix.strip("/")
+
+    def describe(self, sf_conn, object_name: str) -> dict:
+        """
+        Returns the describe metadata of an object, as returned by
+        ``SalesforceHook.describe_object``.
+
+        :param sf_conn: Salesforce connection, as returned by SalesforceHook.get_conn()
+        :type sf_conn: simple_salesforce.Salesforce
+        :param object_name: Name of the object
+        :type object_name: str
+        """
+        key = f"{_org_id(sf_conn)}/v{sf_conn.sf_version}/{object_name}.json"
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self.s3_uri:
+                entry = self._load(key)
+            if entry is not None and time.time() - entry["fetched_at"] < self.ttl:
+                self._entries[key] = entry
+                return entry["describe"]
+            entry = self._fetch(sf_conn, object_name, entry)
+            self._entries[key] = entry
+            if self.s3_uri:
+                self._save(key, entry)
+            return entry["describe"]
+
+    def _fetch(self, sf_conn, object_name: str, entry: Optional[dict]) -> dict:
+        headers = dict(sf_conn.headers)
+        if entry is not None:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        response = sf_conn.session.get(
+            f"{sf_conn.base_url}sobjects/{object_name}/describe", headers=headers
+        )
+        fetched_at = time.time()
+        if response.status_code == 304:
+            logging.info(
+                "Describe of %s not modified since %s",
+                object_name,
+                entry["last_modified"],
+            )
+            return dict(entry, fetched_at=fetched_at)
+        response.raise_for_status()
+        logging.info("Described %s", object_name)
+        return {
+            "fetched_at": fetched_at,
+            "last_modified": response.headers.get("Last-Modified")
+            or formatdate(fetched_at, usegmt=True),
+            "describe": response.json(),
+        }
+
+    def _s3_key(self, key: str) -> str:
+        return f"{self._prefix}/{key}" if self._prefix else key
+
+    def _get_s3_hook(self) -> S3Hook:
+        if self._s3_hook is None:
+            self._s3_hook = S3Hook(aws_conn_id=self.aws_conn_id)
+        return self._s3_hook
+
+    def _load(self, key: str) -> Optional[dict]:
+        s3_hook = self._get_s3_hook()
+        s3_key = self._s3_key(key)
+        try:
+            if not s3_hook.check_for_key(key=s3_key, bucket_name=self._bucket_name):
+                return None
+            return json.loads(
+                s3_hook.read_key(key=s3_key, bucket_name=self._bucket_name)
+            )
+        except Exception:
+            # The cache only saves requests: describe the object instead.
+            logging.warning("Unable to read s3://%s/%s", self._bucket_name, s3_key)
+            return None
+
+    def _save(self, key: str, entry: dict) -> None:
+        s3_key = self._s3_key(key)
+        try:
+            self._get_s3_hook().load_string(
+                json.dumps(entry),
+                key=s3_key,
+                bucket_name=self._bucket_name,
+                replace=True,
+            )
+        except Exception:
+            logging.warning("Unable to write s3://%s/%s", self._bucket_name, s3_key)
+
+
+class CachedDescribeSalesforceHook(CachedSessionSalesforceHook):
+    """
+    SalesforceHook whose describe_object, which get_available_fields and
+    object_to_df rely on, goes through a describe cache. Its
+    connection reuses the cached session of the worker.
+
+    :param salesforce_conn_id: The name of the connection that has the parameters needed
+            to connect to Salesforce.
+    :type salesforce_conn_id: str
+    :param describe_cache: The describe cache
+    :type describe_cache: SalesforceDescribeCache
+    """
+
+    def __init__(
+        self, salesforce_conn_id: str, describe_cache: SalesforceDescribeCache
+    ) -> None:
+        super().__init__(salesforce_conn_id)
+        self.describe_cache = describe_cache
+
+    def describe_object(self, obj: str) -> dict:
+        return self.describe_cache.describe(self.get_conn(), obj)
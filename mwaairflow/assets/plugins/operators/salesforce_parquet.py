@@ -0,0 +1,221 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import json
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from airflow.exceptions import AirflowException
+
+DEFAULT_ROW_GROUP_SIZE = 100_000
+
+# Name of the column added when the fetch time of the records is recorded,
+# as in SalesforceHook.write_object_to_file.
+TIME_FETCHED_COLUMN = "time_fetched_from_salesforce"
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise AirflowException(
+            "The parquet format requires the pyarrow package in requirements.txt"
+        )
+    return pyarrow
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.lower() == "true"
+    return bool(value)
+
+
+def _to_int(value: Any) -> int:
+    try:
+        # Exact for long values beyond the precision of a float.
+        return int(value)
+    except ValueError:
+        return int(float(value))
+
+
+def _to_date(value: Any) -> date:
+    if isinstance(value, (int, float)):
+        # Bulk API 1.0 JSON results hold dates as milliseconds since the epoch.
+        return datetime.fromtimestamp(value / 1000, timezone.utc).date()
+    return date.fromisoformat(value[:10])
+
+
+def _to_datetime(value: Any) -> datetime:
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, timezone.utc)
+    # 2021-01-01T00:00:00.000+0000 (REST API) or 2021-01-01T00:00:00.000Z (CSV)
+    return datetime.strptime(
+        value.replace("Z", "+0000"), "%Y-%m-%dT%H:%M:%S.%f%z"
+    ).astimezone(timezone.utc)
+
+
+def _to_string(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    # Compound fields (address, location) and relationships.
+    return json.dumps(value, ensure_ascii=False)
+
+
+# Arrow type name and converter of each Salesforce field type. Types not
+# listed here are written as strings. Add an entry to map another type.
+SALESFORCE_FIELD_TYPES: Dict[str, tuple] = {
+    "boolean": ("bool_", _to_bool),
+    "int": ("int64", _to_int),
+    "long": ("int64", _to_int),
+    "double": ("float64", float),
+    "currency": ("float64", float),
+    "percent": ("float64", float),
+    "date": ("date32", _to_date),
+    "datetime": ("timestamp_ms", _to_datetime),
+}
+
+
+def _arrow_type(pa, name: str):
+    if name == "timestamp_ms":
+        return pa.timestamp("ms", tz="UTC")
+    return getattr(pa, name)()
+
+
+class ParquetRecordWriter:
+    """
+    Writes Salesforce records to a Parquet file in row groups of at most
+    ``row_group_size`` records, so that memory holds one row group whatever
+    the number of records. Column types come from the describe metadata of
+    the object: booleans, integers, doubles, dates and UTC timestamps are
+    written as such, and any other field as a string. Records are either
+    dicts returned by the REST and Bulk APIs, whose string values are
+    parsed, or rows of a CSV result.
+
+    The columns are the fields of the first record, lowercase as in the
+    other formats. ``close()`` writes the footer but does not close
+    ``sink``.
+
+    :param sink: Writable file-like object. Ex: an S3MultipartUpload
+    :type sink: io.RawIOBase
+    :param describe: Returns the describe metadata of an object, given its name
+    :type describe: Callable[[str], dict]
+    :param object_name: Name of the object of the records. Default is the type in the
+            attributes of the first record.
+    :type object_name: str
+    :param compression: Parquet compression codec: snappy, zstd, gzip or none.
+            Default is snappy.
+    :type compression: str
+    :param row_group_size: Maximum number of records per row group. Default is 100000.
+    :type row_group_size: int
+    :param fetched_at: If set, a time_fetched_from_salesforce column holds this Unix
+            timestamp. Default is None.
+    :type fetched_at: float
+    """
+
+    def __init__(
+        self,
+        sink,
+        describe: Callable[[str], dict],
+        object_name: Optional[str] = None,
+        compression: str = "snappy",
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        fetched_at: Optional[float] = None,
+    ) -> None:
+        self._pa = _import_pyarrow()
+        self.sink = sink
+        self.describe = describe
+        self.object_name = object_name
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.fetched_at = fetched_at
+        self.record_count = 0
+        self._fields = None
+        self._types = None
+        self._converters = None
+        self._schema = None
+        self._writer = None
+        self._rows = []
+
+    def open(self, fields: List[str], object_name: str) -> None:
+        """
+        Types the columns and writes the header of the file. Called by
+        ``write()`` with the fields of the first record; call it beforehand
+        to get a file with no rows when there may be no records.
+        """
+        pa = self._pa
+        field_types = {
+            field["name"].lower(): field["type"]
+            for field in self.describe(object_name)["fields"]
+        }
+        self._fields = list(fields)
+        columns = []
+        self._types = []
+        self._converters = []
+        for name in self._fields:
+            type_name, converter = SALESFORCE_FIELD_TYPES.get(
+                field_types.get(name.lower()), ("string", _to_string)
+            )
+            arrow_type = _arrow_type(pa, type_name)
+            columns.append(pa.field(name.lower(), arrow_type))
+            self._types.append(arrow_type)
+            self._converters.append(converter)
+        if self.fetched_at is not None:
+            columns.append(pa.field(TIME_FETCHED_COLUMN, pa.float64()))
+        self._schema = pa.schema(columns)
+        self._writer = pa.parquet.ParquetWriter(
+            self.sink, self._schema, compression=self.compression
+        )
+
+    def _column(self, values: List[Any], arrow_type, converter):
+        pa = self._pa
+        if converter is not _to_date and converter is not _to_datetime:
+            try:
+                # Values already of the column type, as in JSON results.
+                return pa.array(values, type=arrow_type)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                pass
+        return pa.array(
+            [
+                None if value is None or value == "" else converter(value)
+                for value in values
+            ],
+            type=arrow_type,
+        )
+
+    def _write_row_group(self) -> None:
+        rows = self._rows
+        self._rows = []
+        arrays = [
+            self._column([row.get(name) for row in rows], arrow_type, converter)
+            for name, arrow_type, converter in zip(
+                self._fields, self._types, self._converters
+            )
+        ]
+        if self.fetched_at is not None:
+            arrays.append(self._pa.array([self.fetched_at] * len(rows)))
+        self._writer.write_table(
+            self._pa.Table.from_arrays(arrays, schema=self._schema)
+        )
+
+    def write(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            if self._writer is None:
+                self.open(
+                    [name for name in record if name != "attributes"],
+                    self.object_name or record["attributes"]["type"],
+                )
+            self._rows.append(record)
+            self.record_count += 1
+            if len(self._rows) >= self.row_group_size:
+                self._write_row_group()
+
+    def close(self) -> None:
+        """Writes the last row group and the footer. No-op if nothing was written."""
+        if self._writer is None:
+            return
+        if self._rows:
+            self._write_row_group()
+        self._writer.close()
@@ -0,0 +1,258 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from airflow.models import BaseOperator
+
+from operators.salesforce_session_cache import CachedSessionSalesforceHook
+
+# Smallest range bisected: records modified within the same second cannot be
+# split by SystemModStamp.
+MIN_INTERVAL = timedelta(seconds=1)
+# Ranges are bisected until they hold at most this fraction of a partition,
+# which bounds how far a partition can be from its share of the records.
+RANGES_PER_PARTITION = 4
+
+Partition = Tuple[datetime, datetime, int]
+
+
+def _parse_datetime(value: Union[str, datetime]) -> datetime:
+    if isinstance(value, str):
+        # 2021-01-01T00:00:00Z, 2021-01-01T00:00:00.000+0000 or 2021-01-01
+        value = datetime.fromisoformat(
+            value.replace("Z", "+00:00").replace("+0000", "+00:00")
+        )
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _soql_datetime(value: datetime) -> str:
+    """Datetime literal of a SOQL query, ex: 2021-01-01T00:00:00Z."""
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _bisect(
+    count: Callable[[datetime, datetime], int],
+    start: datetime,
+    end: datetime,
+    total: int,
+    max_records: int,
+) -> List[Partition]:
+    """
+    Splits [start, end) into consecutive ranges of at most ``max_records``
+    records each, as far as the resolution of one second allows. Only the
+    first half of a range is counted, the second one holding the rest.
+    """
+    ranges = []
+    # Ranges left to split, the oldest on top.
+    stack = [(start, end, total)]
+    while stack:
+        range_start, range_end, records = stack.pop()
+        if records <= max_records or range_end - range_start <= MIN_INTERVAL:
+            ranges.append((range_start, range_end, records))
+            continue
+        seconds = math.ceil((range_end - range_start).total_seconds() / 2)
+        middle = range_start + timedelta(seconds=seconds)
+        first_half = count(range_start, middle)
+        stack.append((middle, range_end, records - first_half))
+        stack.append((range_start, middle, first_half))
+    return ranges
+
+
+def plan_partitions(
+    count: Callable[[datetime, datetime], int],
+    start: datetime,
+    end: datetime,
+    partition_count: int,
+    total: Optional[int] = None,
+) -> List[Partition]:
+    """
+    Splits [start, end) into ``partition_count`` consecutive ranges holding
+    similar numbers of records, and returns them with their number of
+    records, oldest first.
+
+    The range is bisected into ranges of at most a quarter of a partition,
+    so that dense periods get narrow ranges and sparse ones wide ranges.
+    Partitions end at the boundaries closest to the multiples of
+    total / partition_count in the running count of the records, which
+    keeps each one within a quarter of a partition of its share. There are
+    fewer partitions only when the records are modified within too few
+    seconds to be split.
+
+    :param count: Returns the number of records modified in [start, end)
+    :type count: Callable[[datetime, datetime], int]
+    :param partition_count: Number of partitions
+    :type partition_count: int
+    :param total: Number of records in [start, end), if already counted
+    :type total: int
+    """
+    if total is None:
+        total = count(start, end)
+    max_records = max(1, total // (partition_count * RANGES_PER_PARTITION))
+    ranges = _bisect(count, start, end, total, max_records)
+
+    # Index of the last range of each partition but the last one.
+    ends = []
+    running = 0
+    for index, (_, _, records) in enumerate(ranges[:-1]):
+        before = running
+        running += records
+        while len(ends) < partition_count - 1:
+            quantile = total * (len(ends) + 1) / partition_count
+            if running < quantile:
+                break
+            # Ends the partition before or after this range, whichever is
+            # closer to its share.
+            if (
+                quantile - before < running - quantile
+                and (ends[-1] if ends else -1) < index - 1
+            ):
+                ends.append(index - 1)
+            else:
+                ends.append(index)
+                break
+    ends.append(len(ranges) - 1)
+
+    partitions = []
+    first = 0
+    for last in ends:
+        records = sum(records for _, _, records in ranges[first : last + 1])
+        if partitions and not (records and partitions[-1][2]):
+            # Partitions left empty by records too close to be split are
+            # merged into their neighbour.
+            partition_start, _, partition_records = partitions[-1]
+            partitions[-1] = (
+                partition_start,
+                ranges[last][1],
+                partition_records + records,
+            )
+        else:
+            partitions.append((ranges[first][0], ranges[last][1], records))
+        first = last + 1
+    return partitions
+
+
+class SalesforcePartitionPlannerOperator(BaseOperator):
+    """
+    Splits the records of a Salesforce object into SystemModStamp ranges
+    holding similar numbers of records, so that one extraction can be spread
+    over dynamically mapped SalesforceToS3Operator tasks whose durations are
+    close to each other. Ranges are found by bisection with SELECT COUNT()
+    queries, which return no records.
+
+    Returns the keyword arguments of each range, from_date, to_date and
+    to_date_exclusive, to use with expand_kwargs. Ex:
+
+        plan = SalesforcePartitionPlannerOperator(task_id="plan", ...)
+        SalesforceToS3Operator.partial(
+            task_id="extract",
+            s3_key="opportunity/part-{{ ti.map_index }}.csv",
+            ...
+        ).expand_kwargs(plan.output)
+
+    :param sf_conn_id: Name of the Salesforce connection
+    :type sf_conn_id: str
+    :param sf_obj: Name of the Salesforce object
+    :type sf_obj: str
+    :param partition_count: Number of partitions, usually the number of workers
+            available. There are fewer only if the records are modified within too few
+            seconds to be split. Ignored if max_partition_records is set.
+    :type partition_count: int
+    :param max_partition_records: Number of records per partition aimed at: the number of
+            partitions is the number of records divided by it, rounded up. Default is None.
+    :type max_partition_records: int
+    :param from_date: Start of the range to split, as a datetime or an ISO 8601 string.
+            Ex: 2021-01-01T00:00:00Z. Default is the SystemModStamp of the oldest record.
+    :type from_date: Union[str, datetime]
+    :param to_date: End of the range to split, excluded, as a datetime or an ISO 8601
+            string. Default is the time of planning.
+    :type to_date: Union[str, datetime]
+    """
+
+    template_fields = ("from_date", "to_date")
+
+    def __init__(
+        self,
+        *,
+        sf_conn_id: str,
+        sf_obj: str,
+        partition_count: int = 1,
+        max_partition_records: Optional[int] = None,
+        from_date: Optional[Union[str, datetime]] = None,
+        to_date: Optional[Union[str, datetime]] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+        if partition_count < 1:
+            raise ValueError(
+                f"partition_count must be at least 1, got {partition_count}"
+            )
+        self.sf_conn_id = sf_conn_id
+        self.object = sf_obj
+        self.partition_count = partition_count
+        self.max_partition_records = max_partition_records
+        self.from_date = from_date
+        self.to_date = to_date
+
+    def execute(self, context: dict) -> List[Dict[str, object]]:
+        sf_conn = CachedSessionSalesforceHook(self.sf_conn_id).get_conn()
+        probes = 0
+
+        def count(start: datetime, end: datetime) -> int:
+            nonlocal probes
+            probes += 1
+            return sf_conn.query(
+                f"SELECT COUNT() FROM {self.object} "
+                f"WHERE SystemModStamp >= {_soql_datetime(start)} "
+                f"AND SystemModStamp < {_soql_datetime(end)}"
+            )["totalSize"]
+
+        end = _parse_datetime(self.to_date or datetime.now(timezone.utc))
+        if self.from_date:
+            start = _parse_datetime(self.from_date)
+        else:
+            oldest = sf_conn.query(
+                f"SELECT SystemModStamp FROM {self.object} "
+                f"ORDER BY SystemModStamp ASC LIMIT 1"
+            )["records"]
+            if not oldest:
+                self.log.info("No records found in %s", self.object)
+                return []
+            start = _parse_datetime(oldest[0]["SystemModstamp"])
+
+        total = count(start, end)
+        if not total:
+            self.log.info("No records found in %s", self.object)
+            return []
+        partition_count = self.partition_count
+        if self.max_partition_records:
+            partition_count = math.ceil(total / self.max_partition_records)
+        partitions = plan_partitions(count, start, end, partition_count, total=total)
+
+        for partition_start, partition_end, records in partitions:
+            self.log.info(
+                "Partition: %s to %s has %s records",
+                _soql_datetime(partition_start),
+                _soql_datetime(partition_end),
+                records,
+            )
+        self.log.info(
+            "Planned %s partitions of %s records with %s COUNT() queries",
+            len(partitions),
+            total,
+            probes,
+        )
+        return [
+            {
+                "from_date": _soql_datetime(partition_start),
+                "to_date": _soql_datetime(partition_end),
+                "to_date_exclusive": True,
+            }
+            for partition_start, partition_end, _ in partitions
+        ]
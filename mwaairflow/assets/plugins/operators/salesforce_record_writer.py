@@ -0,0 +1,161 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import time
+from typing import Any, Dict, List
+
+from airflow.providers.salesforce.hooks.salesforce import SalesforceHook
+
+from operators.salesforce_parquet import TIME_FETCHED_COLUMN
+
+DEFAULT_BATCH_SIZE = 10_000
+
+FORMATS = ("csv", "json", "ndjson")
+
+# Salesforce field types written as floats, whether null or not.
+NUMERIC_FIELD_TYPES = ("int", "long", "double", "currency", "percent")
+
+
+class SalesforceRecordWriter:
+    """
+    Writes Salesforce records as CSV, JSON or JSON lines in batches of at
+    most ``batch_size`` records, appending each batch to ``sink`` as soon
+    as it is converted, so that memory holds the DataFrame of one batch
+    rather than the one of all the records.
+
+    Each batch is converted as ``SalesforceHook.write_object_to_file``
+    does: attributes are dropped, columns are lowercase, newlines are
+    removed from CSV strings and dates are coerced to Unix timestamps with
+    the describe metadata of the hook. Batches are then stitched as a
+    single file: the CSV header is written once, JSON batches form one
+    array and all the records share the same fetch time.
+
+    Records that fit in a single batch are converted as
+    ``write_object_to_file`` does, with column types inferred from their
+    values, and the output is the same. The first batch is only converted
+    once a second one arrives or the writer is closed, to know which case
+    applies. When records span several batches, types inferred from each
+    batch would depend on its values, so they are taken from the describe
+    metadata of the object instead: numeric fields are floats, empty when
+    null, as pandas writes them when some of the records are null. The
+    output is then the one of ``write_object_to_file`` for all the records
+    at once, except for integer fields never null and numeric fields always
+    null, written as 3.0 and empty where ``write_object_to_file`` writes 3
+    and None.
+
+    ``close()`` writes the batch held back, if any, and ends the JSON array,
+    but does not close ``sink``.
+
+    :param sink: Writable binary file-like object. Ex: an S3MultipartUpload
+    :type sink: io.RawIOBase
+    :param hook: Hook converting the records. A CachedDescribeSalesforceHook describes
+            the object once for all the batches.
+    :type hook: SalesforceHook
+    :param fmt: csv, json or ndjson. Default is csv.
+    :type fmt: str
+    :param coerce_to_timestamp: True to convert dates and datetimes to Unix timestamps.
+            Default is False.
+    :type coerce_to_timestamp: bool
+    :param record_time_added: True to add a time_fetched_from_salesforce column holding
+            the time of the first batch. Default is False.
+    :type record_time_added: bool
+    :param batch_size: Maximum number of records converted at once. Default is 10000.
+    :type batch_size: int
+    """
+
+    def __init__(
+        self,
+        sink,
+        hook: SalesforceHook,
+        fmt: str = "csv",
+        coerce_to_timestamp: bool = False,
+        record_time_added: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        fmt = fmt.lower()
+        if fmt not in FORMATS:
+            raise ValueError(f"Format value is not recognized: {fmt}")
+        self.sink = sink
+        self.hook = hook
+        self.fmt = fmt
+        self.coerce_to_timestamp = coerce_to_timestamp
+        self.record_time_added = record_time_added
+        self.batch_size = batch_size
+        self.record_count = 0
+        self._numeric_columns = None
+        self._first_batch = None
+        self._started = False
+        self._fetched_at = None
+        self._ends_with_newline = True
+
+    def _describe_numeric_columns(self, record: Dict[str, Any]) -> List[str]:
+        object_name = record.get("attributes", {}).get("type")
+        if object_name is None:
+            return []
+        return [
+            field["name"].lower()
+            for field in self.hook.describe_object(object_name)["fields"]
+            if field["type"] in NUMERIC_FIELD_TYPES
+        ]
+
+    def _convert(self, records: List[Dict[str, Any]], typed: bool) -> str:
+        df = self.hook.object_to_df(
+            records, coerce_to_timestamp=self.coerce_to_timestamp
+        )
+        if typed:
+            if self._numeric_columns is None:
+                self._numeric_columns = self._describe_numeric_columns(records[0])
+            numeric_columns = [name for name in self._numeric_columns if name in df]
+            df[numeric_columns] = df[numeric_columns].astype("float64")
+        if self.record_time_added:
+            df[TIME_FETCHED_COLUMN] = self._fetched_at
+
+        first = not self._started
+        self._started = True
+        if self.fmt == "csv":
+            # Newlines in strings would split the rows of the CSV.
+            possible_strings = df.columns[df.dtypes == "object"]
+            df[possible_strings] = (
+                df[possible_strings]
+                .astype(str)
+                .apply(lambda x: x.str.replace("\r\n", "").str.replace("\n", ""))
+            )
+            return df.to_csv(index=False, header=first)
+        if self.fmt == "json":
+            data = df.to_json(orient="records", date_unit="s")
+            # Merges the array of the batch into the one of the file.
+            return ("[" if first else ",") + data[1:-1]
+        data = df.to_json(orient="records", lines=True, date_unit="s")
+        if not self._ends_with_newline:
+            data = "\n" + data
+        self._ends_with_newline = data.endswith("\n")
+        return data
+
+    def _write_batch(self, records: List[Dict[str, Any]], typed: bool) -> None:
+        self.sink.write(self._convert(records, typed).encode("utf-8"))
+
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start : start + self.batch_size]
+            if not self.record_count:
+                self._fetched_at = time.time()
+                self._first_batch = batch
+            else:
+                if self._first_batch is not None:
+                    self._write_batch(self._first_batch, typed=True)
+                    self._first_batch = None
+                self._write_batch(batch, typed=True)
+            self.record_count += len(batch)
+
+    def close(self) -> None:
+        """
+        Writes the batch held back and ends the JSON array. No-op if nothing
+        was written.
+        """
+        if self._first_batch is not None:
+            self._write_batch(self._first_batch, typed=False)
+            self._first_batch = None
+        if self.fmt == "json" and self.record_count:
+            self.sink.write(b"]")
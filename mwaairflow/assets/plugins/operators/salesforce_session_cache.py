@@ -0,0 +1,202 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from airflow.providers.salesforce.hooks.salesforce import SalesforceHook
+
+DEFAULT_SESSION_TTL = 60 * 60
+
+
+def _get_extra(extras: dict, name: str) -> Any:
+    """Reads an extra of a Salesforce connection as the provider hook does."""
+    return extras.get(f"extra__salesforce__{name}") or extras.get(name) or None
+
+
+class SalesforceSessionCache:
+    """
+    Cache of the Salesforce sessions of each connection, shared by the tasks
+    run on a worker, so that they do not all log in. Sessions are kept in
+    memory and in files only readable by the worker user, under a lock, so
+    that concurrent tasks log in once and the others reuse the session.
+
+    A session is used for ``ttl`` seconds after the login. It is also renewed
+    as soon as Salesforce rejects it, with a 401, or a 400 InvalidSessionId
+    from the Bulk API, and the rejected request is then sent again.
+
+    :param directory: Directory of the session files. Default is
+            airflow-salesforce-sessions in the temporary directory.
+    :type directory: str
+    :param ttl: Number of seconds during which a session is reused. Default is one hour,
+            half the default session timeout of Salesforce.
+    :type ttl: float
+    """
+
+    def __init__(
+        self, directory: Optional[str] = None, ttl: float = DEFAULT_SESSION_TTL
+    ) -> None:
+        self.directory = directory or os.path.join(
+            tempfile.gettempdir(), "airflow-salesforce-sessions"
+        )
+        self.ttl = ttl
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _key(self, hook: SalesforceHook) -> str:
+        connection = hook.get_connection(hook.conn_id)
+        identity = json.dumps(
+            [hook.conn_id, connection.login, connection.host, connection.extra_dejson],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def _locked(self, key: str) -> Iterator[str]:
+        """Holds the lock of the session file of ``key`` and yields its path."""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        path = os.path.join(self.directory, f"{key}.json")
+        with self._lock, open(f"{path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield path
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self, key: str, path: str, from_memory: bool = True) -> Optional[dict]:
+        session = self._sessions.get(key) if from_memory else None
+        if session is None and os.path.exists(path):
+            with open(path) as f:
+                session = json.load(f)
+        if session is not None and time.time() - session["created_at"] < self.ttl:
+            return session
+        return None
+
+    def _login(self, hook: SalesforceHook, key: str, path: str) -> dict:
+        # A fresh hook logs in with the credentials of the connection.
+        sf_conn = SalesforceHook(hook.conn_id).get_conn()
+        session = {
+            "session_id": sf_conn.session_id,
+            "instance": sf_conn.sf_instance,
+            "version": sf_conn.sf_version,
+            "created_at": time.time(),
+        }
+        descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w") as f:
+            json.dump(session, f)
+        self._sessions[key] = session
+        logging.info("Logged in to Salesforce with %s", hook.conn_id)
+        return session
+
+    def get_session(self, hook: SalesforceHook) -> dict:
+        """Returns the session of the connection of the hook, logging in if needed."""
+        key = self._key(hook)
+        with self._locked(key) as path:
+            session = self._read(key, path)
+            if session is None:
+                return self._login(hook, key, path)
+            self._sessions[key] = session
+            return session
+
+    def renew_session(self, hook: SalesforceHook, rejected_session_id: str) -> dict:
+        """
+        Returns a new session after ``rejected_session_id`` was rejected,
+        unless another task already replaced it.
+        """
+        key = self._key(hook)
+        with self._locked(key) as path:
+            # Other processes of the worker may have renewed it already.
+            session = self._read(key, path, from_memory=False)
+            if session is None or session["session_id"] == rejected_session_id:
+                return self._login(hook, key, path)
+            self._sessions[key] = session
+            return session
+
+    def connect(self, hook: SalesforceHook):
+        """
+        Returns a Salesforce connection using the cached session of the
+        connection of the hook, renewed when it is rejected. Like the one of
+        ``hook.get_conn()``, it goes through the proxies of the connection
+        and the requests session of the hook.
+        """
+        from simple_salesforce import Salesforce
+
+        session = self.get_session(hook)
+        extras = hook.get_connection(hook.conn_id).extra_dejson
+        sf_conn = Salesforce(
+            session_id=session["session_id"],
+            instance=session["instance"],
+            version=session["version"],
+            proxies=_get_extra(extras, "proxies"),
+            session=hook.session,
+        )
+
+        def renew_on_rejection(response, *args, **kwargs):
+            if not _is_session_rejected(response) or getattr(
+                response.request, "session_renewed", False
+            ):
+                return response
+            session_id = self.renew_session(hook, sf_conn.session_id)["session_id"]
+            sf_conn.session_id = session_id
+            sf_conn.headers["Authorization"] = f"Bearer {session_id}"
+            request = response.request.copy()
+            if "Authorization" in request.headers:
+                request.headers["Authorization"] = f"Bearer {session_id}"
+            if "X-SFDC-Session" in request.headers:
+                request.headers["X-SFDC-Session"] = session_id
+            request.session_renewed = True
+            response.close()
+            retried = response.connection.send(request, **kwargs)
+            retried.history.append(response)
+            return retried
+
+        sf_conn.session.hooks["response"].append(renew_on_rejection)
+        return sf_conn
+
+
+def _is_session_rejected(response) -> bool:
+    if response.status_code == 401:
+        return True
+    # The Bulk API 1.0 answers 400 to expired sessions.
+    return response.status_code == 400 and "InvalidSessionId" in response.text
+
+
+_default_session_cache = SalesforceSessionCache()
+
+
+class CachedSessionSalesforceHook(SalesforceHook):
+    """
+    SalesforceHook whose connection reuses the session of the other tasks
+    run on the worker with the same Airflow connection.
+
+    :param salesforce_conn_id: The name of the connection that has the parameters needed
+            to connect to Salesforce.
+    :type salesforce_conn_id: str
+    :param session_cache: The session cache. Default is the one of the worker process.
+    :type session_cache: SalesforceSessionCache
+    """
+
+    def __init__(
+        self,
+        salesforce_conn_id: str,
+        session_cache: Optional[SalesforceSessionCache] = None,
+    ) -> None:
+        super().__init__(salesforce_conn_id)
+        self.session_cache = session_cache or _default_session_cache
+        self._sf_conn = None
+
+    def get_conn(self):
+        if self._sf_conn is None:
+            self._sf_conn = self.session_cache.connect(self)
+        return self._sf_conn
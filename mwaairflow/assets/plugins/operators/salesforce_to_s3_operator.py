@@ -3,21 +3,115 @@
 # SPDX-License-Identifier: MIT-0
 #
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
 from tempfile import NamedTemporaryFile
+import csv
+import io
 import logging
 import json
+import os
+import time
 
 from airflow.utils.decorators import apply_defaults
 from airflow.models import BaseOperator
 from airflow.hooks.S3_hook import S3Hook
 
-from airflow.providers.salesforce.hooks.salesforce import SalesforceHook
+from operators.instrumentation import OperatorMetrics
+from operators.salesforce_bulk2 import BulkQueryJob
+from operators.salesforce_describe_cache import (
+    CachedDescribeSalesforceHook,
+    SalesforceDescribeCache,
+)
+from operators.salesforce_parquet import DEFAULT_ROW_GROUP_SIZE, ParquetRecordWriter
+from operators.salesforce_record_writer import (
+    DEFAULT_BATCH_SIZE,
+    SalesforceRecordWriter,
+)
+from operators.salesforce_watermark import (
+    WATERMARK_FIELD,
+    S3Watermark,
+    max_system_modstamp,
+    soql_datetime,
+)
+from operators.s3_multipart_upload import DEFAULT_PART_SIZE, S3MultipartUpload
+
+# Number of records serialized and written to the upload at once.
+SERIALIZE_BATCH_SIZE = 1000
+# Size of the chunks of a Bulk API 2.0 result page written to S3 at once.
+PAGE_CHUNK_SIZE = 1024 * 1024
+
+
+def iter_query_pages(sf_conn, soql):
+    """
+    Yields the records of each page of the results of a REST API query,
+    following nextRecordsUrl. The next page is fetched in the background
+    while the caller processes the current one, so at most two pages are
+    held in memory.
+    """
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="sf-page") as executor:
+        future = executor.submit(sf_conn.query, soql)
+        while future is not None:
+            page = future.result()
+            future = None
+            if not page["done"]:
+                future = executor.submit(
+                    sf_conn.query_more, page["nextRecordsUrl"], identifier_is_url=True
+                )
+            yield page["records"]
+
+
+def _describe_cache(describe_cache, aws_conn_id):
+    if isinstance(describe_cache, SalesforceDescribeCache):
+        return describe_cache
+    return SalesforceDescribeCache(describe_cache, aws_conn_id=aws_conn_id)
+
+
+def iter_relationship_records(sf_conn, pages, relationship_object, batch_size):
+    """
+    Yields the records of the relationship_object subquery of the records
+    of each page, in lists of about batch_size records, so that memory
+    holds one page of parents and one list of children. The subquery
+    results of a parent are paginated like any query when it has many
+    children: their following pages are fetched from nextRecordsUrl.
+    """
+    batch = []
+    for records in pages:
+        for record in records:
+            related = record.get(relationship_object)
+            while related:
+                batch.extend(related["records"])
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+                if related.get("done", True):
+                    break
+                related = sf_conn.query_more(
+                    related["nextRecordsUrl"], identifier_is_url=True
+                )
+    if batch:
+        yield batch
 
 
 class SalesforceBulkQueryToS3Operator(BaseOperator):
     """
         Queries the Salesforce Bulk API using a SOQL stirng. Results are then
-        put into an S3 Bucket.
+        put into an S3 Bucket, one JSON object per line. They are streamed:
+        each Bulk result set is fetched when the previous one is written,
+        and records are serialized into a multipart upload as they arrive.
+
+        With bulk_api="2.0", the query runs as a Bulk API 2.0 job instead,
+        which Salesforce splits by primary key on its own. Its CSV result
+        pages are downloaded concurrently and each one is streamed to its
+        own object, <s3_key>/part-00000.csv, part-00001.csv... The URIs of
+        the objects are returned.
+
+        With fmt="parquet", records are written as Parquet instead, typed
+        from the describe metadata of the object, in row groups of
+        row_group_size records: <s3_key> with Bulk API 1.0 and
+        <s3_key>/part-00000.parquet... with Bulk API 2.0.
 
     :param sf_conn_id:      Salesforce Connection Id
     :param soql:            Salesforce SOQL Query String used to query Bulk API
@@ -26,6 +120,35 @@ class SalesforceBulkQueryToS3Operator(BaseOperator):
     :param s3_bucket:       S3 Bucket where query results will be put
     :param s3_key:          S3 Key that will be assigned to uploaded Salesforce
                             query results
+    :param part_size:       Size in bytes of the parts of the multipart
+                            upload, and of the upload buffer. Must be at
+                            least 5 MiB. Default: 8 MiB
+    :param bulk_api:        Version of the Bulk API, "1.0" or "2.0".
+                            Default: "1.0"
+    :param max_concurrency: Bulk API 2.0 result pages downloaded in
+                            parallel. Default: 4
+    :param page_size:       Maximum number of records per Bulk API 2.0
+                            result page. Default: chosen by Salesforce
+    :param poll_interval:   Maximum number of seconds between two checks
+                            of the state of a Bulk API 2.0 job. Default: 5
+    :param job_timeout:     Number of seconds after which a Bulk API 2.0
+                            job still running is aborted. Default: None
+    :param fmt:             "parquet" to convert the results to Parquet.
+                            Default: None, JSON lines with Bulk API 1.0
+                            and CSV with Bulk API 2.0
+    :param parquet_compression: Parquet compression codec: snappy, zstd,
+                            gzip or none. Default: snappy
+    :param row_group_size:  Maximum number of records per Parquet row
+                            group. Default: 100000
+    :param describe_cache:  S3 URI of the prefix under which the describe
+                            metadata of the object is cached
+                            (ex: s3://mwaa-bucket/cache/salesforce), or a
+                            SalesforceDescribeCache. Default: None, cached
+                            for the task only
+    :param metrics_sample_rate: Fraction of the phase timings sent as
+                            individual StatsD timers. Aggregated metrics
+                            and the log summary are always complete.
+                            Default: 1
     """
 
     template_fields = ("soql", "s3_key")
@@ -38,35 +161,224 @@ class SalesforceBulkQueryToS3Operator(BaseOperator):
         s3_conn_id,
         s3_bucket,
         s3_key,
+        part_size=DEFAULT_PART_SIZE,
+        bulk_api="1.0",
+        max_concurrency=4,
+        page_size=None,
+        poll_interval=5.0,
+        job_timeout=None,
+        fmt=None,
+        parquet_compression="snappy",
+        row_group_size=DEFAULT_ROW_GROUP_SIZE,
+        describe_cache=None,
+        metrics_sample_rate=1.0,
         *args,
         **kwargs,
     ):
 
         super().__init__(*args, **kwargs)
 
+        if bulk_api not in ("1.0", "2.0"):
+            raise ValueError(f'bulk_api must be "1.0" or "2.0", got {bulk_api}')
+        if fmt not in (None, "parquet"):
+            raise ValueError(f'fmt must be None or "parquet", got {fmt}')
+
         self.sf_conn_id = sf_conn_id
         self.soql = soql
         self.s3_conn_id = s3_conn_id
         self.s3_bucket = s3_bucket
         self.s3_key = s3_key
         self.object = object_type[0].upper() + object_type[1:].lower()
+        self.part_size = part_size
+        self.bulk_api = bulk_api
+        self.max_concurrency = max_concurrency
+        self.page_size = page_size
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.fmt = fmt
+        self.parquet_compression = parquet_compression
+        self.row_group_size = row_group_size
+        self.describe_cache = describe_cache
+        self.metrics_sample_rate = metrics_sample_rate
+
+    def _parquet_writer(self, description, sink):
+        return ParquetRecordWriter(
+            sink,
+            describe=lambda name: description,
+            object_name=self.object,
+            compression=self.parquet_compression,
+            row_group_size=self.row_group_size,
+        )
 
     def execute(self, context):
-        sf_conn = SalesforceHook(self.sf_conn_id).get_conn()
+        metrics = OperatorMetrics(
+            f"plugins.{self.dag_id}.{self.task_id}", self.metrics_sample_rate
+        )
+        hook = CachedDescribeSalesforceHook(
+            self.sf_conn_id, _describe_cache(self.describe_cache, self.s3_conn_id)
+        )
+        s3 = S3Hook(self.s3_conn_id)
 
         logging.info(self.soql)
-        query_results = sf_conn.bulk.__getattr__(self.object).query(self.soql)
+        if self.bulk_api == "2.0":
+            s3_uris = self._query_bulk2(hook, s3, metrics)
+        else:
+            s3_uris = None
+            self._query_bulk1(hook, s3, metrics)
+        metrics.emit()
+        logging.info("Transfer summary: %s", metrics.summary())
+        return s3_uris
+
+    def _query_bulk1(self, hook, s3, metrics):
+        with metrics.phase("salesforce_query"):
+            # Waits for the job, then yields one list of records per result set.
+            result_sets = (
+                hook.get_conn()
+                .bulk.__getattr__(self.object)
+                .query(self.soql, lazy_operation=True)
+            )
 
-        s3 = S3Hook(self.s3_conn_id)
-        # One JSON Object Per Line
-        query_results = [
-            json.dumps(result, ensure_ascii=False) for result in query_results
-        ]
-        query_results = "\n".join(query_results)
-
-        s3.load_string(
-            query_results, self.s3_key, bucket_name=self.s3_bucket, replace=True
+        with S3MultipartUpload(
+            s3.get_conn(),
+            bucket_name=self.s3_bucket,
+            key=self.s3_key,
+            part_size=self.part_size,
+        ) as upload:
+            if self.fmt == "parquet":
+                with metrics.phase("salesforce_describe"):
+                    description = hook.describe_object(self.object)
+                writer = self._parquet_writer(description, upload)
+                for records in metrics.timed_iter("salesforce_query", result_sets):
+                    with metrics.phase("write"):
+                        writer.write(records)
+                    metrics.incr("records", len(records))
+                if not writer.record_count:
+                    # An empty object would not be a valid Parquet file.
+                    upload.abort()
+                    logging.info(f"No records found in the query: {self.soql}")
+                    return
+                with metrics.phase("s3_upload"):
+                    writer.close()
+                    upload.close()
+                metrics.incr("bytes", upload.tell())
+                return
+            for records in metrics.timed_iter("salesforce_query", result_sets):
+                self._write_records(records, upload, metrics)
+            with metrics.phase("s3_upload"):
+                upload.close()
+
+    def _write_records(self, records, upload, metrics):
+        """Writes records to the upload, one JSON object per line."""
+        for start in range(0, len(records), SERIALIZE_BATCH_SIZE):
+            batch = records[start : start + SERIALIZE_BATCH_SIZE]
+            with metrics.phase("serialize"):
+                lines = "\n".join(
+                    json.dumps(record, ensure_ascii=False) for record in batch
+                ).encode("utf-8")
+                if upload.tell():
+                    lines = b"\n" + lines
+            with metrics.phase("s3_upload"):
+                upload.write(lines)
+            metrics.incr("records", len(batch))
+            metrics.incr("bytes", len(lines))
+
+    def _query_bulk2(self, hook, s3, metrics):
+        job = BulkQueryJob(
+            hook.get_conn(),
+            self.soql,
+            poll_interval=self.poll_interval,
+            timeout=self.job_timeout,
         )
+        # Results left unconsumed would keep the job running on the org.
+        with job.aborted_on_error():
+            with metrics.phase("salesforce_query"):
+                job.submit()
+                job.wait()
+
+            s3_client = s3.get_conn()
+            prefix = self.s3_key.rstrip("/")
+            if self.fmt == "parquet":
+                # Described once for all the pages.
+                with metrics.phase("salesforce_describe"):
+                    description = hook.describe_object(self.object)
+                upload_page = partial(self._convert_page, description)
+                extension = "parquet"
+            else:
+                upload_page = self._upload_page
+                extension = "csv"
+            s3_uris = []
+            # (future, response) of the pages being uploaded, oldest first.
+            pending = deque()
+            with ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="bulk-page"
+            ) as executor:
+                try:
+                    # Each page is requested as soon as the headers of the
+                    # previous one, holding its locator, are received.
+                    for number, response in metrics.timed_iter(
+                        "salesforce_query", job.pages(self.page_size)
+                    ):
+                        if len(pending) >= self.max_concurrency:
+                            pending.popleft()[0].result()
+                        key = f"{prefix}/part-{number:05d}.{extension}"
+                        future = executor.submit(
+                            upload_page, s3_client, response, key, metrics
+                        )
+                        pending.append((future, response))
+                        s3_uris.append(f"s3://{self.s3_bucket}/{key}")
+                    while pending:
+                        pending.popleft()[0].result()
+                except BaseException:
+                    for future, response in pending:
+                        if future.cancel():
+                            response.close()
+                    raise
+        logging.info("Wrote %s result pages under %s", len(s3_uris), prefix)
+        return s3_uris
+
+    def _upload_page(self, s3_client, response, key, metrics):
+        """Streams one CSV result page to its own object."""
+        with response, S3MultipartUpload(
+            s3_client,
+            bucket_name=self.s3_bucket,
+            key=key,
+            part_size=self.part_size,
+        ) as upload:
+            chunks = response.iter_content(chunk_size=PAGE_CHUNK_SIZE)
+            for chunk in metrics.timed_iter("salesforce_download", chunks):
+                with metrics.phase("s3_upload"):
+                    upload.write(chunk)
+            with metrics.phase("s3_upload"):
+                upload.close()
+        metrics.incr("records", int(response.headers.get("Sforce-NumberOfRecords", 0)))
+        metrics.incr("bytes", upload.tell())
+
+    def _convert_page(self, description, s3_client, response, key, metrics):
+        """Streams one CSV result page to its own object, as Parquet."""
+        with response, S3MultipartUpload(
+            s3_client,
+            bucket_name=self.s3_bucket,
+            key=key,
+            part_size=self.part_size,
+        ) as upload:
+            response.raw.decode_content = True
+            # Keeps the body readable to its end by TextIOWrapper.
+            response.raw.auto_close = False
+            rows = csv.DictReader(
+                io.TextIOWrapper(response.raw, encoding="utf-8", newline="")
+            )
+            writer = self._parquet_writer(description, upload)
+            # Pages with no records hold the header line only.
+            writer.open(rows.fieldnames or [], self.object)
+            batches = iter(lambda: list(islice(rows, SERIALIZE_BATCH_SIZE)), [])
+            for batch in metrics.timed_iter("salesforce_download", batches):
+                with metrics.phase("write"):
+                    writer.write(batch)
+            with metrics.phase("s3_upload"):
+                writer.close()
+                upload.close()
+        metrics.incr("records", writer.record_count)
+        metrics.incr("bytes", upload.tell())
 
 
 class SalesforceToS3Operator(BaseOperator):
@@ -98,6 +410,10 @@ class SalesforceToS3Operator(BaseOperator):
                                     - csv
                                     - json
                                     - ndjson
+                                    - parquet, with column types taken
+                                      from the describe metadata of the
+                                      object; coerce_to_timestamp does
+                                      not apply
                                 *Default: csv*
     :type fmt:                  list
     :param from_date:           *(optional)* A specific datetime formatted input
@@ -114,6 +430,13 @@ class SalesforceToS3Operator(BaseOperator):
                                 in datetime format (ex. 2021-01-01T00:00:00Z)
                                 *Default: None*
     :type to_date:              datetime
+    :param to_date_exclusive:   *(optional)* True to exclude the records
+                                modified at to_date, so that consecutive
+                                ranges, such as the ones returned by
+                                SalesforcePartitionPlannerOperator, do
+                                not overlap.
+                                *Default: False*.
+    :type to_date_exclusive:    bool
     :param query:               *(optional)* A specific query to run for
                                 the given object.  This will override
                                 default query creation.
@@ -123,7 +446,10 @@ class SalesforceToS3Operator(BaseOperator):
                                 relationship objects to work, and
                                 these are not the same names as
                                 the SF object.  Specify that
-                                relationship object here.
+                                relationship object here. Its records
+                                are written as the pages of their parents
+                                arrive, following the pagination of the
+                                subquery results of each parent.
                                 *Default: None*
     :type relationship_object:  string
     :param record_time_added:   *(optional)* True if you want to add a
@@ -137,9 +463,69 @@ class SalesforceToS3Operator(BaseOperator):
                                 into Unix timestamp (UTC).
                                 *Default: False*.
     :type coerce_to_timestamp:  string
+    :param metrics_sample_rate: *(optional)* The time spent querying
+                                Salesforce, writing and uploading and the
+                                numbers of records and bytes are sent as
+                                StatsD metrics prefixed with
+                                plugins.<dag_id>.<task_id> and summarized
+                                in the task log. Fraction of the phase
+                                timings also sent as individual timers.
+                                *Default: 1*.
+    :type metrics_sample_rate:  float
+    :param streaming:           *(optional)* True to write and upload the
+                                results page by page as they arrive,
+                                following nextRecordsUrl, instead of
+                                fetching all the records first. The next
+                                page is fetched while the current one is
+                                written, so memory holds one or two pages.
+                                *Default: False*.
+    :type streaming:            bool
+    :param part_size:           *(optional)* Size in bytes of the parts of
+                                the multipart upload when streaming. Must
+                                be at least 5 MiB.
+                                *Default: 8 MiB*.
+    :type part_size:            int
+    :param parquet_compression: *(optional)* Compression codec of the
+                                parquet format: snappy, zstd, gzip or none.
+                                *Default: snappy*.
+    :type parquet_compression:  string
+    :param row_group_size:      *(optional)* Maximum number of records per
+                                row group of the parquet format. Records
+                                are written to S3 a row group at a time.
+                                *Default: 100000*.
+    :type row_group_size:       int
+    :param describe_cache:      *(optional)* S3 URI of the prefix under
+                                which the describe metadata of the objects
+                                is cached for the next runs, keyed by org,
+                                object and API version
+                                (ex: s3://mwaa-bucket/cache/salesforce),
+                                or a SalesforceDescribeCache. Entries are
+                                revalidated after a day.
+                                *Default: None, cached for the task only*.
+    :type describe_cache:       string
+    :param watermark:           *(optional)* S3 URI of the object holding
+                                the greatest SystemModStamp landed so far
+                                (ex: s3://mwaa-bucket/watermarks/opportunity.json).
+                                Only the records modified strictly after it
+                                are queried, instead of from_date, and it is
+                                moved forward once they are uploaded. The
+                                first run starts from from_date, if any.
+                                SystemModStamp is added to sf_fields when
+                                missing. Not compatible with query.
+                                *Default: None*.
+    :type watermark:            string
+    :param batch_size:          *(optional)* Maximum number of records
+                                converted to csv, json or ndjson at once
+                                and appended to the output, so that memory
+                                holds one batch as a DataFrame. Used when
+                                streaming and for relationship_object
+                                records; other results are fetched whole
+                                and converted at once, as before.
+                                *Default: 10000*.
+    :type batch_size:           int
     """
 
-    template_fields = ("s3_key", "query")
+    template_fields = ("s3_key", "query", "watermark")
 
     @apply_defaults
     def __init__(
@@ -157,12 +543,24 @@ class SalesforceToS3Operator(BaseOperator):
         relationship_object=None,
         record_time_added=False,
         coerce_to_timestamp=False,
+        metrics_sample_rate=1.0,
+        streaming=False,
+        part_size=DEFAULT_PART_SIZE,
+        parquet_compression="snappy",
+        row_group_size=DEFAULT_ROW_GROUP_SIZE,
+        describe_cache=None,
+        watermark=None,
+        to_date_exclusive=False,
+        batch_size=DEFAULT_BATCH_SIZE,
         *args,
         **kwargs,
     ):
 
         super(SalesforceToS3Operator, self).__init__(*args, **kwargs)
 
+        if watermark and query:
+            raise ValueError("watermark is not compatible with query")
+
         self.sf_conn_id = sf_conn_id
         self.object = sf_obj
         self.fields = sf_fields
@@ -176,23 +574,235 @@ class SalesforceToS3Operator(BaseOperator):
         self.relationship_object = relationship_object
         self.record_time_added = record_time_added
         self.coerce_to_timestamp = coerce_to_timestamp
+        self.metrics_sample_rate = metrics_sample_rate
+        self.streaming = streaming
+        self.part_size = part_size
+        self.parquet_compression = parquet_compression
+        self.row_group_size = row_group_size
+        self.describe_cache = describe_cache
+        self.watermark = watermark
+        self.to_date_exclusive = to_date_exclusive
+        self.batch_size = batch_size
+        # SystemModStamp after which records are queried, and greatest one
+        # of the records written.
+        self._low_watermark = None
+        self._high_watermark = None
 
     def special_query(self, query, sf_hook, relationship_object=None):
+        """
+        Returns the results of ``query`` as ``make_query`` does. With a
+        relationship_object, the records are the ones of its subquery,
+        including the pages of subquery results fetched from nextRecordsUrl.
+        All the records are held in memory: ``iter_special_query`` yields
+        them page by page instead.
+        """
         if not query:
             raise ValueError("Query is None.  Cannot query nothing")
 
-        sf_hook.sign_in()
-
         results = sf_hook.make_query(query)
         if relationship_object:
-            records = []
-            for r in results["records"]:
-                if r.get(relationship_object, None):
-                    records.extend(r[relationship_object]["records"])
-            results["records"] = records
-
+            results["records"] = [
+                record
+                for batch in iter_relationship_records(
+                    sf_hook.get_conn(),
+                    [results["records"]],
+                    relationship_object,
+                    self.batch_size,
+                )
+                for record in batch
+            ]
         return results
 
+    def iter_special_query(self, query, sf_hook, relationship_object=None):
+        """
+        Yields the records of ``query`` page by page, or the records of its
+        relationship_object subquery, following the pagination of both.
+        """
+        if not query:
+            raise ValueError("Query is None.  Cannot query nothing")
+
+        sf_conn = sf_hook.get_conn()
+        pages = iter_query_pages(sf_conn, query)
+        if relationship_object:
+            pages = iter_relationship_records(
+                sf_conn, pages, relationship_object, self.batch_size
+            )
+        return pages
+
+    def _build_soql(self):
+        """Query of the fields of the object, filtered on SystemModStamp."""
+        conditions = []
+        if self._low_watermark:
+            logging.info(f"Gathering items modified after: {self._low_watermark}")
+            conditions.append(f"SystemModStamp > {soql_datetime(self._low_watermark)}")
+        elif self.from_date:
+            logging.info(f"Gathering items from date: {self.from_date}")
+            conditions.append(f"SystemModStamp >= {self.from_date}")
+        if self.to_date:
+            logging.info(f"Gathering items to date: {self.to_date}")
+            operator = "<" if self.to_date_exclusive else "<="
+            conditions.append(f"SystemModStamp {operator} {self.to_date}")
+        soql = f"SELECT {','.join(self.fields)} FROM {self.object}"
+        if conditions:
+            soql += " WHERE " + " AND ".join(conditions)
+        return soql
+
+    def _record_writer(self, hook, sink, batch_size=None):
+        return SalesforceRecordWriter(
+            sink,
+            hook,
+            fmt=self.fmt,
+            coerce_to_timestamp=self.coerce_to_timestamp,
+            record_time_added=self.record_time_added,
+            batch_size=batch_size or self.batch_size,
+        )
+
+    def _stream_to_s3(self, hook, metrics):
+        """
+        Appends each page of results to the S3 object as it arrives, a
+        batch of records at a time.
+        """
+        soql = self.query or self._build_soql()
+        pages = self.iter_special_query(
+            soql,
+            hook,
+            relationship_object=self.relationship_object if self.query else None,
+        )
+        if self.fmt == "parquet":
+            self._write_parquet(hook, pages, metrics)
+            return
+        upload = None
+        try:
+            for records in metrics.timed_iter("salesforce_query", pages):
+                if not records:
+                    continue
+                if upload is None:
+                    upload = S3MultipartUpload(
+                        S3Hook(self.s3_conn_id).get_conn(),
+                        bucket_name=self.s3_bucket,
+                        key=self.s3_key,
+                        part_size=self.part_size,
+                    )
+                    writer = self._record_writer(hook, upload)
+                with metrics.phase("write"):
+                    writer.write(records)
+                metrics.incr("records", len(records))
+                self._track_watermark(records)
+
+            if upload is None:
+                logging.info(f"No records found in the query: {soql}")
+                return
+            with metrics.phase("s3_upload"):
+                writer.close()
+                upload.close()
+            metrics.incr("bytes", upload.tell())
+        except BaseException:
+            if upload is not None:
+                upload.abort()
+            raise
+
+    def _write_parquet(self, hook, pages, metrics):
+        """
+        Writes pages of records to the S3 object as Parquet, a row group at
+        a time. No object is created if there are no records.
+        """
+        fetched_at = time.time() if self.record_time_added else None
+        upload = None
+        try:
+            for records in metrics.timed_iter("salesforce_query", pages):
+                if not records:
+                    continue
+                if upload is None:
+                    upload = S3MultipartUpload(
+                        S3Hook(self.s3_conn_id).get_conn(),
+                        bucket_name=self.s3_bucket,
+                        key=self.s3_key,
+                        part_size=self.part_size,
+                    )
+                    writer = ParquetRecordWriter(
+                        upload,
+                        describe=hook.describe_object,
+                        compression=self.parquet_compression,
+                        row_group_size=self.row_group_size,
+                        fetched_at=fetched_at,
+                    )
+                with metrics.phase("write"):
+                    writer.write(records)
+                metrics.incr("records", len(records))
+                self._track_watermark(records)
+
+            if upload is None:
+                logging.info(f"No records found for {self.object}")
+                return
+            with metrics.phase("s3_upload"):
+                writer.close()
+                upload.close()
+            metrics.incr("bytes", upload.tell())
+        except BaseException:
+            if upload is not None:
+                upload.abort()
+            raise
+
+    def _track_watermark(self, records):
+        if self.watermark:
+            self._high_watermark = max_system_modstamp(records, self._high_watermark)
+
+    def _load_to_s3(self, hook, tmp, metrics):
+        """
+        Fetches all the records, writes them to ``tmp`` and uploads it. The
+        records of a relationship_object are written as the pages of their
+        parents arrive instead, as they are not needed all at once.
+        """
+        soql = self.query or self._build_soql()
+        batch_size = None
+        if self.query and self.relationship_object:
+            pages = self.iter_special_query(
+                self.query, hook, relationship_object=self.relationship_object
+            )
+        else:
+            with metrics.phase("salesforce_query"):
+                records = hook.make_query(soql)["records"]
+            pages = [records]
+            # The records are all in memory already: converting them at once
+            # infers column types from all of them, as write_object_to_file
+            # does, so the output is the same as before the batched writer.
+            batch_size = len(records)
+
+        if self.fmt == "parquet":
+            self._write_parquet(hook, pages, metrics)
+            return
+
+        # output the records from the query to a file
+        logging.info("Writing query results to: {0}".format(tmp.name))
+        writer = self._record_writer(hook, tmp, batch_size)
+        for records in metrics.timed_iter("salesforce_query", pages):
+            with metrics.phase("write"):
+                writer.write(records)
+            metrics.incr("records", len(records))
+            self._track_watermark(records)
+
+        if not writer.record_count:
+            logging.info(f"No records found in the query: {soql}")
+            return
+
+        with metrics.phase("write"):
+            writer.close()
+            # Flush the temp file and upload temp file to S3
+            tmp.flush()
+        metrics.incr("bytes", os.path.getsize(tmp.name))
+
+        dest_s3 = S3Hook(self.s3_conn_id)
+
+        with metrics.phase("s3_upload"):
+            dest_s3.load_file(
+                filename=tmp.name,
+                key=self.s3_key,
+                bucket_name=self.s3_bucket,
+                replace=True,
+            )
+
+        tmp.close()
+
     def execute(self, context):
         """
         Execute the operator.
@@ -200,83 +810,47 @@ class SalesforceToS3Operator(BaseOperator):
         and write it to a file.
         """
         logging.info("Prepping to gather data from Salesforce")
+        metrics = OperatorMetrics(
+            f"plugins.{self.dag_id}.{self.task_id}", self.metrics_sample_rate
+        )
 
         # Open a name temporary file to store output file until S3 upload
-        with NamedTemporaryFile("w") as tmp:
-
-            # Load the SalesforceHook
-            hook = SalesforceHook(conn_id=self.sf_conn_id)
+        with NamedTemporaryFile("wb") as tmp:
 
-            # Attempt to login to Salesforce
-            # If this process fails, it will raise an error and die.
-            try:
-                hook.sign_in()
-            except:
-                logging.debug("Unable to login.")
+            # Load the SalesforceHook, describing each object once at most.
+            # It logs in on first use, unless another task of the worker
+            # already did.
+            hook = CachedDescribeSalesforceHook(
+                self.sf_conn_id, _describe_cache(self.describe_cache, self.s3_conn_id)
+            )
 
             # Get object from Salesforce
             # If fields were not defined, all fields are pulled.
             if not self.fields:
-                self.fields = hook.get_available_fields(self.object)
+                with metrics.phase("salesforce_describe"):
+                    self.fields = hook.get_available_fields(self.object)
+
+            watermark = None
+            if self.watermark:
+                watermark = S3Watermark(self.watermark, aws_conn_id=self.s3_conn_id)
+                self._low_watermark = watermark.get()
+                if WATERMARK_FIELD.lower() not in (f.lower() for f in self.fields):
+                    self.fields = list(self.fields) + [WATERMARK_FIELD]
 
             logging.info(
                 "Making request for "
                 "{0} fields from {1}".format(len(self.fields), self.object)
             )
 
-            if self.query:
-                query = self.special_query(
-                    self.query, hook, relationship_object=self.relationship_object
-                )
+            if self.streaming:
+                self._stream_to_s3(hook, metrics)
             else:
-                if self.to_date and self.from_date:
-                    logging.info(
-                        f"Gathering items from date: {self.from_date} to date: {self.to_date}"
-                    )
-                    date_select = f"{self.object} WHERE SystemModStamp >= {self.from_date} AND SystemModStamp <= {self.to_date}"
-                    query = hook.get_object_from_salesforce(date_select, self.fields)
-                elif self.from_date:
-                    logging.info(f"Gathering items from date: {self.from_date}")
-                    date_select = (
-                        f"{self.object} WHERE SystemModStamp >= {self.from_date}"
-                    )
-                    query = hook.get_object_from_salesforce(date_select, self.fields)
-                elif self.to_date:
-                    logging.info(f"Gathering items to date: {self.to_date}")
-                    date_select = (
-                        f"{self.object} WHERE SystemModStamp <= {self.to_date}"
-                    )
-                    query = hook.get_object_from_salesforce(date_select, self.fields)
-                else:
-                    query = hook.get_object_from_salesforce(self.object, self.fields)
-
-            # output the records from the query to a file
-            # the list of records is stored under the "records" key
-            logging.info("Writing query results to: {0}".format(tmp.name))
-
-            if not query["records"]:
-                logging.info(f"No records found in the query: {query}")
-            else:
-                hook.write_object_to_file(
-                    query["records"],
-                    filename=tmp.name,
-                    fmt=self.fmt,
-                    coerce_to_timestamp=self.coerce_to_timestamp,
-                    record_time_added=self.record_time_added,
-                )
-
-                # Flush the temp file and upload temp file to S3
-                tmp.flush()
-
-                dest_s3 = S3Hook(self.s3_conn_id)
-
-                dest_s3.load_file(
-                    filename=tmp.name,
-                    key=self.s3_key,
-                    bucket_name=self.s3_bucket,
-                    replace=True,
-                )
+                self._load_to_s3(hook, tmp, metrics)
 
-                tmp.close()
+            # Only moved forward once the records are in S3.
+            if watermark is not None and self._high_watermark is not None:
+                watermark.set(self._high_watermark)
 
         logging.info("Query finished!")
+        metrics.emit()
+        logging.info("Transfer summary: %s", metrics.summary())
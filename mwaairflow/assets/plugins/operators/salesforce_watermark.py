@@ -0,0 +1,80 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from airflow.hooks.S3_hook import S3Hook
+
+WATERMARK_FIELD = "SystemModstamp"
+
+
+def max_system_modstamp(
+    records: Iterable[Dict[str, Any]], current: Optional[str] = None
+) -> Optional[str]:
+    """
+    Returns the greatest SystemModstamp of the records and ``current``.
+    Values are compared as strings, as the API returns them all in UTC with
+    the same format, ex: 2021-01-01T00:00:00.000+0000.
+    """
+    field = None
+    for record in records:
+        if field is None:
+            # Records hold the field with the case of the describe metadata.
+            field = next(
+                (name for name in record if name.lower() == WATERMARK_FIELD.lower()),
+                None,
+            )
+            if field is None:
+                return current
+        value = record[field]
+        if value and (current is None or value > current):
+            current = value
+    return current
+
+
+def soql_datetime(value: str) -> str:
+    """Datetime literal of a SOQL query, ex: 2021-01-01T00:00:00.000Z."""
+    return value.replace("+0000", "Z")
+
+
+class S3Watermark:
+    """
+    High watermark of an incremental extraction: the greatest SystemModstamp
+    of the records landed so far, kept in a small JSON object in Amazon S3.
+
+    :param s3_uri: S3 URI of the object, e.g. s3://mwaa-bucket/watermarks/opportunity.json
+    :type s3_uri: str
+    :param aws_conn_id: The connection ID to use when fetching connection info. Default is aws_default.
+    :type aws_conn_id: str
+    """
+
+    def __init__(self, s3_uri: str, aws_conn_id: str = "aws_default") -> None:
+        self.s3_uri = s3_uri
+        self.aws_conn_id = aws_conn_id
+        self._bucket_name, self._key = S3Hook.parse_s3_url(s3_uri)
+        self._s3_hook = S3Hook(aws_conn_id=aws_conn_id)
+
+    def get(self) -> Optional[str]:
+        """Returns the stored watermark, or None before the first extraction."""
+        if not self._s3_hook.check_for_key(
+            key=self._key, bucket_name=self._bucket_name
+        ):
+            return None
+        state = json.loads(
+            self._s3_hook.read_key(key=self._key, bucket_name=self._bucket_name)
+        )
+        return state["system_modstamp"]
+
+    def set(self, value: str) -> None:
+        self._s3_hook.load_string(
+            json.dumps({"system_modstamp": value, "updated_at": time.time()}),
+            key=self._key,
+            bucket_name=self._bucket_name,
+            replace=True,
+        )
+        logging.info("Watermark %s saved to %s", value, self.s3_uri)
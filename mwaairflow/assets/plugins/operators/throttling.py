@@ -0,0 +1,231 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+# Error codes and HTTP statuses returned by Amazon S3 (botocore ClientError)
+# and Azure Blob Storage (azure.core HttpResponseError) when they ask the
+# client to slow down.
+THROTTLING_ERROR_CODES = frozenset(
+    (
+        "SlowDown",
+        "ServerBusy",
+        "OperationTimedOut",
+        "Throttling",
+        "ThrottlingException",
+        "RequestLimitExceeded",
+        "TooManyRequests",
+    )
+)
+THROTTLING_STATUS_CODES = frozenset((429, 503))
+
+# Number of seconds of request history used to measure the current rate.
+RATE_WINDOW = 5.0
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """Returns True if ``error`` is a throttling response from S3 or Azure."""
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        # botocore ClientError
+        code = response.get("Error", {}).get("Code")
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    else:
+        # azure.core.exceptions.HttpResponseError
+        code = getattr(error, "error_code", None)
+        status = getattr(error, "status_code", None)
+    return code in THROTTLING_ERROR_CODES or status in THROTTLING_STATUS_CODES
+
+
+class AdaptiveThrottle:
+    """
+    Adaptive request rate controller shared by all the threads calling one
+    service. Requests are not limited until the service first throttles one
+    of them; the rate is then cut to half of the measured request rate
+    (multiplicative decrease) and grows back by ``additive_increase``
+    requests per second every second without throttling (additive increase),
+    so throughput stays close to the limit of the service instead of
+    oscillating between overload and failures.
+
+    Throttled requests are retried with exponential backoff and full jitter,
+    up to ``max_attempts`` attempts in total.
+
+    :param name: Name of the service, used in the logs
+    :type name: str
+    :param max_attempts: Maximum number of attempts of a throttled request. Default is 10.
+    :type max_attempts: int
+    :param min_rate: Lowest request rate the controller decreases to, in requests per second.
+            Default is 1.
+    :type min_rate: float
+    :param additive_increase: Requests per second added to the rate every second without
+            throttling. Default is 1.
+    :type additive_increase: float
+    :param multiplicative_decrease: Factor applied to the rate on throttling. Default is 0.5.
+    :type multiplicative_decrease: float
+    :param base_delay: Backoff of the first retry in seconds, doubled on every attempt.
+            Default is 0.1.
+    :type base_delay: float
+    :param max_delay: Maximum backoff of a retry in seconds. Default is 20.
+    :type max_delay: float
+    :param log_interval: Minimum number of seconds between two logs of the current rate.
+            Default is 60.
+    :type log_interval: float
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int = 10,
+        min_rate: float = 1.0,
+        additive_increase: float = 1.0,
+        multiplicative_decrease: float = 0.5,
+        base_delay: float = 0.1,
+        max_delay: float = 20.0,
+        log_interval: float = 60.0,
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1, got {max_attempts}")
+        self.name = name
+        self.max_attempts = max_attempts
+        self.min_rate = min_rate
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.log_interval = log_interval
+        self.request_count = 0
+        self.throttled_count = 0
+        self._rate = None
+        self._next_slot = 0.0
+        self._last_decrease = float("-inf")
+        self._last_log = time.monotonic()
+        self._started_at = None
+        self._starts = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> Optional[float]:
+        """Current rate limit in requests per second, or None when not limited."""
+        return self._rate
+
+    def _measured_rate(self, now: float) -> float:
+        while self._starts and self._starts[0] < now - RATE_WINDOW:
+            self._starts.popleft()
+        if self._started_at is None:
+            return 0.0
+        # Measured over at least a second, so that the first burst of
+        # requests does not read as a very high rate.
+        window = max(1.0, min(RATE_WINDOW, now - self._started_at))
+        return len(self._starts) / window
+
+    def _describe(self, now: float) -> str:
+        limit = "unlimited" if self._rate is None else f"{self._rate:.1f} req/s"
+        return (
+            f"{self.name} request rate: {self._measured_rate(now):.1f} req/s, "
+            f"limit: {limit}, {self.throttled_count} of {self.request_count} "
+            "requests throttled"
+        )
+
+    def _log_rate(self, now: float) -> None:
+        if now - self._last_log >= self.log_interval:
+            self._last_log = now
+            logging.info(self._describe(now))
+
+    def _acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self._started_at is None:
+                self._started_at = now
+            self.request_count += 1
+            self._starts.append(now)
+            delay = 0.0
+            if self._rate is not None:
+                slot = max(now, self._next_slot)
+                self._next_slot = slot + 1 / self._rate
+                delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def _on_success(self) -> None:
+        with self._lock:
+            if self._rate is not None:
+                # One request out of "rate" per second: adds additive_increase
+                # requests per second every second.
+                self._rate += self.additive_increase / self._rate
+            self._log_rate(time.monotonic())
+
+    def _on_throttled(self, error: BaseException) -> None:
+        with self._lock:
+            self.throttled_count += 1
+            now = time.monotonic()
+            # Requests already in flight when the service pushed back are
+            # throttled too; they must not divide the rate again.
+            if now - self._last_decrease < 1.0:
+                return
+            self._last_decrease = now
+            rate = self._measured_rate(now)
+            if self._rate is not None:
+                rate = min(rate, self._rate)
+            self._rate = max(self.min_rate, rate * self.multiplicative_decrease)
+            self._next_slot = now + 1 / self._rate
+            logging.warning(
+                "%s throttled a request (%s), reducing the request rate to %.1f req/s",
+                self.name,
+                error,
+                self._rate,
+            )
+
+    def call(self, function: Callable, *args, **kwargs) -> Any:
+        """
+        Calls ``function`` once the current rate allows it, retrying it when
+        the service throttles it.
+        """
+        for attempt in itertools.count(1):
+            self._acquire()
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                if not is_throttling_error(e):
+                    raise
+                self._on_throttled(e)
+                if attempt >= self.max_attempts:
+                    raise
+                backoff = min(self.max_delay, self.base_delay * 2**attempt)
+                time.sleep(random.uniform(0, backoff))
+            else:
+                self._on_success()
+                return result
+
+    def wrap(self, client) -> "ThrottledClient":
+        """Returns a proxy of ``client`` whose methods are called through ``call``."""
+        return ThrottledClient(client, self)
+
+    def summary(self) -> str:
+        with self._lock:
+            return self._describe(time.monotonic())
+
+
+class ThrottledClient:
+    """Proxy of a boto3 client whose method calls are rate limited and retried."""
+
+    def __init__(self, client, throttle: AdaptiveThrottle) -> None:
+        self._client = client
+        self._throttle = throttle
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def throttled(*args, **kwargs):
+            return self._throttle.call(attribute, *args, **kwargs)
+
+        return throttled
@@ -0,0 +1,181 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from airflow.hooks.S3_hook import S3Hook
+
+
+class LedgerEntry(NamedTuple):
+    s3_key: str
+    size: int
+    etag: Optional[str]
+    transferred_at: float
+
+
+class TransferLedger:
+    """
+    Base class of the stores recording which blobs have already been
+    transferred, so that retries and later runs can skip them without
+    touching Azure Blob Storage or Amazon S3. Implementations must be safe
+    to call from several threads.
+
+    Subclass it and pass an instance as the ``ledger`` argument of
+    ``AzureBlobStorageListToS3Operator`` to plug in another key-value store.
+    """
+
+    def open(self) -> None:
+        """Called once before the first lookup."""
+
+    def close(self) -> None:
+        """Called once at the end of the task, including when it fails."""
+
+    def get(self, blob_name: str) -> Optional[LedgerEntry]:
+        raise NotImplementedError
+
+    def record(
+        self, blob_name: str, s3_key: str, size: int, etag: Optional[str] = None
+    ) -> None:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """Returns the number of blobs recorded as transferred."""
+        raise NotImplementedError
+
+    def is_synced(
+        self, blob_name: str, s3_key: str, size: int, etag: Optional[str] = None
+    ) -> bool:
+        """
+        Returns True if the blob was transferred to ``s3_key`` with the same
+        size and, when ``etag`` is given, from the same version of the blob.
+        """
+        entry = self.get(blob_name)
+        return (
+            entry is not None
+            and entry.s3_key == s3_key
+            and entry.size == size
+            and (etag is None or entry.etag == etag)
+        )
+
+
+class SqliteTransferLedger(TransferLedger):
+    """
+    Ledger kept in a local SQLite database and checkpointed to Amazon S3, so
+    that it survives the worker and can be inspected while the task runs.
+
+    :param s3_uri: S3 URI of the database, e.g. s3://mwaa-bucket/ledgers/sync.sqlite.
+            It is downloaded on open if it exists.
+    :type s3_uri: str
+    :param aws_conn_id: The connection ID to use when fetching connection info. Default is aws_default.
+    :type aws_conn_id: str
+    :param checkpoint_interval: Minimum number of seconds between two uploads of the database
+            while the task runs. Default is 60.
+    :type checkpoint_interval: float
+    """
+
+    def __init__(
+        self,
+        s3_uri: str,
+        aws_conn_id: str = "aws_default",
+        checkpoint_interval: float = 60,
+    ) -> None:
+        self.s3_uri = s3_uri
+        self.aws_conn_id = aws_conn_id
+        self.checkpoint_interval = checkpoint_interval
+        self._bucket_name, self._key = S3Hook.parse_s3_url(s3_uri)
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        self._s3_hook = None
+        self._connection = None
+        self._directory = None
+        self._last_checkpoint = 0.0
+
+    def open(self) -> None:
+        self._s3_hook = S3Hook(aws_conn_id=self.aws_conn_id)
+        self._directory = tempfile.mkdtemp(prefix="transfer-ledger-")
+        path = os.path.join(self._directory, "ledger.sqlite")
+        if self._s3_hook.check_for_key(key=self._key, bucket_name=self._bucket_name):
+            logging.info("Resuming transfer ledger from %s", self.s3_uri)
+            self._s3_hook.get_conn().download_file(self._bucket_name, self._key, path)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS transfers ("
+            "blob_name TEXT PRIMARY KEY, s3_key TEXT NOT NULL, size INTEGER NOT NULL, "
+            "etag TEXT, transferred_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+        self._last_checkpoint = time.monotonic()
+        logging.info("Transfer ledger holds %s blobs", self.count())
+
+    def close(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            self.checkpoint()
+        finally:
+            self._connection.close()
+            self._connection = None
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+    def get(self, blob_name: str) -> Optional[LedgerEntry]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT s3_key, size, etag, transferred_at FROM transfers "
+                "WHERE blob_name = ?",
+                (blob_name,),
+            ).fetchone()
+        return LedgerEntry(*row) if row else None
+
+    def record(
+        self, blob_name: str, s3_key: str, size: int, etag: Optional[str] = None
+    ) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO transfers VALUES (?, ?, ?, ?, ?)",
+                (blob_name, s3_key, size, etag, time.time()),
+            )
+            due = time.monotonic() - self._last_checkpoint >= self.checkpoint_interval
+        if due:
+            self.checkpoint()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM transfers"
+            ).fetchone()[0]
+
+    def checkpoint(self) -> None:
+        """Uploads a consistent snapshot of the database to Amazon S3."""
+        if not self._checkpoint_lock.acquire(blocking=False):
+            # Another thread is already uploading a snapshot.
+            return
+        try:
+            snapshot_path = os.path.join(self._directory, "snapshot.sqlite")
+            with self._lock:
+                self._connection.commit()
+                snapshot = sqlite3.connect(snapshot_path)
+                self._connection.backup(snapshot)
+                snapshot.close()
+                self._last_checkpoint = time.monotonic()
+            self._s3_hook.load_file(
+                filename=snapshot_path,
+                key=self._key,
+                bucket_name=self._bucket_name,
+                replace=True,
+            )
+            logging.info(
+                "Transfer ledger checkpointed to %s: %s blobs synced",
+                self.s3_uri,
+                self.count(),
+            )
+        finally:
+            self._checkpoint_lock.release()
@@ -6,12 +6,17 @@
 from airflow.plugins_manager import AirflowPlugin
 from operators.salesforce_to_s3_operator import SalesforceBulkQueryToS3Operator
 from operators.salesforce_to_s3_operator import SalesforceToS3Operator
+from operators.salesforce_partition_planner import SalesforcePartitionPlannerOperator
 
 
 class SalesforceToS3Plugin(AirflowPlugin):
     name = "SalesforceToS3Plugin"
     hooks = []
-    operators = [SalesforceToS3Operator, SalesforceBulkQueryToS3Operator]
+    operators = [
+        SalesforceToS3Operator,
+        SalesforceBulkQueryToS3Operator,
+        SalesforcePartitionPlannerOperator,
+    ]
     executors = []
     macros = []
     admin_views = []
@@ -0,0 +1,96 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+import gzip
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from airflow.configuration import conf
+from airflow.hooks.S3_hook import S3Hook
+from airflow.models.xcom import BaseXCom
+
+# Prefix of the values stored in the metadata database in place of the
+# values offloaded to Amazon S3.
+S3_REFERENCE_PREFIX = "xcom-s3:"
+
+DEFAULT_THRESHOLD_BYTES = 64 * 1024
+
+
+class S3XComBackend(BaseXCom):
+    """
+    XCom backend keeping small values in the metadata database and
+    offloading the ones of more than ``threshold_bytes`` serialized bytes,
+    e.g. the lists of S3 URIs returned by the transfer operators, to Amazon
+    S3 as gzip compressed objects. The database only stores a short
+    reference to the object, which is downloaded when the value is pulled by
+    a task; the UI shows the reference without downloading anything.
+
+    Configured with the [xcom_s3] section of the Airflow configuration:
+
+    - ``bucket_name``: bucket the values are written to. Values are never
+      offloaded when it is not set.
+    - ``prefix``: prefix of the objects. Default is ``xcom/``.
+    - ``threshold_bytes``: size above which values are offloaded. Default is 65536.
+    - ``aws_conn_id``: connection used to access the bucket. Default is aws_default.
+
+    Enabled with ``core.xcom_backend = xcom_backends.s3_xcom_backend.S3XComBackend``.
+    """
+
+    @staticmethod
+    def _s3_hook() -> S3Hook:
+        return S3Hook(
+            aws_conn_id=conf.get("xcom_s3", "aws_conn_id", fallback="aws_default")
+        )
+
+    @staticmethod
+    def serialize_value(
+        value: Any,
+        *,
+        key: Optional[str] = None,
+        task_id: Optional[str] = None,
+        dag_id: Optional[str] = None,
+        run_id: Optional[str] = None,
+        map_index: Optional[int] = None,
+        **kwargs,
+    ) -> bytes:
+        serialized = BaseXCom.serialize_value(value)
+        bucket_name = conf.get("xcom_s3", "bucket_name", fallback=None)
+        threshold = conf.getint(
+            "xcom_s3", "threshold_bytes", fallback=DEFAULT_THRESHOLD_BYTES
+        )
+        if not bucket_name or len(serialized) <= threshold:
+            return serialized
+
+        prefix = conf.get("xcom_s3", "prefix", fallback="xcom/")
+        # A retry of the task overwrites the object written by the previous try.
+        s3_key = (
+            f"{prefix}{dag_id}/{run_id}/{task_id}/"
+            f"{-1 if map_index is None else map_index}/{key}.gz"
+        )
+        S3XComBackend._s3_hook().load_bytes(
+            gzip.compress(serialized, compresslevel=6),
+            key=s3_key,
+            bucket_name=bucket_name,
+            replace=True,
+        )
+        return BaseXCom.serialize_value(
+            f"{S3_REFERENCE_PREFIX}s3://{bucket_name}/{s3_key}"
+        )
+
+    @staticmethod
+    def deserialize_value(result) -> Any:
+        value = BaseXCom.deserialize_value(result)
+        if not (isinstance(value, str) and value.startswith(S3_REFERENCE_PREFIX)):
+            return value
+        bucket_name, s3_key = S3Hook.parse_s3_url(value[len(S3_REFERENCE_PREFIX) :])
+        s3_object = S3XComBackend._s3_hook().get_key(
+            key=s3_key, bucket_name=bucket_name
+        )
+        serialized = gzip.decompress(s3_object.get()["Body"].read())
+        return BaseXCom.deserialize_value(SimpleNamespace(value=serialized))
+
+    def orm_deserialize_value(self) -> Any:
+        # Used by the UI and the REST API: show the reference, not the value.
+        return BaseXCom.deserialize_value(self)
@@ -16,6 +16,10 @@ from aws_cdk import (
     aws_ec2 as ec2,
 )
 
+# Prefix of the large XCom values offloaded to the MWAA bucket by the
+# S3XComBackend shipped in the plugins.
+XCOM_PREFIX = "xcom/"
+
 
 class AirflowEnvironmentStack(core.NestedStack):
     def _zip_dir(self, dir_path, zip_path):
@@ -54,6 +58,12 @@ class AirflowEnvironmentStack(core.NestedStack):
             block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
             versioned=True,
         )
+        # Offloaded XCom values are only pulled by the tasks of the same run.
+        self.bucket.add_lifecycle_rule(
+            prefix=XCOM_PREFIX,
+            expiration=core.Duration.days(30),
+            noncurrent_version_expiration=core.Duration.days(1),
+        )
         core.CfnOutput(self, "MWAA_BUCKET", value=self.bucket.bucket_name)
 
         # Create MWAA role
@@ -91,6 +101,13 @@ class AirflowEnvironmentStack(core.NestedStack):
                 effect=iam.Effect.ALLOW,
             )
         )
+        role.add_to_policy(
+            iam.PolicyStatement(
+                resources=[f"arn:aws:s3:::{self.bucket.bucket_name}/{XCOM_PREFIX}*"],
+                actions=["s3:PutObject"],
+                effect=iam.Effect.ALLOW,
+            )
+        )
         role.add_to_policy(
             iam.PolicyStatement(
                 resources=[
@@ -306,7 +323,12 @@ class AirflowEnvironmentStack(core.NestedStack):
             source_bucket_arn=self.bucket.bucket_arn,
             webserver_access_mode=access_mode,
         )
-        options = {"core.lazy_load_plugins": False}
+        options = {
+            "core.lazy_load_plugins": False,
+            "core.xcom_backend": "xcom_backends.s3_xcom_backend.S3XComBackend",
+            "xcom_s3.bucket_name": self.bucket.bucket_name,
+            "xcom_s3.prefix": XCOM_PREFIX,
+        }
         if secrets_backend == "SecretsManager":
             options.update(
                 {
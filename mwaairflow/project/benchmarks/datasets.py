@@ -0,0 +1,139 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+"""Deterministic synthetic datasets: the same parameters always produce
+the same blobs and records, so results are comparable across commits."""
+
+import functools
+import hashlib
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, NamedTuple
+
+# Vocabulary of the "text" blobs, compressible about 3:1 like typical logs
+# and CSV exports.
+_WORDS = (
+    "account contact lead opportunity amount stage closed won lost region "
+    "north south east west 2021 2022 2023 error warning info request "
+    "response latency bytes user session id status ok failed retry"
+).split()
+_TEXT_BLOCK_SIZE = 1024 * 1024
+
+
+class BlobSpec(NamedTuple):
+    name: str
+    size: int
+
+
+def blob_specs(
+    count: int, size: int, spread: float = 0.0, seed: int = 0
+) -> List[BlobSpec]:
+    """
+    Names and sizes of ``count`` blobs of ``size`` bytes on average. With a
+    ``spread`` above 0, sizes are log-normally distributed with that sigma,
+    so most blobs are small and a few are much larger, as in real containers.
+    Blobs are spread over 16 virtual directories.
+    """
+    rng = random.Random(seed)
+    specs = []
+    for i in range(count):
+        if spread:
+            # exp(sigma^2 / 2) is the mean of the log-normal distribution.
+            mu = -(spread**2) / 2
+            blob_size = max(1, int(size * rng.lognormvariate(mu, spread)))
+        else:
+            blob_size = size
+        specs.append(BlobSpec(f"dir-{i % 16:02d}/blob-{i:07d}.dat", blob_size))
+    return specs
+
+
+@functools.lru_cache(maxsize=4)
+def _text_block(seed: int) -> bytes:
+    rng = random.Random(seed)
+    block = bytearray()
+    while len(block) < _TEXT_BLOCK_SIZE:
+        block += " ".join(rng.choices(_WORDS, k=16)).encode("ascii") + b"\n"
+    return bytes(block[:_TEXT_BLOCK_SIZE])
+
+
+def blob_payload(spec: BlobSpec, content: str = "text", seed: int = 0) -> bytes:
+    """
+    Content of a blob: "random" bytes (incompressible) or "text" lines
+    (compressible). Each blob starts at its own offset of a shared block,
+    so blobs differ without generating every byte.
+    """
+    digest = hashlib.sha256(f"{seed}/{spec.name}".encode("utf-8")).digest()
+    if content == "random":
+        return random.Random(digest).randbytes(spec.size)
+    if content != "text":
+        raise ValueError(f"content must be 'text' or 'random', got {content}")
+    block = _text_block(seed)
+    start = int.from_bytes(digest[:4], "big") % _TEXT_BLOCK_SIZE
+    repeats = (start + spec.size) // _TEXT_BLOCK_SIZE + 1
+    return (block * repeats)[start : start + spec.size]
+
+
+# Typed fields of the synthetic Salesforce object, as returned by describe,
+# followed by "extra_fields" string fields of "field_size" characters.
+_TYPED_FIELDS = (
+    ("Id", "id"),
+    ("Name", "string"),
+    ("Amount__c", "currency"),
+    ("Quantity__c", "double"),
+    ("IsActive__c", "boolean"),
+    ("CloseDate__c", "date"),
+    ("SystemModstamp", "datetime"),
+)
+_EPOCH = datetime(2021, 1, 1)
+# Seconds between the SystemModstamp of two consecutive records.
+_MODSTAMP_STEP = 17
+
+
+def salesforce_fields(extra_fields: int = 10) -> List[Dict[str, str]]:
+    fields = [{"name": name, "type": kind} for name, kind in _TYPED_FIELDS]
+    fields += [
+        {"name": f"Text{n:03d}__c", "type": "string"}
+        for n in range(extra_fields)
+    ]
+    return fields
+
+
+def salesforce_record(
+    index: int, object_name: str, extra_fields: int = 10, field_size: int = 32
+) -> Dict:
+    """Record number ``index`` of the object, as returned by the REST API."""
+    rng = random.Random(index)
+    record_id = f"001BENCH{index:010d}"
+    modified = _EPOCH + timedelta(seconds=index * _MODSTAMP_STEP)
+    record = {
+        "attributes": {
+            "type": object_name,
+            "url": f"/services/data/v52.0/sobjects/{object_name}/{record_id}",
+        },
+        "Id": record_id,
+        "Name": f"{object_name} {index}",
+        "Amount__c": round(rng.uniform(0, 100000), 2),
+        "Quantity__c": rng.randint(0, 1000),
+        "IsActive__c": rng.random() < 0.5,
+        "CloseDate__c": (modified + timedelta(days=30)).strftime("%Y-%m-%d"),
+        "SystemModstamp": modified.strftime("%Y-%m-%dT%H:%M:%S.000+0000"),
+    }
+    text = "".join(rng.choices(_WORDS, k=field_size))[:field_size]
+    for n in range(extra_fields):
+        record[f"Text{n:03d}__c"] = text
+    return record
+
+
+def first_record_modified_after(modified_after: datetime) -> int:
+    """Index of the first record whose SystemModstamp is after the date."""
+    seconds = (modified_after - _EPOCH).total_seconds()
+    return max(0, int(seconds // _MODSTAMP_STEP) + 1)
+
+
+def salesforce_records(
+    start: int, stop: int, object_name: str, extra_fields: int, field_size: int
+) -> Iterator[Dict]:
+    for index in range(start, stop):
+        yield salesforce_record(index, object_name, extra_fields, field_size)
@@ -0,0 +1,327 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+"""Local HTTPS server answering the Salesforce REST and Bulk API calls made
+by simple-salesforce with synthetic records, generated on the fly."""
+
+import csv
+import datetime
+import io
+import ipaddress
+import json
+import os
+import re
+import ssl
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from datasets import (
+    first_record_modified_after,
+    salesforce_fields,
+    salesforce_record,
+)
+
+# Records per page of the REST query API, per result of a Bulk API 1.0 batch
+# and per result page of a Bulk API 2.0 job, unless maxRecords is set.
+QUERY_PAGE_SIZE = 2000
+BULK_RESULT_SIZE = 50000
+
+# Last-Modified of the describe metadata of every object.
+DESCRIBE_LAST_MODIFIED = "Fri, 01 Jan 2021 00:00:00 GMT"
+
+_FROM = re.compile(r"\bFROM\s+(\w+)", re.IGNORECASE)
+_MODIFIED_AFTER = re.compile(
+    r"\bSystemModStamp\s*>\s*(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d+)?)Z",
+    re.IGNORECASE,
+)
+
+
+def create_certificate(directory: str) -> tuple:
+    """
+    Writes a self-signed certificate for 127.0.0.1 and its key to
+    ``directory``. simple-salesforce only speaks HTTPS; clients trust the
+    certificate through REQUESTS_CA_BUNDLE.
+    """
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.utcnow()
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=7))
+        .add_extension(
+            x509.SubjectAlternativeName(
+                [x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]
+            ),
+            critical=False,
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_file = os.path.join(directory, "fake-salesforce.pem")
+    key_file = os.path.join(directory, "fake-salesforce.key")
+    with open(cert_file, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_file, "wb") as f:
+        f.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.TraditionalOpenSSL,
+                serialization.NoEncryption(),
+            )
+        )
+    return cert_file, key_file
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeSalesforce"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body, status=200, headers=None) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_csv(self, body: str, headers: dict) -> None:
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        server = self.server
+        # /services/data/vXX.X/sobjects/<object>/describe
+        if parts[:2] == ["services", "data"] and parts[3:4] == ["sobjects"]:
+            server.describe_count += 1
+            # The metadata never changes: conditional requests get a 304.
+            if self.headers.get("If-Modified-Since"):
+                self.send_response(304)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            return self._send_json(
+                server.describe(parts[4]),
+                headers={"Last-Modified": DESCRIBE_LAST_MODIFIED},
+            )
+        # /services/data/vXX.X/jobs/query/<job>[/results]
+        if parts[:2] == ["services", "data"] and parts[3:5] == [
+            "jobs",
+            "query",
+        ]:
+            job = server.jobs[parts[5]]
+            if parts[-1] != "results":
+                return self._send_json(
+                    {
+                        "id": parts[5],
+                        "state": "JobComplete",
+                        "numberRecordsProcessed": server.record_count,
+                    }
+                )
+            query = parse_qs(url.query)
+            start = int(query.get("locator", ["0"])[0])
+            size = int(query.get("maxRecords", [BULK_RESULT_SIZE])[0])
+            stop = min(start + size, server.record_count)
+            return self._send_csv(
+                server.csv_page(job["object"], start, stop),
+                {
+                    "Sforce-NumberOfRecords": str(stop - start),
+                    "Sforce-Locator": (
+                        str(stop) if stop < server.record_count else "null"
+                    ),
+                },
+            )
+        # /services/data/vXX.X/query/?q=... and /query/<locator>
+        if parts[:2] == ["services", "data"] and parts[3:4] == ["query"]:
+            if len(parts) > 4:
+                object_name, offset = parts[4].split("-", 1)
+                return self._send_json(
+                    server.query_page(url.path, object_name, int(offset))
+                )
+            soql = parse_qs(url.query)["q"][0]
+            # Incremental queries skip the records modified before.
+            start = 0
+            modified_after = _MODIFIED_AFTER.search(soql)
+            if modified_after:
+                start = first_record_modified_after(
+                    datetime.datetime.fromisoformat(modified_after.group(1))
+                )
+            return self._send_json(
+                server.query_page(url.path, _FROM.search(soql).group(1), start)
+            )
+        # /services/async/XX.X/job/<job>/batch/<batch>[/result[/<result>]]
+        if parts[:2] == ["services", "async"] and "batch" in parts:
+            job = server.jobs[parts[4]]
+            if parts[-1] == "result":
+                return self._send_json(list(job["results"]))
+            if parts[-2] == "result":
+                start = int(parts[-1])
+                stop = min(start + BULK_RESULT_SIZE, server.record_count)
+                return self._send_json(
+                    server.records(job["object"], start, stop, attributes=False)
+                )
+            return self._send_json(
+                {"id": parts[6], "jobId": parts[4], "state": "Completed"}
+            )
+        self._send_json([{"errorCode": "NOT_FOUND"}], status=404)
+
+    def do_POST(self):
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+        body = self._read_body()
+        server = self.server
+        # Create a Bulk API 2.0 query job: /services/data/vXX.X/jobs/query
+        if parts[:2] == ["services", "data"] and parts[3:] == ["jobs", "query"]:
+            request = json.loads(body)
+            job_id = f"750{uuid.uuid4().hex[:15]}"
+            server.jobs[job_id] = {
+                "object": _FROM.search(request["query"]).group(1)
+            }
+            return self._send_json({"id": job_id, "state": "UploadComplete"})
+        if parts[:2] != ["services", "async"]:
+            return self._send_json([{"errorCode": "NOT_FOUND"}], status=404)
+        # Create a job: /services/async/XX.X/job
+        if parts[3:] == ["job"]:
+            request = json.loads(body)
+            job_id = f"750{uuid.uuid4().hex[:15]}"
+            server.jobs[job_id] = {"object": request["object"], "results": []}
+            return self._send_json(
+                {"id": job_id, "object": request["object"], "state": "Open"}
+            )
+        job = server.jobs[parts[4]]
+        # Add the query batch: /services/async/XX.X/job/<job>/batch
+        if parts[5:] == ["batch"]:
+            job["results"] = [
+                str(start)
+                for start in range(0, server.record_count, BULK_RESULT_SIZE)
+            ]
+            return self._send_json(
+                {"id": f"751{uuid.uuid4().hex[:15]}", "jobId": parts[4]}
+            )
+        # Close the job: /services/async/XX.X/job/<job>
+        self._send_json({"id": parts[4], "state": "Closed"})
+
+
+class FakeSalesforce(ThreadingHTTPServer):
+    """
+    Serves ``record_count`` records of ``extra_fields`` text fields of
+    ``field_size`` characters for any object, whatever the SOQL query:
+
+    - describe of any object, answering 304 to If-Modified-Since requests
+    - REST query, in pages of QUERY_PAGE_SIZE records linked by nextRecordsUrl,
+      filtered on "SystemModStamp > <datetime>Z" if present
+    - Bulk API 1.0 query jobs in JSON, completed as soon as they are created
+    - Bulk API 2.0 query jobs, completed as soon as they are created, with
+      CSV result pages linked by locators
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        record_count: int,
+        extra_fields: int = 10,
+        field_size: int = 32,
+        cert_file: str = None,
+        key_file: str = None,
+    ) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.record_count = record_count
+        self.extra_fields = extra_fields
+        self.field_size = field_size
+        self.jobs = {}
+        self.describe_count = 0
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert_file, key_file)
+        self.socket = context.wrap_socket(self.socket, server_side=True)
+        self._thread = None
+
+    @property
+    def instance(self) -> str:
+        """host:port to use as the Salesforce instance."""
+        return f"127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "FakeSalesforce":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def describe(self, object_name: str) -> dict:
+        return {
+            "name": object_name,
+            "fields": salesforce_fields(self.extra_fields),
+        }
+
+    def records(
+        self, object_name: str, start: int, stop: int, attributes: bool = True
+    ) -> list:
+        records = []
+        for index in range(start, stop):
+            record = salesforce_record(
+                index, object_name, self.extra_fields, self.field_size
+            )
+            if not attributes:
+                record["attributes"] = {"type": object_name}
+            records.append(record)
+        return records
+
+    def csv_page(self, object_name: str, start: int, stop: int) -> str:
+        names = [
+            field["name"] for field in salesforce_fields(self.extra_fields)
+        ]
+        page = io.StringIO()
+        writer = csv.writer(page, lineterminator="\n")
+        writer.writerow(names)
+        for index in range(start, stop):
+            record = salesforce_record(
+                index, object_name, self.extra_fields, self.field_size
+            )
+            writer.writerow(
+                str(value).lower() if isinstance(value, bool) else value
+                for value in (record[name] for name in names)
+            )
+        return page.getvalue()
+
+    def query_page(self, path: str, object_name: str, offset: int) -> dict:
+        stop = min(offset + QUERY_PAGE_SIZE, self.record_count)
+        page = {
+            "totalSize": self.record_count,
+            "done": stop >= self.record_count,
+            "records": self.records(object_name, offset, stop),
+        }
+        if not page["done"]:
+            base = path.split("/query/")[0]
+            page["nextRecordsUrl"] = f"{base}/query/{object_name}-{stop}"
+        return page
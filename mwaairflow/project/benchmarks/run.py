@@ -0,0 +1,698 @@
+#
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+
+"""
+Offline benchmarks of the transfer operators of the MWAA plugins.
+
+Every scenario runs an operator against local services seeded with a
+synthetic dataset: a moto S3 server (or any S3-compatible endpoint), Azurite
+for Azure Blob Storage and a fake Salesforce REST/Bulk API server. Each run
+happens in a fresh process, so that its peak RSS is measured on its own.
+Results are written as JSON with the commit they were measured on; compare
+two of them with --compare to spot regressions.
+
+Absolute numbers say little about MWAA in AWS: the local services are the
+bottleneck of some scenarios. Compare runs made on the same machine.
+
+Usage (see "make benchmark" in the project Makefile):
+
+    python benchmarks/run.py --plugins-dir ../assets/plugins \\
+        --output benchmark-results.json [--scenario NAME ...] [--scale 0.1] \\
+        [--repeat 3] [--compare baseline.json] [--max-regression 10]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import queue
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datasets import blob_payload, blob_specs  # noqa: E402
+
+AZURITE_CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq"
+    "/K1SZFPTOtr/KBHBeksoGMGw==;"
+    "BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;"
+)
+MIB = 1024 * 1024
+
+# Built-in scenarios. "dataset" describes the synthetic source data and
+# "operator" the keyword arguments of the operator under test. More can be
+# added with --scenarios-file, a JSON object of the same shape.
+SCENARIOS = {
+    "azure_small_serial": {
+        "kind": "azure",
+        "dataset": {"blobs": 2000, "blob_size": 16 * 1024, "spread": 1.0},
+        "operator": {"max_concurrency": 1},
+    },
+    "azure_small_concurrent": {
+        "kind": "azure",
+        "dataset": {"blobs": 2000, "blob_size": 16 * 1024, "spread": 1.0},
+        "operator": {"max_concurrency": 16},
+    },
+    "azure_small_bundled": {
+        "kind": "azure",
+        "dataset": {"blobs": 2000, "blob_size": 16 * 1024, "spread": 1.0},
+        "operator": {"max_concurrency": 16, "bundle_threshold": MIB},
+    },
+    "azure_large_streaming": {
+        "kind": "azure",
+        "dataset": {"blobs": 8, "blob_size": 32 * MIB},
+        "operator": {"max_concurrency": 4, "streaming": True},
+    },
+    "azure_large_ranged": {
+        "kind": "azure",
+        "dataset": {"blobs": 8, "blob_size": 32 * MIB},
+        "operator": {"max_concurrency": 2, "large_blob_threshold": 16 * MIB},
+    },
+    "azure_large_gzip": {
+        "kind": "azure",
+        "dataset": {"blobs": 8, "blob_size": 32 * MIB},
+        "operator": {"max_concurrency": 4, "compression": "gzip"},
+    },
+    "salesforce_rest_csv": {
+        "kind": "salesforce",
+        "dataset": {"records": 50000, "extra_fields": 10, "field_size": 32},
+        "operator": {"fmt": "csv"},
+    },
+    "salesforce_rest_ndjson": {
+        "kind": "salesforce",
+        "dataset": {"records": 50000, "extra_fields": 10, "field_size": 32},
+        "operator": {"fmt": "ndjson"},
+    },
+    "salesforce_rest_streaming": {
+        "kind": "salesforce",
+        "dataset": {"records": 50000, "extra_fields": 10, "field_size": 32},
+        "operator": {"fmt": "csv", "streaming": True},
+    },
+    "salesforce_rest_parquet": {
+        "kind": "salesforce",
+        "dataset": {"records": 50000, "extra_fields": 10, "field_size": 32},
+        "operator": {"fmt": "parquet", "streaming": True},
+    },
+    "salesforce_bulk": {
+        "kind": "salesforce_bulk",
+        "dataset": {"records": 100000, "extra_fields": 10, "field_size": 32},
+        "operator": {},
+    },
+    "salesforce_bulk2": {
+        "kind": "salesforce_bulk",
+        "dataset": {"records": 100000, "extra_fields": 10, "field_size": 32},
+        "operator": {
+            "bulk_api": "2.0",
+            "page_size": 10000,
+            "max_concurrency": 4,
+            "s3_key": "transfer/account",
+        },
+    },
+    "salesforce_bulk2_parquet": {
+        "kind": "salesforce_bulk",
+        "dataset": {"records": 100000, "extra_fields": 10, "field_size": 32},
+        "operator": {
+            "bulk_api": "2.0",
+            "fmt": "parquet",
+            "page_size": 10000,
+            "max_concurrency": 4,
+            "s3_key": "transfer/account",
+        },
+    },
+}
+
+# Dataset sizes multiplied by --scale.
+_SCALED = ("blobs", "records")
+
+# Throughput metrics compared by --compare; higher is better.
+_THROUGHPUT = ("objects_per_sec", "mb_per_sec", "records_per_sec")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ("git",) + args,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _scaled(dataset: dict, scale: float) -> dict:
+    return {
+        name: max(1, int(value * scale)) if name in _SCALED else value
+        for name, value in dataset.items()
+    }
+
+
+class Services:
+    """Local S3, Azure Blob Storage and Salesforce endpoints of a run."""
+
+    def __init__(self, args: argparse.Namespace, workdir: str) -> None:
+        self.workdir = workdir
+        self.azure_connection_string = args.azure_connection_string
+        self.s3_endpoint = args.s3_endpoint
+        self._moto = None
+        self._salesforce = None
+        self._cert_file = self._key_file = None
+        self._azure = None
+        self._azure_error = None
+
+    def __enter__(self) -> "Services":
+        import boto3
+
+        if not self.s3_endpoint:
+            from moto.server import ThreadedMotoServer
+
+            # Do not log every request.
+            logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+            port = _free_port()
+            self._moto = ThreadedMotoServer(
+                ip_address="127.0.0.1", port=port, verbose=False
+            )
+            self._moto.start()
+            self.s3_endpoint = f"http://127.0.0.1:{port}"
+        self.s3 = boto3.client(
+            "s3",
+            endpoint_url=self.s3_endpoint,
+            region_name="us-east-1",
+            aws_access_key_id="benchmark",
+            aws_secret_access_key="benchmark",
+        )
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._salesforce is not None:
+            self._salesforce.stop()
+        if self._moto is not None:
+            self._moto.stop()
+
+    def azure(self):
+        """Azure Blob Storage client, or None when Azurite is not running."""
+        if self._azure is None and self._azure_error is None:
+            from azure.storage.blob import BlobServiceClient
+
+            probe = BlobServiceClient.from_connection_string(
+                self.azure_connection_string,
+                retry_total=0,
+                connection_timeout=2,
+            )
+            try:
+                probe.get_service_properties(timeout=5)
+            except Exception as e:
+                self._azure_error = e
+                print(
+                    f"Azure Blob Storage is not reachable: {e}", file=sys.stderr
+                )
+                return None
+            self._azure = BlobServiceClient.from_connection_string(
+                self.azure_connection_string
+            )
+        return self._azure
+
+    def salesforce(self, dataset: dict):
+        from fake_salesforce import FakeSalesforce, create_certificate
+
+        if self._cert_file is None:
+            self._cert_file, self._key_file = create_certificate(self.workdir)
+        if self._salesforce is not None:
+            self._salesforce.stop()
+        self._salesforce = FakeSalesforce(
+            dataset["records"],
+            extra_fields=dataset.get("extra_fields", 10),
+            field_size=dataset.get("field_size", 32),
+            cert_file=self._cert_file,
+            key_file=self._key_file,
+        ).start()
+        return self._salesforce
+
+    def create_bucket(self) -> str:
+        bucket_name = f"benchmark-{uuid.uuid4().hex[:12]}"
+        self.s3.create_bucket(Bucket=bucket_name)
+        return bucket_name
+
+    def s3_usage(self, bucket_name: str) -> tuple:
+        objects = size = 0
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket_name):
+            for item in page.get("Contents", []):
+                objects += 1
+                size += item["Size"]
+        return objects, size
+
+    def environment(self) -> Dict[str, str]:
+        """Environment of the operator processes: Airflow connections."""
+        environment = {
+            "AIRFLOW_CONN_AWS_DEFAULT": json.dumps(
+                {
+                    "conn_type": "aws",
+                    "login": "benchmark",
+                    "password": "benchmark",
+                    "extra": {
+                        "region_name": "us-east-1",
+                        "endpoint_url": self.s3_endpoint,
+                    },
+                }
+            ),
+            "AIRFLOW_CONN_WASB_DEFAULT": json.dumps(
+                {
+                    "conn_type": "wasb",
+                    "extra": {
+                        "extra__wasb__connection_string": (
+                            self.azure_connection_string
+                        )
+                    },
+                }
+            ),
+            "AIRFLOW_CONN_SALESFORCE_DEFAULT": json.dumps(
+                {
+                    "conn_type": "salesforce",
+                    "login": "benchmark",
+                    "password": "benchmark",
+                    "extra": {
+                        "extra__salesforce__security_token": "benchmark",
+                        "extra__salesforce__version": "52.0",
+                    },
+                }
+            ),
+        }
+        if self._cert_file is not None:
+            environment["REQUESTS_CA_BUNDLE"] = self._cert_file
+        if self._salesforce is not None:
+            environment["BENCHMARK_SALESFORCE_INSTANCE"] = (
+                self._salesforce.instance
+            )
+            # Tells sessions cached by the operators apart across servers.
+            connection = json.loads(
+                environment["AIRFLOW_CONN_SALESFORCE_DEFAULT"]
+            )
+            connection["host"] = f"https://{self._salesforce.instance}"
+            environment["AIRFLOW_CONN_SALESFORCE_DEFAULT"] = json.dumps(
+                connection
+            )
+        return environment
+
+
+def seed_azure(client, dataset: dict, workdir: str) -> tuple:
+    """
+    Uploads the blobs of ``dataset`` to a container named after it, unless
+    a previous run already did, and writes the path,key,size manifest.
+    Returns the container name, the manifest path and the dataset size.
+    """
+    specs = blob_specs(
+        dataset["blobs"],
+        dataset["blob_size"],
+        dataset.get("spread", 0.0),
+        dataset.get("seed", 0),
+    )
+    digest = hashlib.sha1(
+        json.dumps(dataset, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    container_name = f"benchmark-{digest[:12]}"
+    container = client.get_container_client(container_name)
+    if not container.exists():
+        container.create_container()
+    if container.get_container_properties().metadata.get("seeded") != "true":
+
+        def upload(spec):
+            container.upload_blob(
+                spec.name,
+                blob_payload(
+                    spec, dataset.get("content", "text"), dataset.get("seed", 0)
+                ),
+                overwrite=True,
+            )
+
+        print(f"Seeding {len(specs)} blobs in container {container_name}...")
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(upload, specs))
+        container.set_container_metadata({"seeded": "true"})
+
+    manifest = os.path.join(workdir, f"{container_name}.csv")
+    with open(manifest, "w") as f:
+        for spec in specs:
+            f.write(f"{spec.name},{spec.name},{spec.size}\n")
+    return container_name, manifest, sum(spec.size for spec in specs)
+
+
+def _build_operator(kind: str, name: str, params: dict):
+    """Operator of the scenario. Its "operator" arguments override these."""
+    if kind == "azure":
+        from operators.azure_blob_list_to_s3 import (
+            AzureBlobStorageListToS3Operator as operator_class,
+        )
+
+        arguments = {
+            "blob_list_path_file": params["manifest"],
+            "container_name": params["container_name"],
+            "bucket_name": params["bucket_name"],
+            "s3_prefix": "transfer/",
+            "replace": True,
+        }
+    elif kind == "salesforce":
+        from operators.salesforce_to_s3_operator import (
+            SalesforceToS3Operator as operator_class,
+        )
+
+        arguments = {
+            "sf_conn_id": "salesforce_default",
+            "sf_obj": "Account",
+            "s3_conn_id": "aws_default",
+            "s3_bucket": params["bucket_name"],
+            "s3_key": "transfer/account",
+        }
+    elif kind == "salesforce_bulk":
+        from operators.salesforce_to_s3_operator import (
+            SalesforceBulkQueryToS3Operator as operator_class,
+        )
+
+        arguments = {
+            "sf_conn_id": "salesforce_default",
+            "soql": "SELECT Id, Name, SystemModstamp FROM Account",
+            "object_type": "Account",
+            "s3_conn_id": "aws_default",
+            "s3_bucket": params["bucket_name"],
+            "s3_key": "transfer/account.ndjson",
+        }
+    else:
+        raise ValueError(f"Unknown scenario kind: {kind}")
+    arguments.update(params["operator"])
+    return operator_class(task_id=name, **arguments)
+
+
+def _max_rss_mb() -> float:
+    import resource
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return max_rss / (MIB if sys.platform == "darwin" else 1024)
+
+
+def _run_operator(kind, name, params, environment, plugins_dir, results):
+    """Runs in a fresh process: imports and executes the operator."""
+    try:
+        os.environ.update(environment)
+        sys.path.insert(0, plugins_dir)
+        if kind.startswith("salesforce"):
+            # The fake server accepts any session: skip the SOAP login,
+            # whose endpoint cannot be redirected to it. Session IDs start
+            # with the ID of the org.
+            import simple_salesforce.api
+
+            instance = environment["BENCHMARK_SALESFORCE_INSTANCE"]
+            simple_salesforce.api.SalesforceLogin = lambda **kwargs: (
+                "00D000000000001!benchmark-session",
+                instance,
+            )
+        operator = _build_operator(kind, name, params)
+        rss_before = _max_rss_mb()
+        cpu_before = os.times()
+        start = time.perf_counter()
+        operator.execute(context={})
+        seconds = time.perf_counter() - start
+        cpu_after = os.times()
+        results.put(
+            {
+                "seconds": seconds,
+                "cpu_seconds": (cpu_after.user + cpu_after.system)
+                - (cpu_before.user + cpu_before.system),
+                "rss_before_mb": rss_before,
+                "peak_rss_mb": _max_rss_mb(),
+            }
+        )
+    except BaseException:
+        results.put({"error": traceback.format_exc()})
+
+
+def _wait_result(process, results) -> dict:
+    """Result sent by the operator process, or an error if it died first."""
+    while True:
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            if not process.is_alive():
+                try:
+                    return results.get_nowait()
+                except queue.Empty:
+                    # Ex: killed by the OOM killer, exit code -9.
+                    return {
+                        "error": f"Operator process exited with code "
+                        f"{process.exitcode}"
+                    }
+
+
+def run_scenario(
+    services: Services, name: str, scenario: dict, args: argparse.Namespace
+) -> dict:
+    kind = scenario["kind"]
+    dataset = _scaled(scenario["dataset"], args.scale)
+    params = {"operator": scenario.get("operator", {})}
+    result = {"kind": kind, "dataset": dataset, "operator": params["operator"]}
+    if kind == "azure":
+        client = services.azure()
+        if client is None:
+            return dict(result, skipped="Azure Blob Storage is not reachable")
+        container_name, manifest, input_bytes = seed_azure(
+            client, dataset, services.workdir
+        )
+        params.update(container_name=container_name, manifest=manifest)
+        records = dataset["blobs"]
+    else:
+        services.salesforce(dataset)
+        input_bytes = None
+        records = dataset["records"]
+
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(args.repeat):
+        params["bucket_name"] = services.create_bucket()
+        results = context.Queue()
+        process = context.Process(
+            target=_run_operator,
+            args=(
+                kind,
+                name,
+                params,
+                dict(services.environment(), **args.environment),
+                os.path.abspath(args.plugins_dir),
+                results,
+            ),
+        )
+        process.start()
+        run = _wait_result(process, results)
+        process.join()
+        if "error" in run:
+            print(run["error"], file=sys.stderr)
+            return dict(result, error=run["error"].strip().splitlines()[-1])
+        run["objects"], run["output_bytes"] = services.s3_usage(
+            params["bucket_name"]
+        )
+        runs.append(run)
+
+    # The median run by duration stands for the scenario.
+    run = sorted(runs, key=lambda r: r["seconds"])[len(runs) // 2]
+    seconds = run["seconds"]
+    # Source bytes for Azure, bytes written to S3 for Salesforce.
+    size = input_bytes if input_bytes is not None else run["output_bytes"]
+    result.update(
+        seconds=round(seconds, 3),
+        seconds_all=[round(r["seconds"], 3) for r in runs],
+        cpu_seconds=round(run["cpu_seconds"], 3),
+        objects=run["objects"],
+        records=records,
+        input_bytes=input_bytes,
+        output_bytes=run["output_bytes"],
+        objects_per_sec=round(run["objects"] / seconds, 2),
+        mb_per_sec=round(size / MIB / seconds, 2),
+        records_per_sec=round(records / seconds, 2),
+        rss_before_mb=round(run["rss_before_mb"], 1),
+        peak_rss_mb=round(max(r["peak_rss_mb"] for r in runs), 1),
+    )
+    return result
+
+
+def compare(
+    baseline: dict, current: dict, max_regression: Optional[float]
+) -> int:
+    """Prints the changes from ``baseline`` and returns the regression count."""
+    print(
+        f"\nCompared with {baseline.get('commit') or 'baseline'} "
+        f"({baseline.get('timestamp')}):"
+    )
+    regressions = 0
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before or "seconds" not in before or "seconds" not in result:
+            continue
+        changes = []
+        for metric in _THROUGHPUT + ("peak_rss_mb",):
+            if not before.get(metric):
+                continue
+            change = (result[metric] - before[metric]) / before[metric] * 100
+            changes.append(
+                f"{metric} {before[metric]} -> {result[metric]} ({change:+.1f}%)"
+            )
+            if (
+                max_regression is not None
+                and metric in _THROUGHPUT
+                and change < -max_regression
+            ):
+                regressions += 1
+        print(f"  {name}: " + ", ".join(changes))
+    if regressions:
+        print(f"{regressions} throughput regressions above {max_regression}%")
+    return regressions
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--plugins-dir",
+        default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "../../assets/plugins"
+        ),
+        help="Directory of the MWAA plugins under test",
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        help="Scenario to run, repeatable. Default: all",
+    )
+    parser.add_argument(
+        "--scenarios-file", help="JSON file of additional scenarios"
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="List the scenarios and exit"
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Multiplies the number of blobs and records of the datasets",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Runs per scenario, median kept"
+    )
+    parser.add_argument("--output", help="JSON file the results are written to")
+    parser.add_argument("--compare", help="JSON results to compare with")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        help="Exit with an error if a throughput drops by more than this %%",
+    )
+    parser.add_argument(
+        "--s3-endpoint",
+        help="S3-compatible endpoint to use instead of a local moto server",
+    )
+    parser.add_argument(
+        "--azure-connection-string",
+        default=os.environ.get(
+            "AZURE_STORAGE_CONNECTION_STRING", AZURITE_CONNECTION_STRING
+        ),
+        help="Azure Blob Storage connection string. Default: local Azurite",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="Show the operator logs"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = _parse_args(argv)
+    scenarios = dict(SCENARIOS)
+    if args.scenarios_file:
+        with open(args.scenarios_file) as f:
+            scenarios.update(json.load(f))
+    if args.list:
+        for name, scenario in scenarios.items():
+            print(f"{name}: {json.dumps(scenario)}")
+        return 0
+    names = args.scenario or list(scenarios)
+    unknown = set(names) - set(scenarios)
+    if unknown:
+        print(
+            f"Unknown scenarios: {', '.join(sorted(unknown))}", file=sys.stderr
+        )
+        return 2
+
+    with tempfile.TemporaryDirectory(prefix="mwaa-benchmark-") as workdir:
+        args.environment = {
+            "AIRFLOW_HOME": os.path.join(workdir, "airflow"),
+            "AIRFLOW__CORE__LOAD_EXAMPLES": "False",
+            "AIRFLOW__LOGGING__LOGGING_LEVEL": (
+                "INFO" if args.verbose else "WARNING"
+            ),
+        }
+        report = {
+            "commit": _git("rev-parse", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--", ".")),
+            "timestamp": datetime.now(timezone.utc).isoformat(
+                timespec="seconds"
+            ),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "scale": args.scale,
+            "repeat": args.repeat,
+            "scenarios": {},
+        }
+        with Services(args, workdir) as services:
+            for name in names:
+                print(f"Running {name}...")
+                result = run_scenario(services, name, scenarios[name], args)
+                report["scenarios"][name] = result
+                if "seconds" in result:
+                    print(
+                        f"  {result['seconds']} s, "
+                        f"{result['objects_per_sec']} objects/s, "
+                        f"{result['mb_per_sec']} MB/s, "
+                        f"{result['records_per_sec']} records/s, "
+                        f"peak RSS {result['peak_rss_mb']} MB"
+                    )
+                else:
+                    print(f"  {result.get('skipped') or result.get('error')}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    failed = [
+        name
+        for name, result in report["scenarios"].items()
+        if "error" in result
+    ]
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.max_regression)
+        if regressions:
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
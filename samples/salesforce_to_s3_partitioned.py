@@ -0,0 +1,76 @@
+# a Dag using the SalesforcePartitionPlannerOperator to extract the last 6 months of the SalesForce Opportunity Object
+# in partitions of similar sizes, extracted by dynamically mapped SalesForceToS3 tasks
+# Prerequisites :
+# - an S3 bucket as target
+# - a Salesforce account
+# - create an Airflow Aws connection with name "aws_connection"
+# - create an Airflow HTTP/Salesforce connection with name "salesforce_connection"
+# - create an Airflow Variable "bucket_name" with the name of the S3 bucket as value
+
+from datetime import timedelta
+
+from airflow import DAG
+from airflow.utils.dates import days_ago
+from airflow.models import Variable
+from operators.salesforce_partition_planner import SalesforcePartitionPlannerOperator
+from operators.salesforce_to_s3_operator import SalesforceToS3Operator
+
+
+# These args will get passed on to each operator
+# You can override them on a per-task basis during operator initialization
+default_args = {
+    "owner": "user@example.com",
+    "depends_on_past": False,
+    "is_paused_upon_creation": True,
+    "start_date": days_ago(1),
+    "retries": 1,
+    "retry_delay": timedelta(minutes=2),
+}
+
+
+# Definition of the dag
+salesforce_to_s3_partitioned_dag = DAG(
+    "salesforce_to_s3_partitioned",
+    default_args=default_args,
+    description="Ingest SalesForce Opportunities to S3 in balanced partitions",
+    schedule_interval=timedelta(days=1),
+    catchup=False,
+)
+
+
+# Definition of variables that will be used by the operators : exec date, date range, Saleforce object and fields
+exec_date = "{{ execution_date }}"
+from_date = "{{ macros.ds_add(ds, -180) }}T00:00:00Z"
+to_date = "{{ ds }}T00:00:00Z"
+
+# name of the Salesforce objet to import
+table = "Opportunity"
+# list of the Salesforce field to import
+fields = ["id", "isdeleted", "accountid", "name", "stagename", "amount"]
+# number of partitions aimed at, usually the number of workers
+nb_partitions = 6
+
+
+# Operator splitting the date range into partitions holding similar numbers of records
+plan_partitions = SalesforcePartitionPlannerOperator(
+    task_id=f"plan_{table}_partitions",
+    sf_conn_id="salesforce_connection",
+    sf_obj=table,
+    partition_count=nb_partitions,
+    from_date=from_date,
+    to_date=to_date,
+    dag=salesforce_to_s3_partitioned_dag,
+)
+
+# One SalesForcetoS3 task per partition
+salesforce_to_s3 = SalesforceToS3Operator.partial(
+    task_id=f"{table}_to_S3",
+    sf_conn_id="salesforce_connection",
+    sf_obj=table,
+    sf_fields=fields,
+    fmt="csv",
+    s3_conn_id="aws_connection",
+    s3_bucket=Variable.get("bucket_name"),
+    s3_key=f"{table.lower()}/raw/dt={exec_date}/{table.lower()}_part_{{{{ ti.map_index }}}}.csv",
+    dag=salesforce_to_s3_partitioned_dag,
+).expand_kwargs(plan_partitions.output)
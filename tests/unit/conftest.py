@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The plugins are imported by Airflow as top-level packages: operators...
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(__file__), "..", "..", "mwaairflow", "assets", "plugins"
+    ),
+)
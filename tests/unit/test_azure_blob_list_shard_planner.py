@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+pytest.importorskip("airflow")
+
+from operators.azure_blob_list_shard_planner import plan_shards
+from operators.blob_manifest import BlobEntry
+
+
+def make_entries(sizes):
+    return [BlobEntry(f"blob-{i}", f"key-{i}", size) for i, size in enumerate(sizes)]
+
+
+def test_every_blob_is_in_exactly_one_shard():
+    entries = make_entries(random.Random(0).randint(0, 10**9) for _ in range(1000))
+    shards = plan_shards(entries, 7)
+    assert len(shards) == 7
+    planned = [entry for shard in shards for entry in shard]
+    assert sorted(planned) == sorted(entries)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_shards_are_balanced_by_bytes(seed):
+    rng = random.Random(seed)
+    # Heavy-tailed sizes, as in real containers.
+    entries = make_entries(int(rng.paretovariate(1.2) * 1000) for _ in range(5000))
+    shards = plan_shards(entries, 16)
+    totals = [sum(entry.size for entry in shard) for shard in shards]
+    # Each blob went to the smallest shard, so no shard exceeds the smallest
+    # one by more than the largest blob.
+    assert max(totals) - min(totals) <= max(entry.size for entry in entries)
+
+
+def test_largest_blobs_are_spread_first():
+    shards = plan_shards(make_entries([10, 9, 8, 1, 1, 1]), 3)
+    assert sorted(sum(entry.size for entry in shard) for shard in shards) == [
+        10,
+        10,
+        10,
+    ]
+
+
+def test_empty_blobs_are_spread_by_count():
+    shards = plan_shards(make_entries([0] * 9), 3)
+    assert [len(shard) for shard in shards] == [3, 3, 3]
+
+
+def test_empty_shards_are_dropped():
+    entries = make_entries([5, 3])
+    assert plan_shards(entries, 4) == [[entries[0]], [entries[1]]]
+    assert plan_shards([], 4) == []
@@ -0,0 +1,123 @@
+import csv
+import io
+import tarfile
+
+import boto3
+import pytest
+
+pytest.importorskip("moto")
+
+try:
+    from moto import mock_aws
+except ImportError:
+    from moto import mock_s3 as mock_aws
+
+from operators.blob_bundle import BlobBundleWriter
+
+BUCKET = "mwaa-bundle-test"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def read_object(s3, key):
+    return s3.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+
+
+def read_index(s3, key):
+    rows = csv.reader(io.StringIO(read_object(s3, f"{key}.index.csv").decode()))
+    return [(member_key, int(offset), int(size)) for member_key, offset, size in rows]
+
+
+MEMBERS = {
+    "short.csv": b"a,b\n1,2\n",
+    "empty.txt": b"",
+    # Longer than the 100 bytes of a ustar name: stored in a PAX header,
+    # which shifts the data of the member.
+    "dir/" + "x" * 150 + "/long.json": b'{"k": 1}' * 100,
+    'unicodé/données, "quoted".bin': bytes(range(256)) * 3,
+    "block.bin": b"\0" * tarfile.BLOCKSIZE,
+}
+
+
+def test_index_offsets_point_at_member_data(s3):
+    bundled = []
+    writer = BlobBundleWriter(
+        s3,
+        BUCKET,
+        "bundles/",
+        max_bundle_size=10 * 1024 * 1024,
+        on_bundle=bundled.extend,
+    )
+    for key, data in MEMBERS.items():
+        writer.add(f"blob/{key}", key, data, etag="0x1")
+    assert writer.close() == ["bundles/00000.tar"]
+
+    archive = read_object(s3, "bundles/00000.tar")
+    index = read_index(s3, "bundles/00000.tar")
+    assert [key for key, _, _ in index] == list(MEMBERS)
+    for key, offset, size in index:
+        assert archive[offset : offset + size] == MEMBERS[key]
+
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        assert {m.name: tar.extractfile(m).read() for m in tar} == MEMBERS
+    assert [(m.blob_name, m.key, m.etag) for m in bundled] == [
+        (f"blob/{key}", key, "0x1") for key in MEMBERS
+    ]
+    assert [(m.key, m.offset, m.size) for m in bundled] == index
+
+
+def test_ranged_get_reads_a_single_member(s3):
+    writer = BlobBundleWriter(s3, BUCKET, "bundles/", max_bundle_size=10**7)
+    for key, data in MEMBERS.items():
+        writer.add(key, key, data)
+    writer.close()
+    for key, offset, size in read_index(s3, "bundles/00000.tar"):
+        if size:
+            response = s3.get_object(
+                Bucket=BUCKET,
+                Key="bundles/00000.tar",
+                Range=f"bytes={offset}-{offset + size - 1}",
+            )
+            assert response["Body"].read() == MEMBERS[key]
+
+
+def test_new_bundle_when_full(s3):
+    bundles = []
+    writer = BlobBundleWriter(
+        s3, BUCKET, "b/", max_bundle_size=8 * 1024, on_bundle=bundles.append
+    )
+    members = {f"{i}.bin": bytes([i]) * 3000 for i in range(5)}
+    for key, data in members.items():
+        writer.add(key, key, data)
+    keys = writer.close()
+    # Two members of 3 KiB and their headers fill 8 KiB with the end of archive.
+    assert [len(bundle) for bundle in bundles] == [2, 2, 1]
+    assert [len(read_index(s3, key)) for key in keys] == [2, 2, 1]
+    found = {}
+    for key in keys:
+        archive = read_object(s3, key)
+        for member_key, offset, size in read_index(s3, key):
+            found[member_key] = archive[offset : offset + size]
+    assert found == members
+
+
+def test_member_larger_than_bundle_gets_its_own(s3):
+    writer = BlobBundleWriter(s3, BUCKET, "b/", max_bundle_size=1024)
+    writer.add("big", "big", b"x" * 4096)
+    writer.add("small", "small", b"y")
+    assert writer.close() == ["b/00000.tar", "b/00001.tar"]
+    key, offset, size = read_index(s3, "b/00000.tar")[0]
+    assert read_object(s3, "b/00000.tar")[offset : offset + size] == b"x" * 4096
+
+
+def test_close_without_members_writes_nothing(s3):
+    assert BlobBundleWriter(s3, BUCKET, "b/", max_bundle_size=1024).close() == []
+    assert s3.list_objects_v2(Bucket=BUCKET)["KeyCount"] == 0
@@ -0,0 +1,157 @@
+import io
+import json
+import types
+
+import boto3
+import pytest
+
+pytest.importorskip("airflow")
+
+from operators.blob_manifest import BlobEntry, format_blob_line, read_blob_manifest
+from operators.compression import ParallelCompressor
+
+ENTRIES = [
+    BlobEntry("plain.csv", "raw/plain.csv", 10),
+    BlobEntry("with, comma.csv", "raw/with, comma.csv", 0),
+    BlobEntry('with "quotes".csv', 'raw/with "quotes".csv', 1),
+    BlobEntry("with\nnewline.csv", "raw/with\nnewline.csv", 2),
+    BlobEntry("unicodé.csv", "raw/unicodé.csv", 3),
+] + [BlobEntry(f"dir/{i}.bin", f"raw/dir/{i}.bin", i * 1000) for i in range(2000)]
+
+
+def csv_manifest():
+    return "".join(format_blob_line(entry) for entry in ENTRIES).encode("utf-8")
+
+
+def ndjson_manifest():
+    lines = [
+        json.dumps({"path": e.name, "key": e.key, "size": e.size}) + "\n"
+        for e in ENTRIES
+    ]
+    # Blank lines between the objects are skipped.
+    return "\n".join(lines).encode("utf-8")
+
+
+def compress(codec, data):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    sink = io.BytesIO()
+    # Small blocks so that the manifest spans many gzip members or zstd frames.
+    with ParallelCompressor(sink, codec, block_size=4096, max_workers=2) as out:
+        out.write(data)
+    return sink.getvalue()
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_csv_quoting_round_trip(tmp_path):
+    path = write(tmp_path, "manifest.csv", csv_manifest())
+    assert list(read_blob_manifest(path, s3_hook=None)) == ENTRIES
+
+
+def test_csv_skips_empty_lines(tmp_path):
+    path = write(tmp_path, "manifest.csv", b'a,b,1\n\n"c,d",e,2\n')
+    assert list(read_blob_manifest(path, s3_hook=None)) == [
+        BlobEntry("a", "b", 1),
+        BlobEntry("c,d", "e", 2),
+    ]
+
+
+def test_ndjson(tmp_path):
+    path = write(tmp_path, "manifest.ndjson", ndjson_manifest())
+    assert list(read_blob_manifest(path, s3_hook=None)) == ENTRIES
+
+
+@pytest.mark.parametrize(
+    "name, codec",
+    [
+        ("manifest.csv.gz", "gzip"),
+        ("manifest.csv.zst", "zstd"),
+        ("manifest.ndjson.gz", "gzip"),
+        ("manifest.jsonl.zstd", "zstd"),
+    ],
+)
+def test_multi_frame_compressed(tmp_path, name, codec):
+    data = (
+        ndjson_manifest() if ".ndjson" in name or ".jsonl" in name else csv_manifest()
+    )
+    path = write(tmp_path, name, compress(codec, data))
+    assert list(read_blob_manifest(path, s3_hook=None)) == ENTRIES
+
+
+def test_read_is_lazy(tmp_path):
+    path = write(tmp_path, "manifest.csv", csv_manifest())
+    entries = read_blob_manifest(path, s3_hook=None)
+    assert next(entries) == ENTRIES[0]
+    entries.close()
+
+
+def test_s3_manifest(monkeypatch):
+    pytest.importorskip("moto")
+    try:
+        from moto import mock_aws
+    except ImportError:
+        from moto import mock_s3 as mock_aws
+    from airflow.hooks.S3_hook import S3Hook
+
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="mwaa-manifest-test")
+        s3.put_object(
+            Bucket="mwaa-manifest-test",
+            Key="manifests/blobs.csv.gz",
+            Body=compress("gzip", csv_manifest()),
+        )
+        entries = read_blob_manifest(
+            "s3://mwaa-manifest-test/manifests/blobs.csv.gz", S3Hook()
+        )
+        assert list(entries) == ENTRIES
+
+
+def test_azure_parquet_manifest_uses_the_client_of_the_hook():
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    sink = io.BytesIO()
+    pq.write_table(
+        pa.table(
+            {
+                "path": [e.name for e in ENTRIES],
+                "key": [e.key for e in ENTRIES],
+                "size": [e.size for e in ENTRIES],
+            }
+        ),
+        sink,
+        row_group_size=500,
+    )
+    data = sink.getvalue()
+
+    class FakeBlobClient:
+        def get_blob_properties(self):
+            return types.SimpleNamespace(size=len(data))
+
+        def download_blob(self, offset, length):
+            return types.SimpleNamespace(readall=lambda: data[offset : offset + length])
+
+    class FakeServiceClient:
+        def get_blob_client(self, container, blob):
+            assert (container, blob) == ("manifests", "blobs.parquet")
+            return FakeBlobClient()
+
+    class FakeWasbHook:
+        blob_service_client = FakeServiceClient()
+
+        def get_conn(self):
+            raise AssertionError("a new BlobServiceClient was built")
+
+    entries = read_blob_manifest(
+        "wasb://manifests/blobs.parquet", s3_hook=None, azure_hook=FakeWasbHook()
+    )
+    assert list(entries) == ENTRIES
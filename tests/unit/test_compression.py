@@ -0,0 +1,78 @@
+import gzip
+import io
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("airflow")
+
+from operators.compression import ParallelCompressor
+
+
+def decompress(codec, data):
+    if codec == "gzip":
+        return gzip.decompress(data)
+    zstandard = pytest.importorskip("zstandard")
+    # Concatenated frames, as read by the zstd command line.
+    reader = zstandard.ZstdDecompressor().stream_reader(
+        io.BytesIO(data), read_across_frames=True
+    )
+    return reader.read()
+
+
+def make_payload(size):
+    rng = random.Random(size)
+    words = [b"azure", b"blob", b"s3", b"mwaa", b"\n", bytes(range(256))]
+    payload = bytearray()
+    while len(payload) < size:
+        payload += rng.choice(words)
+    return bytes(payload[:size])
+
+
+@pytest.fixture(params=["gzip", "zstd"])
+def codec(request):
+    if request.param == "zstd":
+        pytest.importorskip("zstandard")
+    return request.param
+
+
+@pytest.mark.parametrize(
+    "size, block_size",
+    [(0, 1024), (1, 1024), (1024, 1024), (1025, 1024), (100_000, 1000)],
+)
+def test_round_trip(codec, size, block_size):
+    payload = make_payload(size)
+    sink = io.BytesIO()
+    with ParallelCompressor(sink, codec, block_size=block_size, max_workers=3) as out:
+        # Writes that do not line up with the blocks.
+        for start in range(0, size, 777):
+            out.write(payload[start : start + 777])
+        assert out.tell() == size
+    assert decompress(codec, sink.getvalue()) == payload
+
+
+def test_blocks_are_written_in_order(codec):
+    payload = make_payload(200_000)
+    sink = io.BytesIO()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        compressor = ParallelCompressor(
+            sink, codec, block_size=997, max_workers=4, executor=executor
+        )
+        compressor.write(payload)
+        compressor.close()
+        # A shared pool is left running.
+        assert executor.submit(lambda: 1).result() == 1
+    assert decompress(codec, sink.getvalue()) == payload
+
+
+def test_write_after_close_fails():
+    compressor = ParallelCompressor(io.BytesIO(), "gzip")
+    compressor.close()
+    with pytest.raises(ValueError):
+        compressor.write(b"x")
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError, match="codec must be one of gzip, zstd"):
+        ParallelCompressor(io.BytesIO(), "lz4")
@@ -0,0 +1,39 @@
+import json
+import os
+
+from aws_cdk import core, aws_ec2 as ec2
+from mwaairflow.nested_stacks.environment import AirflowEnvironmentStack
+
+
+def get_template():
+    app = core.App()
+    stack = core.Stack(app, "mwaairflow")
+    AirflowEnvironmentStack(
+        stack,
+        "MWAAEnvStack",
+        vpc=ec2.Vpc(stack, "Vpc"),
+        subnet_ids_list="",
+        env_name="MwaaEnvironment",
+        env_tags="",
+        env_class="mw1.small",
+        max_workers=1,
+        access_mode="PUBLIC_ONLY",
+        secrets_backend=None,
+    )
+    assembly = app.synth()
+    for file_name in os.listdir(assembly.directory):
+        if file_name.endswith(".nested.template.json"):
+            with open(os.path.join(assembly.directory, file_name)) as template:
+                return json.dumps(json.load(template))
+
+
+def test_xcom_backend_configured():
+    template = get_template()
+    assert "xcom_backends.s3_xcom_backend.S3XComBackend" in template
+    assert "xcom_s3.bucket_name" in template
+
+
+def test_xcom_prefix_writable():
+    template = get_template()
+    assert "s3:PutObject" in template
+    assert "/xcom/*" in template
@@ -0,0 +1,71 @@
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+
+pytest.importorskip("moto")
+
+try:
+    from moto import mock_aws
+except ImportError:
+    from moto import mock_s3 as mock_aws
+
+from operators.s3_key_index import S3KeyIndex
+from operators.throttling import AdaptiveThrottle
+
+BUCKET = "mwaa-index-test"
+
+
+@pytest.fixture(scope="module")
+def s3():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+        monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+        with mock_aws():
+            client = boto3.client("s3", region_name="us-east-1")
+            client.create_bucket(Bucket=BUCKET)
+            for i in range(2500):
+                client.put_object(Bucket=BUCKET, Key=f"raw/{i}.csv", Body=b"x" * i)
+            client.put_object(Bucket=BUCKET, Key="other/0.csv", Body=b"")
+            yield client
+
+
+class SlowDownOnce:
+    """S3 client whose second ListObjectsV2 call is throttled."""
+
+    def __init__(self, client):
+        self._client = client
+        self.calls = 0
+
+    def list_objects_v2(self, **kwargs):
+        self.calls += 1
+        if self.calls == 2:
+            raise ClientError(
+                {"Error": {"Code": "SlowDown", "Message": "Reduce your request rate"}},
+                "ListObjectsV2",
+            )
+        return self._client.list_objects_v2(**kwargs)
+
+
+def test_index_of_every_page(s3):
+    index = S3KeyIndex.build(s3, BUCKET, "raw/", max_keys=10_000)
+    assert len(index) == 2500
+    size, etag = index.get("raw/2499.csv")
+    assert size == 2499
+    assert etag == s3.head_object(Bucket=BUCKET, Key="raw/2499.csv")["ETag"].strip('"')
+    assert index.get("raw/2500.csv") is None
+    assert index.get("other/0.csv") is None
+
+
+def test_too_many_keys(s3):
+    assert S3KeyIndex.build(s3, BUCKET, "raw/", max_keys=2000) is None
+    assert S3KeyIndex.build(s3, BUCKET, "raw/", max_keys=10_000, max_requests=2) is None
+    assert len(S3KeyIndex.build(s3, BUCKET, "raw/", 10_000, max_requests=3)) == 2500
+
+
+def test_throttled_pages_are_retried(s3):
+    client = SlowDownOnce(s3)
+    throttle = AdaptiveThrottle("Amazon S3", base_delay=0.01)
+    index = S3KeyIndex.build(throttle.wrap(client), BUCKET, "raw/", max_keys=10_000)
+    assert len(index) == 2500
+    # Three pages, and the retry of the throttled one.
+    assert client.calls == 4
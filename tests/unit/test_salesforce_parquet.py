@@ -0,0 +1,67 @@
+import io
+
+import pytest
+
+pytest.importorskip("airflow")
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from operators.salesforce_parquet import ParquetRecordWriter
+
+DESCRIBE = {
+    "fields": [
+        {"name": "Id", "type": "id"},
+        {"name": "NumberOfEmployees", "type": "int"},
+        {"name": "Visits__c", "type": "long"},
+        {"name": "AnnualRevenue", "type": "currency"},
+    ]
+}
+
+# Beyond the 53 bits of precision of a float.
+BIG = 2**53 + 1
+
+
+def write(records):
+    sink = io.BytesIO()
+    writer = ParquetRecordWriter(sink, describe=lambda name: DESCRIBE)
+    writer.write(records)
+    writer.close()
+    return pq.read_table(io.BytesIO(sink.getvalue()))
+
+
+def test_long_fields_are_integers():
+    # REST API records: values already typed.
+    table = write(
+        [
+            {"attributes": {"type": "Account"}, "Id": "1", "Visits__c": BIG},
+            {"attributes": {"type": "Account"}, "Id": "2", "Visits__c": None},
+        ]
+    )
+    assert table.schema.field("visits__c").type == pa.int64()
+    assert table.column("visits__c").to_pylist() == [BIG, None]
+
+
+def test_csv_integers_are_parsed_exactly():
+    # Rows of a Bulk API CSV result: every value is a string.
+    table = write(
+        [
+            {
+                "attributes": {"type": "Account"},
+                "Id": "1",
+                "NumberOfEmployees": "3.0",
+                "Visits__c": str(BIG),
+                "AnnualRevenue": "1.5",
+            },
+            {
+                "attributes": {"type": "Account"},
+                "Id": "2",
+                "NumberOfEmployees": "",
+                "Visits__c": "",
+                "AnnualRevenue": "",
+            },
+        ]
+    )
+    assert table.schema.field("numberofemployees").type == pa.int64()
+    assert table.column("numberofemployees").to_pylist() == [3, None]
+    assert table.column("visits__c").to_pylist() == [BIG, None]
+    assert table.column("annualrevenue").to_pylist() == [1.5, None]
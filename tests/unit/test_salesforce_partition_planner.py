@@ -0,0 +1,69 @@
+import bisect
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("airflow")
+
+from operators.salesforce_partition_planner import plan_partitions
+
+START = datetime(2021, 1, 1, tzinfo=timezone.utc)
+END = START + timedelta(days=180)
+
+
+def make_count(modstamps):
+    modstamps = sorted(modstamps)
+
+    def count(start, end):
+        return bisect.bisect_left(modstamps, end) - bisect.bisect_left(modstamps, start)
+
+    return count
+
+
+def uniform(records):
+    rng = random.Random(1)
+    span = (END - START).total_seconds()
+    return [START + timedelta(seconds=rng.uniform(0, span)) for _ in range(records)]
+
+
+def skewed(records):
+    # Most records modified in the last days, as after a mass update.
+    rng = random.Random(2)
+    span = (END - START).total_seconds()
+    return [
+        START + timedelta(seconds=span * rng.random() ** 0.125) for _ in range(records)
+    ]
+
+
+@pytest.mark.parametrize("modstamps", [uniform(100_000), skewed(100_000)])
+@pytest.mark.parametrize("partition_count", [1, 4, 6, 12])
+def test_partition_count_and_spread(modstamps, partition_count):
+    count = make_count(modstamps)
+    partitions = plan_partitions(count, START, END, partition_count)
+
+    assert len(partitions) == partition_count
+    share = len(modstamps) / partition_count
+    for start, end, records in partitions:
+        assert records == count(start, end)
+        assert 0.75 * share <= records <= 1.25 * share
+
+
+def test_partitions_are_consecutive():
+    count = make_count(skewed(50_000))
+    partitions = plan_partitions(count, START, END, 6)
+
+    assert partitions[0][0] == START
+    assert partitions[-1][1] == END
+    for previous, following in zip(partitions, partitions[1:]):
+        assert previous[1] == following[0]
+    assert sum(records for _, _, records in partitions) == 50_000
+
+
+def test_fewer_partitions_when_records_cannot_be_split():
+    # All the records modified within the same second.
+    count = make_count([START + timedelta(days=1)] * 1_000)
+    partitions = plan_partitions(count, START, END, 6)
+
+    assert len(partitions) < 6
+    assert sum(records for _, _, records in partitions) == 1_000
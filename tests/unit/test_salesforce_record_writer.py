@@ -0,0 +1,178 @@
+import io
+import time
+
+import pytest
+
+pytest.importorskip("airflow.providers.salesforce")
+
+from airflow.providers.salesforce.hooks.salesforce import SalesforceHook
+from operators.salesforce_record_writer import SalesforceRecordWriter
+
+DESCRIBE = {
+    "fields": [
+        {"name": "Id", "type": "id"},
+        {"name": "Name", "type": "string"},
+        {"name": "NumberOfEmployees", "type": "int"},
+        {"name": "AnnualRevenue", "type": "currency"},
+        {"name": "IsDeleted", "type": "boolean"},
+        {"name": "CreatedDate", "type": "datetime"},
+        {"name": "LastActivityDate", "type": "date"},
+    ]
+}
+
+
+class FakeHook(SalesforceHook):
+    def describe_object(self, obj):
+        return DESCRIBE
+
+
+def make_records(count):
+    records = []
+    for i in range(count):
+        records.append(
+            {
+                "attributes": {"type": "Account", "url": f"/sobjects/Account/{i}"},
+                "Id": f"001{i:015d}",
+                "Name": ["Acme, Inc.", 'The "Q"', "two\nlines", "crlf\r\nline", "é"][
+                    i % 5
+                ],
+                # Null in the last records only, so in some batches only.
+                "NumberOfEmployees": None if i > count - 3 else i * 10,
+                # Null in every record of the first batches.
+                "AnnualRevenue": None if i < 250 else i * 1.5,
+                "IsDeleted": i % 2 == 0,
+                "CreatedDate": f"2021-01-{i % 28 + 1:02d}T10:00:00.000+0000",
+                "LastActivityDate": None if i % 7 else f"2021-02-{i % 28 + 1:02d}",
+                "Owner": {"attributes": {"type": "User"}, "Name": "Ada"},
+            }
+        )
+    return records
+
+
+@pytest.fixture(autouse=True)
+def fixed_time(monkeypatch):
+    monkeypatch.setattr(time, "time", lambda: 1_600_000_000.25)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "json", "ndjson"])
+@pytest.mark.parametrize("coerce_to_timestamp", [False, True])
+@pytest.mark.parametrize("record_time_added", [False, True])
+@pytest.mark.parametrize("batch_size", [1, 100, 10_000])
+def test_batched_output_is_the_one_of_write_object_to_file(
+    tmp_path, fmt, coerce_to_timestamp, record_time_added, batch_size
+):
+    hook = FakeHook("salesforce_default")
+    records = make_records(1_000)
+    filename = str(tmp_path / f"records.{fmt}")
+    hook.write_object_to_file(
+        records,
+        filename,
+        fmt=fmt,
+        coerce_to_timestamp=coerce_to_timestamp,
+        record_time_added=record_time_added,
+    )
+
+    sink = io.BytesIO()
+    writer = SalesforceRecordWriter(
+        sink,
+        hook,
+        fmt=fmt,
+        coerce_to_timestamp=coerce_to_timestamp,
+        record_time_added=record_time_added,
+        batch_size=batch_size,
+    )
+    # Pages of the REST API.
+    for start in range(0, len(records), 300):
+        writer.write(records[start : start + 300])
+    writer.close()
+
+    with open(filename, "rb") as f:
+        assert sink.getvalue() == f.read()
+    assert writer.record_count == len(records)
+
+
+def test_nothing_written_without_records():
+    sink = io.BytesIO()
+    writer = SalesforceRecordWriter(sink, FakeHook("salesforce_default"), fmt="json")
+    writer.write([])
+    writer.close()
+    assert sink.getvalue() == b""
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        SalesforceRecordWriter(io.BytesIO(), FakeHook("salesforce_default"), fmt="xml")
+
+
+def make_untyped_records(count):
+    """Integer field never null and numeric field always null."""
+    records = make_records(count)
+    for i, record in enumerate(records):
+        record["NumberOfEmployees"] = i * 10
+        record["AnnualRevenue"] = None
+    return records
+
+
+@pytest.mark.parametrize("fmt", ["csv", "json", "ndjson"])
+def test_single_batch_infers_types_as_write_object_to_file(tmp_path, fmt):
+    hook = FakeHook("salesforce_default")
+    records = make_untyped_records(1_000)
+    filename = str(tmp_path / f"records.{fmt}")
+    hook.write_object_to_file(records, filename, fmt=fmt)
+
+    sink = io.BytesIO()
+    writer = SalesforceRecordWriter(sink, hook, fmt=fmt)
+    writer.write(records)
+    assert writer.record_count == len(records)
+    writer.close()
+
+    with open(filename, "rb") as f:
+        expected = f.read()
+    assert sink.getvalue() == expected
+    if fmt == "csv":
+        assert b",9990," in expected
+
+
+@pytest.mark.parametrize("fmt", ["csv", "json", "ndjson"])
+def test_default_path_output_is_the_one_of_write_object_to_file(
+    tmp_path, monkeypatch, fmt
+):
+    from operators import salesforce_to_s3_operator
+    from operators.instrumentation import OperatorMetrics
+
+    hook = FakeHook("salesforce_default")
+    records = make_untyped_records(1_000)
+    monkeypatch.setattr(
+        hook, "make_query", lambda query, **kwargs: {"records": list(records)}
+    )
+    uploaded = {}
+
+    class FakeS3Hook:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def load_file(self, filename, key, bucket_name, replace=False):
+            with open(filename, "rb") as f:
+                uploaded[key] = f.read()
+
+    monkeypatch.setattr(salesforce_to_s3_operator, "S3Hook", FakeS3Hook)
+    operator = salesforce_to_s3_operator.SalesforceToS3Operator(
+        task_id="extract",
+        sf_conn_id="salesforce_default",
+        sf_obj="Account",
+        sf_fields=["Id", "Name", "NumberOfEmployees"],
+        s3_conn_id="aws_default",
+        s3_bucket="mwaa-bucket",
+        s3_key="account",
+        fmt=fmt,
+        # Smaller than the result set, which is still converted at once.
+        batch_size=100,
+    )
+    with open(tmp_path / "tmp", "wb") as tmp:
+        operator._load_to_s3(hook, tmp, OperatorMetrics("test"))
+
+    # The output of the operator before the batched writer.
+    filename = str(tmp_path / f"records.{fmt}")
+    hook.write_object_to_file(records, filename, fmt=fmt)
+    with open(filename, "rb") as f:
+        assert uploaded["account"] == f.read()
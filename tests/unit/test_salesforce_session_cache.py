@@ -0,0 +1,74 @@
+import json
+import time
+import types
+
+import pytest
+
+pytest.importorskip("airflow.providers.salesforce")
+
+import simple_salesforce
+from airflow.providers.salesforce.hooks.salesforce import SalesforceHook
+from operators.salesforce_session_cache import SalesforceSessionCache
+
+PROXIES = {"https": "http://proxy.example.com:3128"}
+
+
+class FakeSalesforce:
+    calls = []
+
+    def __init__(self, **kwargs):
+        FakeSalesforce.calls.append(kwargs)
+        self.session_id = kwargs["session_id"]
+        self.headers = {}
+        self.session = kwargs.get("session") or types.SimpleNamespace(
+            hooks={"response": []}
+        )
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(simple_salesforce, "Salesforce", FakeSalesforce)
+    FakeSalesforce.calls = []
+    return SalesforceSessionCache(directory=str(tmp_path))
+
+
+def connect(cache, monkeypatch, extra, session=None):
+    monkeypatch.setenv(
+        "AIRFLOW_CONN_SALESFORCE_PROXIED",
+        json.dumps({"conn_type": "salesforce", "login": "user", "extra": extra}),
+    )
+    hook = SalesforceHook("salesforce_proxied", session=session)
+    # A session cached by another task: connecting does not log in.
+    cache._sessions[cache._key(hook)] = {
+        "session_id": "00Dcached",
+        "instance": "example.my.salesforce.com",
+        "version": "52.0",
+        "created_at": time.time(),
+    }
+    cache.connect(hook)
+    (call,) = FakeSalesforce.calls
+    return call
+
+
+@pytest.mark.parametrize(
+    "extra",
+    [{"extra__salesforce__proxies": PROXIES}, {"proxies": PROXIES}],
+    ids=["prefixed", "unprefixed"],
+)
+def test_proxies_reach_the_connection(cache, monkeypatch, extra):
+    call = connect(cache, monkeypatch, extra)
+    assert call["proxies"] == PROXIES
+    assert call["session_id"] == "00Dcached"
+    assert call["instance"] == "example.my.salesforce.com"
+
+
+def test_no_proxies(cache, monkeypatch):
+    assert connect(cache, monkeypatch, {})["proxies"] is None
+
+
+def test_session_of_the_hook_is_used(cache, monkeypatch):
+    session = types.SimpleNamespace(hooks={"response": []})
+    call = connect(cache, monkeypatch, {}, session=session)
+    assert call["session"] is session
+    # Rejected sessions are renewed on the session of the hook.
+    assert len(session.hooks["response"]) == 1
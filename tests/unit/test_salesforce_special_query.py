@@ -0,0 +1,116 @@
+import pytest
+
+pytest.importorskip("airflow.providers.salesforce")
+
+from operators.salesforce_to_s3_operator import SalesforceToS3Operator
+
+QUERY = "SELECT Id, (SELECT Id FROM Contacts) FROM Account"
+
+
+def contact(i):
+    return {"attributes": {"type": "Contact"}, "Id": f"003{i}"}
+
+
+# Two pages of accounts. The contacts of the first account are paginated.
+PAGES = {
+    None: {
+        "done": False,
+        "nextRecordsUrl": "/query/01g-2000",
+        "totalSize": 3,
+        "records": [
+            {
+                "Id": "001a",
+                "Contacts": {
+                    "done": False,
+                    "nextRecordsUrl": "/query/01g-contacts-2",
+                    "records": [contact(1), contact(2)],
+                },
+            },
+            {"Id": "001b", "Contacts": None},
+        ],
+    },
+    "/query/01g-2000": {
+        "done": True,
+        "totalSize": 3,
+        "records": [
+            {"Id": "001c", "Contacts": {"done": True, "records": [contact(4)]}}
+        ],
+    },
+    "/query/01g-contacts-2": {"done": True, "records": [contact(3)]},
+}
+
+
+class FakeConnection:
+    def query(self, soql):
+        assert soql == QUERY
+        return PAGES[None]
+
+    def query_more(self, url, identifier_is_url=False):
+        assert identifier_is_url
+        return PAGES[url]
+
+
+class FakeHook:
+    def get_conn(self):
+        return FakeConnection()
+
+    def make_query(self, query):
+        # query_all of simple_salesforce: every page of parents at once.
+        connection = FakeConnection()
+        page = connection.query(query)
+        records = list(page["records"])
+        while not page["done"]:
+            page = connection.query_more(page["nextRecordsUrl"], True)
+            records.extend(page["records"])
+        return {"done": True, "totalSize": len(records), "records": records}
+
+
+@pytest.fixture
+def operator():
+    return SalesforceToS3Operator(
+        task_id="extract",
+        sf_conn_id="salesforce_default",
+        sf_obj="Account",
+        s3_conn_id="aws_default",
+        s3_bucket="mwaa-bucket",
+        s3_key="contacts.csv",
+        query=QUERY,
+        relationship_object="Contacts",
+        batch_size=2,
+    )
+
+
+def test_special_query_returns_the_results_of_make_query(operator):
+    results = operator.special_query(QUERY, FakeHook())
+    assert results["totalSize"] == 3
+    assert [r["Id"] for r in results["records"]] == ["001a", "001b", "001c"]
+
+
+def test_special_query_flattens_every_page_of_children(operator):
+    results = operator.special_query(QUERY, FakeHook(), relationship_object="Contacts")
+    assert [r["Id"] for r in results["records"]] == ["0031", "0032", "0033", "0034"]
+
+
+def test_iter_special_query_yields_pages(operator):
+    pages = operator.iter_special_query(QUERY, FakeHook())
+    assert [[r["Id"] for r in page] for page in pages] == [
+        ["001a", "001b"],
+        ["001c"],
+    ]
+
+
+def test_iter_special_query_yields_batches_of_children(operator):
+    pages = operator.iter_special_query(
+        QUERY, FakeHook(), relationship_object="Contacts"
+    )
+    assert [[r["Id"] for r in page] for page in pages] == [
+        ["0031", "0032"],
+        ["0033", "0034"],
+    ]
+
+
+def test_query_is_required(operator):
+    with pytest.raises(ValueError):
+        operator.special_query(None, FakeHook())
+    with pytest.raises(ValueError):
+        next(operator.iter_special_query("", FakeHook()))
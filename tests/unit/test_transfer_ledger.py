@@ -0,0 +1,91 @@
+import boto3
+import pytest
+
+pytest.importorskip("airflow")
+pytest.importorskip("moto")
+
+try:
+    from moto import mock_aws
+except ImportError:
+    from moto import mock_s3 as mock_aws
+
+from operators.transfer_ledger import SqliteTransferLedger
+
+BUCKET = "mwaa-ledger-test"
+KEY = "ledgers/sync.sqlite"
+S3_URI = f"s3://{BUCKET}/{KEY}"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def open_ledger(**kwargs):
+    ledger = SqliteTransferLedger(S3_URI, **kwargs)
+    ledger.open()
+    return ledger
+
+
+def test_new_ledger_is_empty(s3):
+    ledger = open_ledger()
+    try:
+        assert ledger.count() == 0
+        assert ledger.get("a.csv") is None
+        assert not ledger.is_synced("a.csv", "raw/a.csv", 10)
+    finally:
+        ledger.close()
+
+
+def test_record_checkpoint_and_reopen(s3):
+    ledger = open_ledger()
+    ledger.record("a.csv", "raw/a.csv", 10, "0x1")
+    ledger.record("b.csv", "raw/b.csv", 20)
+    ledger.record("a.csv", "raw/a.csv", 11, "0x2")
+    assert ledger.count() == 2
+    ledger.close()
+    assert s3.head_object(Bucket=BUCKET, Key=KEY)["ContentLength"] > 0
+
+    reopened = open_ledger()
+    try:
+        assert reopened.count() == 2
+        entry = reopened.get("a.csv")
+        assert (entry.s3_key, entry.size, entry.etag) == ("raw/a.csv", 11, "0x2")
+        assert reopened.is_synced("a.csv", "raw/a.csv", 11, "0x2")
+        assert reopened.is_synced("a.csv", "raw/a.csv", 11)
+        assert not reopened.is_synced("a.csv", "raw/a.csv", 11, "0x1")
+        assert not reopened.is_synced("a.csv", "raw/a.csv", 10)
+        assert not reopened.is_synced("a.csv", "other/a.csv", 11)
+        assert reopened.is_synced("b.csv", "raw/b.csv", 20)
+    finally:
+        reopened.close()
+
+
+def test_record_checkpoints_while_open(s3):
+    ledger = open_ledger(checkpoint_interval=0)
+    try:
+        ledger.record("a.csv", "raw/a.csv", 10)
+        # Another worker resuming the transfer sees the blob before close().
+        reader = open_ledger(checkpoint_interval=3600)
+        try:
+            assert reader.is_synced("a.csv", "raw/a.csv", 10)
+        finally:
+            reader.close()
+    finally:
+        ledger.close()
+
+
+def test_record_waits_for_checkpoint_interval(s3):
+    ledger = open_ledger(checkpoint_interval=3600)
+    try:
+        ledger.record("a.csv", "raw/a.csv", 10)
+        assert s3.list_objects_v2(Bucket=BUCKET)["KeyCount"] == 0
+    finally:
+        ledger.close()
+    assert s3.list_objects_v2(Bucket=BUCKET)["KeyCount"] == 1